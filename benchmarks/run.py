@@ -0,0 +1,284 @@
+"""
+Micro-benchmarks of the game managers, the mechanics and the season engine.
+
+Every public GameManager, UserManager and GameMechanics method is timed
+against synthetic data directories of each size (see synthetic.py), plus the
+season engine on its own:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --sizes 10 1000 --baseline benchmarks/baseline.json
+
+Data directories are generated once under --data-root and copied before
+each run, since many benchmarks write. With --baseline the median of every
+benchmark is compared to the stored one, and the command exits with status 1
+if any got slower by more than --tolerance (and by more than --min-delta-ms,
+so sub-millisecond noise doesn't count). --save-baseline writes the results
+as the new baseline. See README.md for the check run in CI.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks import synthetic
+from game import engine, performance, timeline
+from game.data import TEAMS
+from game.drafting import season_entries
+from game.manager import GameManager, GamePhase
+from game.mechanics import GameMechanics
+from game.storage import BACKEND_ENV_VAR
+from game.user_manager import UserManager
+
+DEFAULT_SIZES = [10, 1000, 10_000, 100_000]
+DEFAULT_DATA_ROOT = Path(__file__).parent / ".data"
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+# Each benchmark runs for at least MIN_RUNS calls and MIN_SECONDS, and at most MAX_RUNS calls
+MIN_RUNS = 5
+MIN_SECONDS = 0.3
+MAX_RUNS = 200
+
+# Allowed slowdown of a median against the baseline before it fails the check
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_MIN_DELTA_MS = 0.5
+
+def measure(fn: Callable, setup: Optional[Callable[[], Tuple]] = None) -> Dict:
+    """Time fn, calling setup (untimed) before every call for its arguments"""
+    times = []
+    started = time.perf_counter()
+    while len(times) < MIN_RUNS or (time.perf_counter() - started < MIN_SECONDS and len(times) < MAX_RUNS):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    times_ms = np.array(times) * 1000
+    return {
+        'runs': len(times),
+        'median_ms': float(np.median(times_ms)),
+        'min_ms': float(times_ms.min()),
+        'p95_ms': float(np.percentile(times_ms, 95))
+    }
+
+class Context:
+    """Managers over one data directory and fresh games for the benchmarks that consume one"""
+    def __init__(self, data_dir: Path):
+        self.game_manager = GameManager(str(data_dir))
+        self.user_manager = UserManager(str(data_dir))
+        self.mechanics = GameMechanics(str(data_dir))
+        self.counter = itertools.count()
+
+        summaries, _ = self.game_manager.get_game_summaries(page_size=100)
+        self.active_ids = [summary['id'] for summary in summaries]
+        self.archived_ids = [summary['game_id'] for summary in self.mechanics.store.find_results()[:100]]
+        self.lineup = season_entries({}, ())[:2]
+
+    def active_id(self) -> Tuple[str]:
+        return (self.active_ids[next(self.counter) % len(self.active_ids)],)
+
+    def archived_id(self) -> Tuple[str]:
+        return (self.archived_ids[next(self.counter) % len(self.archived_ids)],)
+
+    def stored_timeline_id(self) -> Tuple[str]:
+        """An archived game whose race timeline is already on disk"""
+        game_id = self.archived_id()
+        self.mechanics.race_timeline(*game_id)
+        return game_id
+
+    def unbuilt_timeline_id(self) -> Tuple[str]:
+        """An archived game whose race timeline has to be built from its seed"""
+        game_id = self.archived_id()
+        timeline.timeline_path(self.mechanics.data_dir, *game_id).unlink(missing_ok=True)
+        return game_id
+
+    def new_game(self, phase: GamePhase = GamePhase.TEAM_SELECTION) -> Dict:
+        """A fresh game with one player, taken up to the given phase"""
+        game = self.game_manager.create_game("Benchmark", synthetic.username(0))
+        if phase == GamePhase.TEAM_SELECTION:
+            return game
+        team = self.lineup[0]['team']
+        self.game_manager.select_team(game['id'], synthetic.username(0), team)
+        if phase == GamePhase.DRIVER_SELECTION:
+            return self.game_manager.get_game(game['id'])
+        self.game_manager.select_drivers(game['id'], team, [entry['name'] for entry in self.lineup])
+        return self.game_manager.update_game_phase(game['id'], phase)
+
+    def season_args(self) -> Tuple[str, List[Dict]]:
+        """Arguments of a season simulation of a fresh game"""
+        game = self.new_game(GamePhase.SEASON)
+        return game['id'], game['players']
+
+def storage_benchmarks(ctx: Context) -> Dict[str, Tuple[Callable, Optional[Callable]]]:
+    """Benchmarks that depend on the size of the data directory, by name: (fn, setup)"""
+    gm, um, mech = ctx.game_manager, ctx.user_manager, ctx.mechanics
+    team = ctx.lineup[0]['team']
+    drivers = [entry['name'] for entry in ctx.lineup]
+
+    def transaction(game_id: str):
+        with gm.transaction(game_id) as tx:
+            tx.select_drivers(team, drivers)
+            tx.complete_driver_selection()
+
+    # Reads run first, before the writes add games to the data directory
+    return {
+        'GameManager.get_game': (gm.get_game, ctx.active_id),
+        'GameManager.get_game[archived]': (gm.get_game, ctx.archived_id),
+        'GameManager.get_all_games': (gm.get_all_games, None),
+        'GameManager.get_game_summaries': (lambda: gm.get_game_summaries(page=1), None),
+        'GameManager.get_game_summaries[search]': (
+            lambda: gm.get_game_summaries(search="synthetic 1", open_only=True), None
+        ),
+        'GameManager.get_archived_games': (lambda: next(gm.get_archived_games()), None),
+        'GameManager.get_game_destination': (gm.get_game_destination,
+                                             lambda: (gm.get_game(ctx.active_id()[0]),)),
+        'UserManager.verify_login': (lambda: um.verify_login(synthetic.username(0), synthetic.PASSWORD), None),
+        'GameMechanics.get_game_results': (mech.get_game_results, ctx.archived_id),
+        'GameMechanics.replay_season': (mech.replay_season,
+                                        lambda: (mech.get_game_results(ctx.archived_id()[0]),)),
+        'GameMechanics.get_race_results': (mech.get_race_results, ctx.archived_id),
+        'GameMechanics.race_timeline': (mech.race_timeline, ctx.stored_timeline_id),
+        'GameMechanics.race_timeline[build]': (mech.race_timeline, ctx.unbuilt_timeline_id),
+        'GameManager.create_game': (lambda: gm.create_game("Benchmark", synthetic.username(0)), None),
+        'GameManager.join_game': (lambda game_id: gm.join_game(game_id, synthetic.username(1)),
+                                  lambda: (ctx.new_game()['id'],)),
+        'GameManager.select_team': (lambda game_id: gm.select_team(game_id, synthetic.username(0), team),
+                                    lambda: (ctx.new_game()['id'],)),
+        'GameManager.select_drivers': (lambda game_id: gm.select_drivers(game_id, team, drivers),
+                                       lambda: (ctx.new_game(GamePhase.DRIVER_SELECTION)['id'],)),
+        'GameManager.transaction': (transaction, lambda: (ctx.new_game(GamePhase.DRIVER_SELECTION)['id'],)),
+        'GameManager.archive_game': (gm.archive_game, lambda: (ctx.new_game()['id'],)),
+        'GameManager.update_game_phase': (lambda game_id: gm.update_game_phase(game_id, GamePhase.PRE_SEASON),
+                                          lambda: (ctx.new_game(GamePhase.DRIVER_SELECTION)['id'],)),
+        'GameManager.save_game': (gm.save_game, lambda: (gm.get_game(ctx.active_id()[0]),)),
+        'GameManager.delete_game': (gm.delete_game, lambda: (ctx.new_game()['id'],)),
+        'UserManager.create_user': (um.create_user, lambda: (f"bench_{next(ctx.counter)}", synthetic.PASSWORD)),
+        'GameMechanics.simulate_season': (mech.simulate_season, ctx.season_args),
+        'GameMechanics.season_events': (
+            lambda game_id, players: list(mech.season_events(game_id, players)),
+            ctx.season_args
+        ),
+        'GameMechanics.championship_odds': (
+            lambda game_id: mech.championship_odds(game_id, 2000, tolerance=None, seed=0),
+            lambda: (ctx.new_game(GamePhase.SEASON)['id'],)
+        ),
+        'GameMechanics.upgrade_advice': (
+            lambda game_id: mech.upgrade_advice(game_id, team, seasons=500, seed=0),
+            lambda: (ctx.new_game(GamePhase.SEASON)['id'],)
+        ),
+    }
+
+def engine_benchmarks() -> Dict[str, Tuple[Callable, Optional[Callable]]]:
+    """Benchmarks of the season engine alone"""
+    entries = season_entries({}, ())
+    upgrades = {TEAMS[0].name: "power_unit"}
+    seeds = itertools.count()
+    return {
+        'engine.simulate_season': (lambda: engine.simulate_season(entries, seed=next(seeds)), None),
+        'engine.simulate_season[cold matrix]': (
+            lambda: engine.simulate_season(entries, seed=next(seeds), upgrades=upgrades),
+            lambda: performance.matrix_cache.clear() or ()
+        ),
+        'engine.race_events': (lambda: list(engine.race_events(entries, seed=next(seeds))), None),
+        'engine.simulate_championships[1000]': (
+            lambda: engine.simulate_championships(entries, 1000, rng=np.random.default_rng(next(seeds))),
+            None
+        ),
+    }
+
+def run_benchmarks(benchmarks: Dict[str, Tuple[Callable, Optional[Callable]]], suffix: str = "") -> Dict[str, Dict]:
+    results = {}
+    for name, (fn, setup) in benchmarks.items():
+        key = f"{name}{suffix}"
+        results[key] = measure(fn, setup)
+        print(f"{key:<60} {results[key]['median_ms']:>10.3f} ms", file=sys.stderr)
+    return results
+
+def run(sizes: List[int], data_root: Path) -> Dict:
+    results = run_benchmarks(engine_benchmarks())
+    for size in sizes:
+        started = time.perf_counter()
+        template = synthetic.ensure(data_root, size)
+        print(f"Data directory with {size:,} games ready in {time.perf_counter() - started:.1f}s",
+              file=sys.stderr)
+        with tempfile.TemporaryDirectory() as scratch:
+            # Benchmarks write, so they run against a copy
+            data_dir = Path(scratch) / "data"
+            shutil.copytree(template, data_dir)
+            results.update(run_benchmarks(storage_benchmarks(Context(data_dir)), f"[games={size}]"))
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'storage_backend': os.environ.get(BACKEND_ENV_VAR, "json"),
+            'sizes': sizes
+        },
+        'benchmarks': results
+    }
+
+def compare(current: Dict, baseline: Dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """Benchmarks whose median regressed against the baseline, as report lines"""
+    regressions = []
+    for key, result in current['benchmarks'].items():
+        previous = baseline['benchmarks'].get(key)
+        if previous is None:
+            continue
+        delta = result['median_ms'] - previous['median_ms']
+        if result['median_ms'] > previous['median_ms'] * (1 + tolerance) and delta > min_delta_ms:
+            regressions.append(f"{key}: {previous['median_ms']:.3f} ms -> {result['median_ms']:.3f} ms "
+                               f"({result['median_ms'] / previous['median_ms']:.2f}x)")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="games per synthetic data directory")
+    parser.add_argument("--data-root", type=Path, default=DEFAULT_DATA_ROOT,
+                        help="where synthetic data directories are generated and kept")
+    parser.add_argument("--output", type=Path, help="write the results here as JSON")
+    parser.add_argument("--baseline", type=Path, help="fail if slower than this stored baseline")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help=f"store the results as the baseline (default {DEFAULT_BASELINE})")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative slowdown of a median (default %(default)s)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="slowdowns smaller than this never fail (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    # The managers log every call at INFO
+    logging.basicConfig(level=logging.WARNING)
+    report = run(args.sizes, args.data_root)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        (args.baseline or DEFAULT_BASELINE).write_text(json.dumps(report, indent=2))
+
+    if args.baseline and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline['meta'].get('storage_backend') != report['meta']['storage_backend']:
+            print(f"Warning: baseline used the {baseline['meta'].get('storage_backend')} backend",
+                  file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} benchmarks regressed:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            return 1
+        print("No regressions against the baseline", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Synthetic data directories for the benchmarks.
+
+A data directory of size N holds N active games spread over every phase,
+N archived games spread over two years of monthly partitions, each with a
+season result, and up to MAX_USERS users. Everything is written through the
+storage backend, so the layout (indexes, journals, archive offsets) is
+exactly what the app would produce.
+"""
+import copy
+import random
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from game.data import MAX_PLAYERS, TEAMS
+from game.drafting import season_entries
+from game.manager import GameManager, GamePhase
+from game.mechanics import GameMechanics
+from game.upgrades import UPGRADES
+from game.user_manager import UserManager
+
+# Users created for any data directory size
+MAX_USERS = 2000
+# Password of every synthetic user
+PASSWORD = "benchmark"
+# Marker written once a directory is complete, so it can be reused
+COMPLETE_MARKER = ".complete"
+
+def username(i: int) -> str:
+    return f"user_{i}"
+
+def _lineups(rng: random.Random, players: int) -> Dict[str, List[str]]:
+    """Teams and affordable drivers of `players` players, drafted like AI teams"""
+    teams = rng.sample([team.name for team in TEAMS], players)
+    entries = season_entries({}, ())
+    drivers = {}
+    for entry in entries:
+        drivers.setdefault(entry['team'], []).append(entry['name'])
+    return {team: drivers[team] for team in teams}
+
+def _game(rng: random.Random, game_id: str, phase: GamePhase, users: int, created_at: datetime) -> Dict:
+    usernames = [username(i) for i in rng.sample(range(users), min(rng.randint(1, MAX_PLAYERS), users))]
+    lineups = _lineups(rng, len(usernames))
+    game = {
+        'id': game_id,
+        'name': f"Synthetic {game_id}",
+        'created_at': created_at.isoformat(),
+        'phase': phase.value,
+        'creator': usernames[0],
+        'seed': rng.getrandbits(128),
+        'players': [
+            {'username': name, 'slot': slot, 'team': team}
+            for slot, (name, team) in enumerate(zip(usernames, lineups))
+        ]
+    }
+    if phase == GamePhase.TEAM_SELECTION:
+        for player in game['players']:
+            player['team'] = None
+    else:
+        if phase != GamePhase.DRIVER_SELECTION:
+            game['drivers'] = lineups
+        if phase in (GamePhase.SEASON, GamePhase.FINISHED):
+            game['upgrades'] = {team: rng.choice(list(UPGRADES)) for team in lineups}
+    return game
+
+def _result(template: Dict, game: Dict, rng: random.Random) -> Dict:
+    """A season result for a finished game, reusing the standings of a real one"""
+    result = copy.deepcopy(template)
+    result['timestamp'] = game['completed_at']
+    result['seed'] = game['seed']
+    result['players'] = game['players']
+    champion = rng.choice(result['driver_standings'])
+    result['drivers_championship'] = {key: champion[key] for key in ('driver', 'team', 'is_ai')}
+    team = rng.choice(result['constructor_standings'])
+    result['constructors_championship'] = {key: team[key] for key in ('team', 'is_ai')}
+    return result
+
+def generate(data_dir: Path, games: int, seed: int = 0) -> None:
+    """Fill an empty data directory with `games` active and `games` archived games"""
+    rng = random.Random(seed)
+    game_manager = GameManager(str(data_dir))
+    user_manager = UserManager(str(data_dir))
+    store = game_manager.store
+
+    users = min(games, MAX_USERS)
+    for i in range(users):
+        user_manager.create_user(username(i), PASSWORD)
+
+    # One real season provides the standings every synthetic result reuses
+    template_game = game_manager.create_game("Template", username(0))
+    game_manager.select_team(template_game['id'], username(0), TEAMS[0].name)
+    players = game_manager.get_game(template_game['id'])['players']
+    template = GameMechanics(str(data_dir)).simulate_season(template_game['id'], players)
+
+    now = datetime.now()
+    active_phases = [phase for phase in GamePhase if phase != GamePhase.FINISHED]
+    for i in range(games):
+        game = _game(rng, game_manager.id_allocator.next_id(), active_phases[i % len(active_phases)],
+                     users, now - timedelta(minutes=i))
+        store.save_game(game, "create", expected_version=0)
+
+    for i in range(games):
+        completed = now - timedelta(days=rng.uniform(0, 730))
+        game = _game(rng, game_manager.id_allocator.next_id(), GamePhase.FINISHED, users,
+                     completed - timedelta(hours=1))
+        game['completed_at'] = completed.isoformat()
+        store.archive_game(game)
+        store.save_result(game['id'], _result(template, game, rng))
+
+    (data_dir / COMPLETE_MARKER).touch()
+
+def ensure(root: Path, games: int) -> Path:
+    """The synthetic data directory of a size, generated on first use"""
+    data_dir = root / f"games_{games}"
+    if not (data_dir / COMPLETE_MARKER).exists():
+        if data_dir.exists():
+            # Left over from an interrupted generation
+            shutil.rmtree(data_dir)
+        data_dir.mkdir(parents=True)
+        generate(data_dir, games)
+    return data_dir
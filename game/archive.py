@@ -0,0 +1,308 @@
+"""
+Archive of finished games, partitioned by completion month.
+
+Layout inside the archive directory:
+    <YYYY-MM>.jsonl       hot partition, one game per line, appended to
+    <YYYY-MM>.jsonl.gz    cold partition, gzip compressed
+
+    offsets.log           id -> (partition file, byte offset, length)
+
+Archiving a game appends one line to the hot partition of its completion
+month. Once a month is more than HOT_MONTHS behind the current one, its hot
+partition is compressed into the cold one (the file is atomically replaced)
+and then removed. A month can briefly have both files, e.g. when a late
+game lands in an already compressed month, so readers always merge the two.
+
+Cold partitions hold one gzip member per game. The file still decompresses
+as a single stream, and every record can also be decompressed on its own,
+which lets offsets.log point straight at it for single-game lookups.
+"""
+import gzip
+import json
+import mmap
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from game import journal
+from utils import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+HOT_SUFFIX = ".jsonl"
+COLD_SUFFIX = ".jsonl.gz"
+
+OFFSETS_FILE = "offsets.log"
+# Written once offsets.log covers every partition
+OFFSETS_BUILT_MARKER = "offsets.built"
+
+# Hot partitions this many months behind the current month get compressed
+HOT_MONTHS = 1
+
+def completed_at(game: Dict) -> str:
+    """Completion timestamp of an archived game (creation time for old records)"""
+    return game.get('completed_at') or game['created_at']
+
+def partition_key(game: Dict) -> str:
+    """Month (YYYY-MM) of the partition that holds a game or its summary"""
+    return completed_at(game)[:7]
+
+class OffsetIndex:
+    """
+    In-memory view of the append-only offsets.log. Lines appended by any
+    process are read incrementally, so a lookup normally costs one stat.
+    Later lines win, which is how compression moves a record.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries: Dict[str, Tuple[str, int, int]] = {}
+        self._position = 0
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def add(self, entries: List[Tuple[str, str, int, int]]) -> None:
+        """Record (game id, partition file, offset, length) locations"""
+        with journal.locked(self.path, shared=True) as f:
+            for game_id, file_name, offset, length in entries:
+                journal.append(f, {'id': game_id, 'file': file_name,
+                                   'offset': offset, 'length': length})
+
+    def lookup(self, game_id: str) -> Optional[Tuple[str, int, int]]:
+        with self._lock:
+            self._refresh()
+            return self._entries.get(game_id)
+
+    def _refresh(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+        if stat is None or stat.st_ino != self._inode or stat.st_size < self._position:
+            self._entries.clear()
+            self._position = 0
+            self._inode = stat.st_ino if stat else None
+        if stat is None or stat.st_size == self._position:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._position)
+            data = f.read(stat.st_size - self._position)
+        # Leave a line that is still being written for the next refresh
+        complete = data.rfind(b'\n') + 1
+        for line in data[:complete].splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping torn record in {self.path}")
+                continue
+            self._entries[record['id']] = (record['file'], record['offset'], record['length'])
+        self._position += complete
+
+class GameArchive:
+    def __init__(self, archive_dir: Path):
+        self.archive_dir = archive_dir
+        self.offsets = OffsetIndex(archive_dir / OFFSETS_FILE)
+        self._maps: Dict[Path, Tuple[int, mmap.mmap]] = {}
+        self._maps_lock = threading.Lock()
+
+    def hot_path(self, month: str) -> Path:
+        return self.archive_dir / f"{month}{HOT_SUFFIX}"
+
+    def cold_path(self, month: str) -> Path:
+        return self.archive_dir / f"{month}{COLD_SUFFIX}"
+
+    def partitions(self) -> List[str]:
+        """Months that have a partition, newest first"""
+        months = set()
+        for path in self.archive_dir.iterdir():
+            if path.name.endswith(COLD_SUFFIX):
+                months.add(path.name[:-len(COLD_SUFFIX)])
+            elif path.name.endswith(HOT_SUFFIX):
+                months.add(path.name[:-len(HOT_SUFFIX)])
+        return sorted(months, reverse=True)
+
+    def append(self, game: Dict) -> None:
+        """Archive one game by appending it to its month's hot partition"""
+        path = self.hot_path(partition_key(game))
+        while True:
+            with journal.locked(path) as f:
+                if os.fstat(f.fileno()).st_nlink == 0:
+                    # Compressed and removed while we waited for the lock
+                    continue
+                offset = f.seek(0, os.SEEK_END)
+                end = journal.append(f, game)
+            # Indexed only once fully written, so lookups never see a partial record
+            self.offsets.add([(game['id'], path.name, offset, end - offset)])
+            return
+
+    def _mapping(self, path: Path, needed: int) -> Optional[mmap.mmap]:
+        """Memory map of a partition file covering at least `needed` bytes"""
+        with self._maps_lock:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return None
+            cached = self._maps.get(path)
+            if cached and cached[0] == stat.st_ino and len(cached[1]) >= needed:
+                return cached[1]
+            if stat.st_size < needed:
+                return None
+            # A replaced or grown file gets a fresh mapping; the old one is
+            # released once no reader holds it anymore
+            with open(path, 'rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[path] = (stat.st_ino, mapping)
+            return mapping
+
+    @tracing.traced()
+    def lookup(self, game_id: str) -> Optional[Dict]:
+        """Read one game straight from its recorded offset, None if not indexed"""
+        location = self.offsets.lookup(game_id)
+        if location is None:
+            return None
+        file_name, offset, length = location
+        mapping = self._mapping(self.archive_dir / file_name, offset + length)
+        if mapping is None:
+            return None
+        try:
+            data = mapping[offset:offset + length]
+            if file_name.endswith(COLD_SUFFIX):
+                data = gzip.decompress(data)
+            game = metrics.load_json(data, "json")
+        except (OSError, EOFError, ValueError) as e:
+            logger.warning(f"Bad offset entry for archived game {game_id}: {e}")
+            return None
+        return game if game.get('id') == game_id else None
+
+    def _read_cold(self, month: str) -> List[Dict]:
+        games = []
+        try:
+            with gzip.open(self.cold_path(month), 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        games.append(metrics.load_json(line, "json"))
+        except FileNotFoundError:
+            pass
+        except (EOFError, gzip.BadGzipFile) as e:
+            logger.warning(f"Stopped reading damaged partition {self.cold_path(month)}: {e}")
+        return games
+
+    @tracing.traced()
+    def read_partition(self, month: str) -> List[Dict]:
+        """Load every game of one month, newest completion first"""
+        games = []
+        # Read the hot file first: while we hold its lock it cannot be folded
+        # into the cold file, and once it is gone the cold file has its games
+        try:
+            with journal.locked(self.hot_path(month), shared=True, create=False) as f:
+                games.extend(journal.read(f))
+        except FileNotFoundError:
+            pass
+        games = self._read_cold(month) + games
+
+        # The same game can briefly show up in both files; keep one copy
+        unique = {game['id']: game for game in games}
+        return sorted(unique.values(), key=completed_at, reverse=True)
+
+    def iter_games(self) -> Iterator[Dict]:
+        """Yield archived games newest completion first, one partition at a time"""
+        for month in self.partitions():
+            yield from self.read_partition(month)
+
+    def find(self, game_id: str, month: str) -> Optional[Dict]:
+        """Look up one game in the partition of the given month"""
+        return next((game for game in self.read_partition(month) if game['id'] == game_id), None)
+
+    def _stale_months(self, now: Optional[datetime] = None) -> List[str]:
+        now = now or datetime.now()
+        months_since_epoch = now.year * 12 + now.month - 1 - HOT_MONTHS
+        cutoff = f"{months_since_epoch // 12:04d}-{months_since_epoch % 12 + 1:02d}"
+        return [path.name[:-len(HOT_SUFFIX)] for path in self.archive_dir.glob(f"*{HOT_SUFFIX}")
+                if path.name[:-len(HOT_SUFFIX)] < cutoff]
+
+    def needs_compression(self) -> bool:
+        return bool(self._stale_months())
+
+    def _write_cold(self, month: str, existing: bytes, games: List[Dict]) -> None:
+        """
+        Atomically replace a cold partition with `existing` followed by one
+        gzip member per game, and index the new records
+        """
+        cold_path = self.cold_path(month)
+        chunks = [existing]
+        entries = []
+        offset = len(existing)
+        for game in games:
+            member = gzip.compress(metrics.dump_json(game, "json", separators=(',', ':')).encode() + b'\n')
+            chunks.append(member)
+            entries.append((game['id'], cold_path.name, offset, len(member)))
+            offset += len(member)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.archive_dir, prefix=f".{cold_path.name}.")
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(b"".join(chunks))
+        os.replace(tmp_path, cold_path)
+        self.offsets.add(entries)
+
+    def compress_cold_partitions(self) -> None:
+        """Fold hot partitions of past months into their gzip files"""
+        for month in self._stale_months():
+            hot_path = self.hot_path(month)
+            try:
+                with journal.locked(hot_path, create=False) as f:
+                    if os.fstat(f.fileno()).st_nlink == 0:
+                        continue
+                    games = journal.read(f)
+                    if games:
+                        cold_path = self.cold_path(month)
+                        existing = cold_path.read_bytes() if cold_path.exists() else b""
+                        self._write_cold(month, existing, games)
+                    hot_path.unlink()
+                logger.info(f"Compressed archive partition {month}")
+            except FileNotFoundError:
+                continue
+
+    def needs_offsets(self) -> bool:
+        return not (self.archive_dir / OFFSETS_BUILT_MARKER).exists()
+
+    def build_offsets(self) -> None:
+        """
+        Index every partition written before offsets.log existed. Cold
+        partitions are rewritten with one gzip member per game so their
+        records can be decompressed on their own.
+        """
+        for month in self.partitions():
+            hot_path = self.hot_path(month)
+            # Holding the hot lock keeps appends and compression of this month out
+            with journal.locked(hot_path) as f:
+                if os.fstat(f.fileno()).st_nlink == 0:
+                    continue
+                cold_games = self._read_cold(month)
+                if cold_games:
+                    self._write_cold(month, b"", cold_games)
+
+                entries = []
+                f.seek(0)
+                offset = 0
+                for line in f:
+                    if line.strip():
+                        try:
+                            game_id = json.loads(line)['id']
+                        except ValueError:
+                            game_id = None
+                        if game_id:
+                            entries.append((game_id, hot_path.name, offset, len(line)))
+                    offset += len(line)
+                self.offsets.add(entries)
+
+                if offset == 0:
+                    # Only created to take the lock
+                    hot_path.unlink()
+        (self.archive_dir / OFFSETS_BUILT_MARKER).touch()
+        logger.info(f"Built archive offset index in {self.archive_dir}")
@@ -0,0 +1,350 @@
+"""
+Headless batch simulation for balance testing.
+
+Runs the season engine over a scenario file on every core and streams
+aggregated statistics to CSV and/or JSON Lines:
+
+    python -m game.batch scenarios.json --csv balance.csv --json balance.jsonl
+
+A scenario file is a JSON object. Top-level "seasons", "seeds" and
+"batch_size" are defaults that each scenario may override:
+
+    {
+        "seasons": 100000,
+        "seeds": [0, 4],
+        "scenarios": [
+            {"name": "defaults"},
+            {
+                "name": "mclaren_power_unit",
+                "lineups": {"McLaren": ["Lando Norris", "Oscar Piastri"]},
+                "upgrades": {"McLaren": "power_unit"}
+            }
+        ]
+    }
+
+"seeds" is a range [start, stop) or a single seed, and every seed runs
+"seasons" seasons, so results are reproducible whatever the worker count.
+Lineups are the player-picked teams; every other team is run by the AI,
+and the AI teams share out the drivers left over in a snake draft (see
+game/drafting.py). Seasons are reduced to title counts, points histograms and sums as
+they come back from the workers, so memory does not grow with the season
+count.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+import logging
+
+import numpy as np
+
+from game import engine, roster
+from game.drafting import season_entries
+from game.upgrades import UPGRADES
+
+logger = logging.getLogger(__name__)
+
+# Seasons simulated per worker task
+DEFAULT_BATCH_SIZE = 2000
+# Tasks queued per worker, enough to keep every core busy without queueing the whole run
+TASKS_PER_WORKER = 2
+# Percentiles of the points distributions written out
+PERCENTILES = (10, 50, 90)
+
+CSV_FIELDS = [
+    'scenario', 'category', 'name', 'team', 'is_ai', 'seasons', 'titles', 'title_share',
+    'points_mean', 'points_std', 'points_p10', 'points_p50', 'points_p90',
+    'wins_per_season', 'podiums_per_season', 'dnfs_per_season'
+]
+
+@dataclass
+class Scenario:
+    name: str
+    entries: List[Dict]
+    upgrades: Dict[str, str]
+    seeds: List[int]
+    seasons: int     # per seed
+    batch_size: int
+
+    @property
+    def total_seasons(self) -> int:
+        return self.seasons * len(self.seeds)
+
+def _seed_range(value) -> List[int]:
+    if isinstance(value, int):
+        return [value]
+    if isinstance(value, list) and len(value) == 2 and all(isinstance(v, int) for v in value):
+        if value[1] <= value[0]:
+            raise ValueError(f"Empty seed range {value}")
+        return list(range(value[0], value[1]))
+    raise ValueError(f"Seeds must be a seed or a [start, stop) range, got {value!r}")
+
+def load_scenarios(path: str) -> List[Scenario]:
+    """Read and validate a scenario file"""
+    with open(path) as f:
+        spec = json.load(f)
+
+    scenarios = []
+    for i, item in enumerate(spec.get('scenarios', [{}])):
+        name = item.get('name', f"scenario_{i + 1}")
+        lineups = item.get('lineups', {})
+        upgrades = item.get('upgrades', {})
+
+        for team, drivers in lineups.items():
+            if team not in roster.TEAMS:
+                raise ValueError(f"{name}: unknown team {team!r}")
+            unknown = [driver for driver in drivers if driver not in roster.DRIVERS]
+            if unknown:
+                raise ValueError(f"{name}: unknown drivers {unknown} in {team}")
+            if len(drivers) != 2:
+                raise ValueError(f"{name}: {team} needs exactly 2 drivers")
+        picked = [driver for drivers in lineups.values() for driver in drivers]
+        if len(picked) != len(set(picked)):
+            raise ValueError(f"{name}: a driver is picked by more than one team")
+        for team, upgrade in upgrades.items():
+            if team not in roster.TEAMS:
+                raise ValueError(f"{name}: unknown team {team!r} in upgrades")
+            if upgrade not in UPGRADES:
+                raise ValueError(f"{name}: unknown upgrade {upgrade!r}")
+
+        seasons = item.get('seasons', spec.get('seasons', 10_000))
+        batch_size = item.get('batch_size', spec.get('batch_size', DEFAULT_BATCH_SIZE))
+        if seasons < 1 or batch_size < 1:
+            raise ValueError(f"{name}: seasons and batch_size must be positive")
+        scenarios.append(Scenario(
+            name=name,
+            entries=season_entries(lineups),
+            upgrades=upgrades,
+            seeds=_seed_range(item.get('seeds', spec.get('seeds', 0))),
+            seasons=seasons,
+            batch_size=batch_size
+        ))
+    return scenarios
+
+def _team_size(entries: List[Dict]) -> int:
+    _, team_index = engine.entry_teams(entries)
+    return int(np.bincount(team_index).max())
+
+def simulate_batch(entries: List[Dict], upgrades: Dict[str, str], seasons: int,
+                   seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+    """
+    Aggregates of one batch of seasons: title counts, points histograms and
+    win, podium and retirement sums. Module level so it can run in a worker process.
+    """
+    driver_points, wins, podiums, dnfs = engine.season_totals(
+        entries, seasons, rng=np.random.default_rng(seed), upgrades=upgrades
+    )
+    driver_champions, constructor_champions = engine.champions(entries, driver_points, wins, podiums)
+    team_names, team_index = engine.entry_teams(entries)
+    team_points = driver_points @ (team_index[:, None] == np.arange(len(team_names)))
+
+    driver_width = engine.POINTS[0] * len(roster.TRACKS) + 1
+    team_width = engine.POINTS[:_team_size(entries)].sum() * len(roster.TRACKS) + 1
+    return {
+        'driver_titles': np.bincount(driver_champions, minlength=len(entries)),
+        'team_titles': np.bincount(constructor_champions, minlength=len(team_names)),
+        # One flat bincount per histogram: bin = entry * width + points
+        'driver_points': np.bincount(
+            (np.arange(len(entries)) * driver_width + driver_points).ravel(),
+            minlength=len(entries) * driver_width
+        ).reshape(len(entries), driver_width),
+        'team_points': np.bincount(
+            (np.arange(len(team_names)) * team_width + team_points).ravel(),
+            minlength=len(team_names) * team_width
+        ).reshape(len(team_names), team_width),
+        'wins': wins.sum(axis=0),
+        'podiums': podiums.sum(axis=0),
+        'dnfs': dnfs.sum(axis=0)
+    }
+
+def _batches(scenario: Scenario) -> Iterator[Tuple[int, np.random.SeedSequence]]:
+    """Season count and seed of every batch; batch k of seed s draws from spawn key (k,)"""
+    for seed in scenario.seeds:
+        for k, start in enumerate(range(0, scenario.seasons, scenario.batch_size)):
+            yield (min(scenario.batch_size, scenario.seasons - start),
+                   np.random.SeedSequence(seed, spawn_key=(k,)))
+
+def _add(totals: Optional[Dict[str, np.ndarray]], batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    if totals is None:
+        return batch
+    for key, value in batch.items():
+        totals[key] += value
+    return totals
+
+def run_scenario(scenario: Scenario, pool: Optional[ProcessPoolExecutor] = None,
+                 workers: int = 1) -> Dict[str, np.ndarray]:
+    """Simulate every season of a scenario and return the summed batch aggregates"""
+    totals = None
+    batches = _batches(scenario)
+    if pool is None:
+        for seasons, seed in batches:
+            totals = _add(totals, simulate_batch(scenario.entries, scenario.upgrades, seasons, seed))
+        return totals
+
+    # Keep a bounded number of batches in flight so the queue stays small for any season count
+    pending = set()
+    for seasons, seed in batches:
+        if len(pending) >= workers * TASKS_PER_WORKER:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                totals = _add(totals, future.result())
+        pending.add(pool.submit(simulate_batch, scenario.entries, scenario.upgrades, seasons, seed))
+    for future in wait(pending).done:
+        totals = _add(totals, future.result())
+    return totals
+
+def _distribution(histogram: np.ndarray) -> Dict:
+    """Mean, standard deviation, percentiles and trimmed counts of a points histogram"""
+    total = histogram.sum()
+    points = np.arange(len(histogram))
+    mean = (points * histogram).sum() / total
+    std = np.sqrt(max(((points - mean) ** 2 * histogram).sum() / total, 0))
+    cumulative = np.cumsum(histogram)
+    percentiles = {f"p{p}": int(np.searchsorted(cumulative, total * p / 100)) for p in PERCENTILES}
+    present = np.flatnonzero(histogram)
+    return {
+        'mean': float(mean),
+        'std': float(std),
+        **percentiles,
+        'histogram': {'min': int(present[0]),
+                      'counts': histogram[present[0]:present[-1] + 1].tolist()}
+    }
+
+def summarize(scenario: Scenario, totals: Dict[str, np.ndarray]) -> Dict:
+    """JSON-ready statistics of a finished scenario"""
+    seasons = scenario.total_seasons
+    team_names, team_index = engine.entry_teams(scenario.entries)
+
+    def rates(key: str, index) -> Dict:
+        return {f"{key}_per_season": float(totals[key][index].sum() / seasons)}
+
+    drivers = [
+        {
+            'name': entry['name'],
+            'team': entry['team'],
+            'is_ai': entry['is_ai'],
+            'titles': int(totals['driver_titles'][i]),
+            'title_share': float(totals['driver_titles'][i] / seasons),
+            'points': _distribution(totals['driver_points'][i]),
+            **rates('wins', i), **rates('podiums', i), **rates('dnfs', i)
+        }
+        for i, entry in enumerate(scenario.entries)
+    ]
+    teams = [
+        {
+            'name': team,
+            'is_ai': all(entry['is_ai'] for entry in scenario.entries if entry['team'] == team),
+            'titles': int(totals['team_titles'][t]),
+            'title_share': float(totals['team_titles'][t] / seasons),
+            'points': _distribution(totals['team_points'][t]),
+            **rates('wins', team_index == t), **rates('podiums', team_index == t),
+            **rates('dnfs', team_index == t)
+        }
+        for t, team in enumerate(team_names)
+    ]
+    return {
+        'scenario': scenario.name,
+        'seasons': seasons,
+        'seeds': scenario.seeds,
+        'upgrades': scenario.upgrades,
+        'engine_version': engine.ENGINE_VERSION,
+        'drivers': sorted(drivers, key=lambda row: row['title_share'], reverse=True),
+        'teams': sorted(teams, key=lambda row: row['title_share'], reverse=True)
+    }
+
+def _csv_rows(summary: Dict) -> Iterator[Dict]:
+    for category, rows in (('driver', summary['drivers']), ('team', summary['teams'])):
+        for row in rows:
+            points = row['points']
+            yield {
+                'scenario': summary['scenario'],
+                'category': category,
+                'name': row['name'],
+                'team': row.get('team', row['name']),
+                'is_ai': row['is_ai'],
+                'seasons': summary['seasons'],
+                'titles': row['titles'],
+                'title_share': f"{row['title_share']:.6f}",
+                'points_mean': f"{points['mean']:.3f}",
+                'points_std': f"{points['std']:.3f}",
+                **{f"points_p{p}": points[f"p{p}"] for p in PERCENTILES},
+                'wins_per_season': f"{row['wins_per_season']:.4f}",
+                'podiums_per_season': f"{row['podiums_per_season']:.4f}",
+                'dnfs_per_season': f"{row['dnfs_per_season']:.4f}"
+            }
+
+def run(scenarios: List[Scenario], csv_file: Optional[TextIO] = None,
+        json_file: Optional[TextIO] = None, workers: int = 1) -> None:
+    """Run scenarios one after another, writing each one's statistics as soon as it is done"""
+    writer = None
+    if csv_file is not None:
+        writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+
+    pool = None
+    if workers > 1:
+        # Spawned workers import game.data afresh, so edits to it apply to the next run
+        pool = ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=multiprocessing.get_context("spawn"))
+    try:
+        for scenario in scenarios:
+            started = time.perf_counter()
+            summary = summarize(scenario, run_scenario(scenario, pool, workers))
+            elapsed = time.perf_counter() - started
+            logger.info(f"Scenario {scenario.name}: {scenario.total_seasons:,} seasons in "
+                        f"{elapsed:.1f}s ({scenario.total_seasons / elapsed:,.0f} seasons/s)")
+
+            if writer is not None:
+                writer.writerows(_csv_rows(summary))
+                csv_file.flush()
+            if json_file is not None:
+                json_file.write(json.dumps(summary) + "\n")
+                json_file.flush()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m game.batch",
+        description="Simulate seasons in bulk and write title shares and points distributions"
+    )
+    parser.add_argument("scenarios", help="scenario file (JSON)")
+    parser.add_argument("--csv", help="write one row per driver and team per scenario here ('-' for stdout)")
+    parser.add_argument("--json", help="write one JSON object per scenario here (JSON Lines, '-' for stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        scenarios = load_scenarios(args.scenarios)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    if not args.csv and not args.json:
+        args.csv = "-"
+    outputs = []
+    try:
+        csv_file = json_file = None
+        if args.csv:
+            csv_file = sys.stdout if args.csv == "-" else open(args.csv, "w", newline="")
+            outputs.append(csv_file)
+        if args.json:
+            json_file = sys.stdout if args.json == "-" else open(args.json, "w")
+            outputs.append(json_file)
+        run(scenarios, csv_file, json_file, max(args.workers, 1))
+    finally:
+        for output in outputs:
+            if output is not sys.stdout:
+                output.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
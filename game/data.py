@@ -1,5 +1,8 @@
 from .models import Driver, Team, Track
 
+# Player slots in one game
+MAX_PLAYERS = 5
+
 # Initialize all teams with initial performance and budget
 TEAMS = [
     Team("Red Bull Racing", 95, 150000000),
@@ -63,36 +66,3 @@ TRACKS = [
     Track("Las Vegas GP", 85, 60, 75),
     Track("Abu Dhabi GP", 75, 55, 70)
 ]
-
-# Helper function to get current driver assignments
-def get_default_driver_assignments() -> dict:
-    return {
-        "Red Bull Racing": ["Max Verstappen", "Sergio Perez"],
-        "Mercedes": ["Lewis Hamilton", "George Russell"],
-        "Ferrari": ["Charles Leclerc", "Carlos Sainz"],
-        "McLaren": ["Lando Norris", "Oscar Piastri"],
-        "Aston Martin": ["Fernando Alonso", "Lance Stroll"],
-        "Alpine": ["Pierre Gasly", "Esteban Ocon"],
-        "Williams": ["Alex Albon", "Logan Sargeant"],
-        "Visa Cash App RB": ["Daniel Ricciardo", "Yuki Tsunoda"],
-        "Kick Sauber": ["Valtteri Bottas", "Zhou Guanyu"],
-        "Haas F1": ["Nico Hulkenberg", "Kevin Magnussen"]
-    }
-
-def initialize_season():
-    """Initialize teams with their default drivers"""
-    # Create a driver lookup by name
-    driver_lookup = {driver.name: driver for driver in DRIVERS}
-    
-    # Get default assignments
-    assignments = get_default_driver_assignments()
-    
-    # Assign drivers to teams
-    for team in TEAMS:
-        if team.name in assignments:
-            for driver_name in assignments[team.name]:
-                driver = driver_lookup[driver_name]
-                driver.team = team
-                team.drivers.append(driver)
-    
-    return TEAMS, DRIVERS, TRACKS
\ No newline at end of file
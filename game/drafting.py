@@ -0,0 +1,163 @@
+"""
+Budget-constrained driver pair selection.
+
+Every pair of drivers a team can afford is ranked by projected performance:
+the sum of both drivers' ratings from the performance model, which the
+driver selection page suggests to players. AI teams instead share out the
+drivers nobody picked in a snake draft, weakest car first, so the best
+drivers don't all land in the fastest car. Results are memoized per budget
+(or teams) and available drivers.
+"""
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import logging
+
+from game import roster
+from game.performance import BASE_DNF_RATE, SKILL_WEIGHT, track_attributes
+
+logger = logging.getLogger(__name__)
+
+# Distinct (budget or teams, available drivers) combinations kept in memory
+DRAFT_CACHE_SIZE = 1024
+
+# Seats per team filled by the AI draft
+DRIVERS_PER_TEAM = 2
+
+Pair = Tuple[str, str]
+
+def _driver_ratings() -> Dict[str, float]:
+    """
+    Projected season pace of every driver: skill weighted by track difficulty
+    as in the performance matrix, discounted by the races lost to retirements
+    """
+    track = track_attributes(roster.TRACKS.records)
+    skill = roster.DRIVERS.columns['skill'].astype(float)
+    inconsistency = 1 - roster.DRIVERS.columns['consistency'] / 100
+    pace = SKILL_WEIGHT * (0.5 + track['difficulty'][:, None]) * skill[None, :]
+    dnf_rate = (BASE_DNF_RATE * (1 + 2 * inconsistency[None, :])
+                * (0.5 + track['difficulty'][:, None]) * (0.5 + track['weather'][:, None]))
+    ratings = (pace * (1 - dnf_rate)).mean(axis=0)
+    return dict(zip(roster.DRIVERS.names, ratings.tolist()))
+
+DRIVER_RATINGS = _driver_ratings()
+
+def pair_cost(pair: Pair) -> int:
+    return sum(roster.DRIVERS[name].price for name in pair)
+
+def pair_rating(pair: Pair) -> float:
+    return sum(DRIVER_RATINGS[name] for name in pair)
+
+@lru_cache(maxsize=DRAFT_CACHE_SIZE)
+def affordable_pairs(budget: int, available: FrozenSet[str]) -> Tuple[Pair, ...]:
+    """
+    Every pair of available drivers costing at most budget, best projected
+    performance first (cheaper first on ties). Drivers are scanned by price,
+    so the scan stops as soon as a partner would break the budget.
+    """
+    by_price = sorted(available, key=lambda name: (roster.DRIVERS[name].price, name))
+    prices = [roster.DRIVERS[name].price for name in by_price]
+
+    pairs = []
+    for i, first in enumerate(by_price):
+        # No pair with a pricier first driver fits either
+        if i + 1 < len(prices) and prices[i] + prices[i + 1] > budget:
+            break
+        for j in range(i + 1, len(by_price)):
+            if prices[i] + prices[j] > budget:
+                break
+            pairs.append((first, by_price[j]))
+    return tuple(sorted(pairs, key=lambda pair: (-pair_rating(pair), pair_cost(pair), pair)))
+
+@lru_cache(maxsize=DRAFT_CACHE_SIZE)
+def best_pair(budget: int, available: FrozenSet[str]) -> Optional[Pair]:
+    """
+    The affordable pair with the best projected performance, or None.
+    Branch and bound over drivers by rating: a first driver whose rating
+    plus the next best rating can't beat the best pair found ends the search.
+    """
+    by_rating = sorted(available, key=lambda name: (-DRIVER_RATINGS[name], name))
+    best, best_key = None, None
+    for i, first in enumerate(by_rating):
+        if i + 1 >= len(by_rating):
+            break
+        bound = DRIVER_RATINGS[first] + DRIVER_RATINGS[by_rating[i + 1]]
+        if best is not None and bound < -best_key[0]:
+            break
+        partner_rating = None
+        for second in by_rating[i + 1:]:
+            # Once a partner fits, only equally rated (possibly cheaper) ones can do better
+            if partner_rating is not None and DRIVER_RATINGS[second] < partner_rating:
+                break
+            pair = (first, second)
+            cost = pair_cost(pair)
+            if cost > budget:
+                continue
+            partner_rating = DRIVER_RATINGS[second]
+            key = (-pair_rating(pair), cost)
+            if best_key is None or key < best_key:
+                best, best_key = pair, key
+    return best
+
+def _draft_order(teams: Tuple[str, ...]) -> List[str]:
+    """Weakest car first, so the fastest cars don't also get the best drivers"""
+    return sorted(teams, key=lambda team: (roster.TEAMS[team].car_performance, team))
+
+def _pick(budget: int, available: FrozenSet[str], still_to_sign: int) -> Optional[str]:
+    """
+    Best rated available driver a team can pay for while still affording
+    the cheapest drivers left for its remaining seats, or None
+    """
+    prices = sorted(roster.DRIVERS[name].price for name in available)
+    for name in sorted(available, key=lambda name: (-DRIVER_RATINGS[name], name)):
+        price = roster.DRIVERS[name].price
+        others = list(prices)
+        others.remove(price)
+        if price + sum(others[:still_to_sign]) <= budget:
+            return name
+    return None
+
+@lru_cache(maxsize=DRAFT_CACHE_SIZE)
+def _snake_draft(teams: Tuple[str, ...], available: FrozenSet[str]) -> Dict[str, Tuple[str, ...]]:
+    order = _draft_order(teams)
+    lineups = {team: [] for team in order}
+    for draft_round in range(DRIVERS_PER_TEAM):
+        for team in order if draft_round % 2 == 0 else reversed(order):
+            budget = roster.TEAMS[team].budget - pair_cost(lineups[team])
+            name = _pick(budget, available, DRIVERS_PER_TEAM - 1 - draft_round)
+            if name is None:
+                if not available:
+                    raise ValueError(f"Not enough drivers left for {team}")
+                name = min(available, key=lambda name: (roster.DRIVERS[name].price, name))
+                logger.warning(f"{team} cannot afford any driver left, taking {name}")
+            lineups[team].append(name)
+            available = available - {name}
+    return {team: tuple(lineups[team]) for team in teams}
+
+def draft_lineups(teams: List[str], available: FrozenSet[str]) -> Dict[str, List[str]]:
+    """
+    Driver pairs for AI teams drafting from the available drivers. Teams
+    pick one driver at a time in a snake draft, weakest car first: each
+    takes the best rated driver it can afford while keeping enough budget
+    for its other seat, and a team that can afford none takes the cheapest.
+    """
+    return {team: list(pair) for team, pair in _snake_draft(tuple(teams), available).items()}
+
+def season_entries(lineups: Dict[str, List[str]], taken_teams=()) -> List[Dict]:
+    """
+    Entries of a season: the drivers of the given team lineups first, in
+    order, then every team neither in lineups nor taken_teams, driven by the
+    AI with the drivers it drafts from those nobody picked
+    """
+    entries = [
+        {'name': driver_name, 'team': team, 'is_ai': False}
+        for team, driver_names in lineups.items()
+        for driver_name in driver_names
+    ]
+    picked = {driver_name for driver_names in lineups.values() for driver_name in driver_names}
+    ai_teams = [team for team in roster.TEAMS.names
+                if team not in lineups and team not in taken_teams]
+    available = frozenset(roster.DRIVERS.names) - picked
+    for team, driver_names in draft_lineups(ai_teams, available).items():
+        entries.extend({'name': driver_name, 'team': team, 'is_ai': True}
+                       for driver_name in driver_names)
+    return entries
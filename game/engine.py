@@ -0,0 +1,252 @@
+"""
+Vectorized season engine.
+
+A season is simulated for every track and every entry at once with NumPy:
+a track x entry performance matrix (see game/performance.py) plus
+consistency-scaled noise gives each race's finishing order, and the
+standings are reduced from those arrays.
+
+Seasons are deterministic: race i draws all its randomness from its own
+generator spawned from the season seed (spawn key (i,)). A batch season,
+a season streamed with race_events() and a single race replayed with
+simulate_race() therefore agree bit for bit for the same seed, inputs and
+ENGINE_VERSION, which must be bumped whenever the model changes results.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game.data import TRACKS
+from game.models import Track
+from game.performance import performance_matrix
+
+# Bump whenever a change alters the season produced from the same seed and inputs
+ENGINE_VERSION = 1
+
+# Points for the top ten finishers of a race
+POINTS = np.array([25, 18, 15, 12, 10, 8, 6, 4, 2, 1])
+
+# Random draws per entry and race: qualifying pace, race pace, retirement
+DRAWS_PER_RACE = 3
+
+@dataclass
+class Season:
+    """Raw arrays of one simulated season, indexed [race, entry] or [entry]"""
+    seed: int
+    entries: List[Dict]
+    tracks: Sequence[Track]
+    finishing_order: np.ndarray  # entry indices from winner to last, per race
+    positions: np.ndarray        # 0-based finishing position of every entry
+    dnf: np.ndarray              # bool, retired from the race
+    points: np.ndarray           # points scored in each race
+    driver_points: np.ndarray
+    team_names: List[str]
+    team_index: np.ndarray       # index into team_names of every entry
+    constructor_points: np.ndarray
+
+    def driver_ranking(self) -> np.ndarray:
+        """Entry indices by championship position (ties broken on wins, then podiums)"""
+        wins = (self.positions == 0).sum(axis=0)
+        podiums = (self.positions < 3).sum(axis=0)
+        return np.lexsort((-podiums, -wins, -self.driver_points))
+
+    def constructor_ranking(self) -> np.ndarray:
+        """Indices into team_names by championship position"""
+        wins = np.bincount(self.team_index, weights=(self.positions == 0).sum(axis=0),
+                           minlength=len(self.team_names))
+        return np.lexsort((-wins, -self.constructor_points))
+
+@dataclass
+class RaceEvent:
+    """One race of a streamed season and the championship right after it, indexed [entry]"""
+    round: int
+    track: Track
+    finishing_order: np.ndarray
+    positions: np.ndarray
+    dnf: np.ndarray
+    points: np.ndarray
+    driver_points: np.ndarray        # running totals
+    constructor_points: np.ndarray   # running totals, indexed like Season.team_names
+    standings: np.ndarray            # 0-based championship position of every entry
+    standings_change: np.ndarray     # places gained (positive) or lost in the championship
+
+def entry_teams(entries: List[Dict]) -> Tuple[List[str], np.ndarray]:
+    """Team names in entry order and the index into them of every entry"""
+    team_names = list(dict.fromkeys(entry['team'] for entry in entries))
+    return team_names, np.array([team_names.index(entry['team']) for entry in entries])
+
+def _race_results(matrix: Dict[str, np.ndarray], draws: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Finishing order, positions, retirements and points of races. draws has
+    shape (..., DRAWS_PER_RACE, entry) and broadcasts against the matrix
+    arrays once its draw axis is taken. The grid comes from a qualifying
+    draw and the race from a second one; the harder it is to overtake, the
+    more the grid decides the result.
+    """
+    qualifying = matrix['pace'] + matrix['spread'] * draws[..., 0, :]
+    race = matrix['pace'] + matrix['spread'] * draws[..., 1, :]
+    score = matrix['overtaking'] * qualifying + (1 - matrix['overtaking']) * race
+    dnf = draws[..., 2, :] < matrix['dnf_threshold']
+    # Retirements finish behind every classified car
+    score = np.where(dnf, score - 1e6, score)
+
+    finishing_order = np.argsort(-score, axis=-1)
+    positions = np.argsort(finishing_order, axis=-1)
+    points = np.where(dnf | (positions >= len(POINTS)), 0,
+                      POINTS[np.minimum(positions, len(POINTS) - 1)])
+    return finishing_order, positions, dnf, points
+
+def season_seed(seed: Optional[int] = None) -> int:
+    """The given season seed, or fresh entropy to record with the season"""
+    return np.random.SeedSequence(seed).entropy
+
+def _race_draws(seed: int, race: int, entry_count: int) -> np.ndarray:
+    """Random draws of one race from the generator spawned for it"""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(race,)))
+    return rng.standard_normal((DRAWS_PER_RACE, entry_count))
+
+def _season(seed: int, entries: List[Dict], tracks: Sequence[Track], finishing_order: np.ndarray,
+            positions: np.ndarray, dnf: np.ndarray, points: np.ndarray) -> Season:
+    driver_points = points.sum(axis=0)
+    team_names, team_index = entry_teams(entries)
+    constructor_points = np.bincount(team_index, weights=driver_points, minlength=len(team_names))
+    return Season(seed=seed, entries=entries, tracks=tracks, finishing_order=finishing_order,
+                  positions=positions, dnf=dnf, points=points, driver_points=driver_points,
+                  team_names=team_names, team_index=team_index,
+                  constructor_points=constructor_points.astype(int))
+
+def simulate_season(entries: List[Dict], tracks: Sequence[Track] = TRACKS,
+                    seed: Optional[int] = None,
+                    upgrades: Optional[Dict[str, str]] = None) -> Season:
+    """
+    Race every entry ({'name', 'team', 'is_ai'}) on every track; upgrades
+    maps team names to their pre-season upgrade
+    """
+    seed = season_seed(seed)
+    matrix = performance_matrix(entries, tracks, upgrades)
+    draws = np.stack([_race_draws(seed, race, len(entries)) for race in range(len(tracks))])
+    return _season(seed, entries, tracks, *_race_results(matrix, draws))
+
+def simulate_race(entries: List[Dict], race: int, seed: int, tracks: Sequence[Track] = TRACKS,
+                  upgrades: Optional[Dict[str, str]] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Replay one race of a seeded season without running the others: its
+    finishing order, positions, retirements and points, indexed [entry]
+    """
+    matrix = performance_matrix(entries, tracks, upgrades)
+    race_matrix = {key: value[race] for key, value in matrix.items()}
+    return _race_results(race_matrix, _race_draws(seed, race, len(entries)))
+
+def race_events(entries: List[Dict], tracks: Sequence[Track] = TRACKS,
+                seed: Optional[int] = None,
+                upgrades: Optional[Dict[str, str]] = None) -> Iterator[RaceEvent]:
+    """
+    Simulate a season one race at a time, yielding each race as soon as it
+    is run. Only the running totals are kept between races.
+    """
+    seed = season_seed(seed)
+    matrix = performance_matrix(entries, tracks, upgrades)
+    team_names, team_index = entry_teams(entries)
+    driver_points = np.zeros(len(entries), dtype=int)
+    wins = np.zeros(len(entries), dtype=int)
+    podiums = np.zeros(len(entries), dtype=int)
+    standings = np.arange(len(entries))
+
+    for race, track in enumerate(tracks):
+        race_matrix = {key: value[race] for key, value in matrix.items()}
+        finishing_order, positions, dnf, points = _race_results(
+            race_matrix, _race_draws(seed, race, len(entries))
+        )
+
+        driver_points += points
+        wins += positions == 0
+        podiums += positions < 3
+        # Same tie-breaks as Season.driver_ranking
+        new_standings = np.argsort(np.lexsort((-podiums, -wins, -driver_points)))
+        yield RaceEvent(
+            round=race + 1, track=track, finishing_order=finishing_order, positions=positions,
+            dnf=dnf, points=points, driver_points=driver_points.copy(),
+            constructor_points=np.bincount(team_index, weights=driver_points,
+                                           minlength=len(team_names)).astype(int),
+            standings=new_standings, standings_change=standings - new_standings
+        )
+        standings = new_standings
+
+def season_from_events(seed: int, entries: List[Dict], events: List[RaceEvent]) -> Season:
+    """Assemble the Season of a completely streamed set of races"""
+    return _season(seed, entries, [event.track for event in events],
+                   np.stack([event.finishing_order for event in events]),
+                   np.stack([event.positions for event in events]),
+                   np.stack([event.dnf for event in events]),
+                   np.stack([event.points for event in events]))
+
+def season_totals(entries: List[Dict], seasons: int, tracks: Sequence[Track] = TRACKS,
+                  rng: Optional[np.random.Generator] = None,
+                  upgrades: Optional[Dict[str, str]] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Simulate many seasons in one batch of array operations and return the
+    points, wins, podiums and retirements of every entry, indexed [season, entry]
+    """
+    rng = rng or np.random.default_rng()
+    matrix = performance_matrix(entries, tracks, upgrades)
+    draws = rng.standard_normal((seasons, len(tracks), DRAWS_PER_RACE, len(entries)))
+    _, positions, dnf, points = _race_results(matrix, draws)
+    return (points.sum(axis=1), (positions == 0).sum(axis=1),
+            (positions < 3).sum(axis=1), dnf.sum(axis=1))
+
+def champions(entries: List[Dict], driver_points: np.ndarray, wins: np.ndarray,
+              podiums: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Driver champion (entry index) and constructor champion (index into the
+    entries' teams in order of appearance) of each season of season_totals,
+    with the same tie-breaks as Season.driver_ranking and Season.constructor_ranking
+    """
+    # Wins and podiums never reach 100, so one key orders points, then wins, then podiums
+    driver_champions = ((driver_points * 100 + wins) * 100 + podiums).argmax(axis=1)
+
+    team_names, team_index = entry_teams(entries)
+    team_matrix = (team_index[:, None] == np.arange(len(team_names))).astype(int)
+    constructor_champions = ((driver_points @ team_matrix) * 100 + wins @ team_matrix).argmax(axis=1)
+    return driver_champions, constructor_champions
+
+def simulate_championships(entries: List[Dict], seasons: int, tracks: Sequence[Track] = TRACKS,
+                           rng: Optional[np.random.Generator] = None,
+                           upgrades: Optional[Dict[str, str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Driver and constructor champion of each of many seasons simulated in one batch"""
+    driver_points, wins, podiums, _ = season_totals(entries, seasons, tracks, rng, upgrades)
+    return champions(entries, driver_points, wins, podiums)
+
+def count_championships(entries: List[Dict], seasons: int, seed: np.random.SeedSequence,
+                        upgrades: Optional[Dict[str, str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Title counts per entry and per team over `seasons` seasons drawn from
+    their own seed. Module level so it can run in a worker process.
+    """
+    driver_champions, constructor_champions = simulate_championships(
+        entries, seasons, rng=np.random.default_rng(seed), upgrades=upgrades
+    )
+    team_count = len(entry_teams(entries)[0])
+    return (np.bincount(driver_champions, minlength=len(entries)),
+            np.bincount(constructor_champions, minlength=team_count))
+
+def team_points_by_upgrade(entries: List[Dict], team: str, candidates: List[Optional[str]],
+                           seasons: int, rng: np.random.Generator,
+                           upgrades: Optional[Dict[str, str]] = None,
+                           tracks: Sequence[Track] = TRACKS) -> np.ndarray:
+    """
+    Season points of one team under each candidate upgrade (None for no
+    upgrade), indexed [candidate, season]. Every candidate races the same
+    random draws, so differences between candidates come from the upgrade
+    alone and need far fewer seasons to resolve.
+    """
+    draws = rng.standard_normal((seasons, len(tracks), DRAWS_PER_RACE, len(entries)))
+    members = np.array([entry['team'] == team for entry in entries])
+    other_upgrades = {name: upgrade for name, upgrade in (upgrades or {}).items() if name != team}
+
+    totals = np.empty((len(candidates), seasons))
+    for i, candidate in enumerate(candidates):
+        candidate_upgrades = dict(other_upgrades, **({team: candidate} if candidate else {}))
+        _, _, _, points = _race_results(performance_matrix(entries, tracks, candidate_upgrades), draws)
+        totals[i] = points[..., members].sum(axis=(1, 2))
+    return totals
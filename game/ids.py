@@ -0,0 +1,35 @@
+from datetime import datetime
+from pathlib import Path
+
+from game import journal
+
+COUNTER_FILE = "game_ids.seq"
+
+class GameIdAllocator:
+    """
+    Hands out readable YYYYMMDDHHMMSS_n game ids without reading any store.
+
+    The last issued timestamp and suffix are persisted in a one-line counter
+    file that is only touched while holding an exclusive advisory lock, so
+    ids stay unique across threads and server processes. If the clock goes
+    backwards the last timestamp is reused with a higher suffix.
+    """
+    def __init__(self, data_dir: str = "data"):
+        self.counter_file = Path(data_dir) / COUNTER_FILE
+
+    def next_id(self) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        with journal.locked(self.counter_file) as f:
+            f.seek(0)
+            last_timestamp, _, last_suffix = f.read().decode().strip().partition("_")
+
+            if last_timestamp and timestamp <= last_timestamp:
+                timestamp, suffix = last_timestamp, int(last_suffix) + 1
+            else:
+                suffix = 1
+
+            game_id = f"{timestamp}_{suffix}"
+            journal.truncate(f)
+            f.write(game_id.encode())
+            f.flush()
+        return game_id
@@ -0,0 +1,210 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from game import engine
+from game.mechanics import GameMechanics
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+# Seasons simulated at the same time; more submissions wait in the queue
+JOB_WORKERS = 2
+# Pause between races so everyone watching a job sees the season unfold
+RACE_REVEAL_SECONDS = 0.1
+# Finished jobs are kept this long for players who are still polling them
+JOB_RETENTION_SECONDS = 600
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED}
+
+@dataclass
+class Job:
+    id: str
+    game_id: str
+    status: JobStatus = JobStatus.QUEUED
+    rounds_done: int = 0
+    rounds: int = len(engine.TRACKS)
+    latest_race: Optional[Dict] = None
+    # Every race event so far, for pages that show the season race by race
+    races: List[Dict] = field(default_factory=list)
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    finished_at: Optional[float] = None
+    cancel_requested: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def progress(self) -> float:
+        return self.rounds_done / self.rounds
+
+class JobRunner:
+    """
+    Runs season simulations on a thread pool, away from the Streamlit script
+    thread. There is at most one active job per game: players of the same
+    game pressing Start share it, and a job of another server process on
+    the same data directory is waited for through the game's season lock
+    rather than run twice. Pages poll jobs through `get` and
+    `job_for_game`, which only read in-memory state. The result is saved by
+    GameMechanics when the last race is run.
+    """
+    def __init__(self, data_dir: str = "data", workers: int = JOB_WORKERS,
+                 reveal_seconds: float = RACE_REVEAL_SECONDS):
+        self.data_dir = data_dir
+        self.reveal_seconds = reveal_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="season-job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._jobs_by_game: Dict[str, Job] = {}
+        self._odds_jobs: Dict[Tuple[str, int], Job] = {}
+
+    def submit_season(self, game_id: str, players: List[Dict]) -> Job:
+        """Queue a season for a game, or return the job already running it"""
+        with self._lock:
+            self._prune()
+            job = self._jobs_by_game.get(game_id)
+            if job and job.status not in (JobStatus.FAILED, JobStatus.CANCELLED):
+                logger.info(f"Joining job {job.id} for game {game_id}")
+                return job
+
+            job = Job(id=uuid.uuid4().hex, game_id=game_id)
+            self._jobs[job.id] = job
+            self._jobs_by_game[game_id] = job
+        self._executor.submit(self._run_season, job, players)
+        logger.info(f"Queued season job {job.id} for game {game_id}")
+        return job
+
+    def submit_odds(self, game_id: str, version: int, seasons: int, tolerance: float) -> Job:
+        """
+        Queue a title odds estimate for one version of a game, or return the
+        job already estimating it. A page waiting for it never stalls its
+        script thread; championship_odds decides whether the seasons are worth
+        a process pool. A failed estimate is tried again, like a season.
+        """
+        key = (game_id, version)
+        with self._lock:
+            self._prune()
+            job = self._odds_jobs.get(key)
+            if job and job.status not in (JobStatus.FAILED, JobStatus.CANCELLED):
+                return job
+
+            job = Job(id=uuid.uuid4().hex, game_id=game_id, rounds=1)
+            self._jobs[job.id] = job
+            self._odds_jobs[key] = job
+        self._executor.submit(self._run_odds, job, seasons, tolerance)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def job_for_game(self, game_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs_by_game.get(game_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a job to stop before its next race. Nothing is saved for a cancelled season"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_requested.set()
+        logger.info(f"Cancellation requested for job {job_id}")
+        return True
+
+    def _prune(self):
+        """Forget finished jobs past their retention time (called with the lock held)"""
+        cutoff = time.monotonic() - JOB_RETENTION_SECONDS
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                if self._jobs_by_game.get(job.game_id) is job:
+                    del self._jobs_by_game[job.game_id]
+        for key, job in list(self._odds_jobs.items()):
+            if job.id not in self._jobs:
+                del self._odds_jobs[key]
+
+    def _finish(self, job: Job, status: JobStatus):
+        job.status = status
+        job.finished_at = time.monotonic()
+
+    def _run_odds(self, job: Job, seasons: int, tolerance: float):
+        with tracing.trace("odds_job", game_id=job.game_id, job_id=job.id):
+            try:
+                job.status = JobStatus.RUNNING
+                job.result = GameMechanics(self.data_dir).championship_odds(
+                    job.game_id, seasons, tolerance=tolerance
+                )
+                job.rounds_done = job.rounds
+                self._finish(job, JobStatus.DONE)
+            except Exception as e:
+                logger.error(f"Error in odds job {job.id} for game {job.game_id}: {str(e)}")
+                job.error = str(e)
+                self._finish(job, JobStatus.FAILED)
+
+    def _run_season(self, job: Job, players: List[Dict]):
+        # Jobs run outside any script run, so each one is a trace of its own
+        with tracing.trace("season_job", game_id=job.game_id, job_id=job.id):
+            try:
+                if job.cancel_requested.is_set():
+                    self._finish(job, JobStatus.CANCELLED)
+                    return
+                job.status = JobStatus.RUNNING
+                mechanics = GameMechanics(self.data_dir)
+
+                # Jobs of other server processes dedupe through the season lock:
+                # whoever gets it second finds the saved result
+                with mechanics.season_lock(job.game_id):
+                    existing = mechanics.get_game_results(job.game_id)
+                    if existing is not None:
+                        job.rounds_done = job.rounds
+                        job.result = existing
+                        self._finish(job, JobStatus.DONE)
+                        return
+
+                    events = mechanics.season_events(job.game_id, players)
+                    try:
+                        for event in events:
+                            job.races.append(event)
+                            job.latest_race = event
+                            job.rounds_done = event['round']
+                            if 'result' in event:
+                                job.result = event['result']
+                                self._finish(job, JobStatus.DONE)
+                                logger.info(f"Season job {job.id} for game {job.game_id} finished")
+                                return
+                            # Waiting on the event lets a cancellation cut the pause short
+                            if job.cancel_requested.wait(self.reveal_seconds):
+                                self._finish(job, JobStatus.CANCELLED)
+                                logger.info(f"Season job {job.id} cancelled after round {job.rounds_done}")
+                                return
+                    finally:
+                        events.close()
+            except Exception as e:
+                logger.error(f"Error in season job {job.id} for game {job.game_id}: {str(e)}")
+                job.error = str(e)
+                self._finish(job, JobStatus.FAILED)
+
+# One runner per server process, shared by every session
+_job_runner = None
+_job_runner_lock = threading.Lock()
+
+def get_job_runner(data_dir: str = "data") -> JobRunner:
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner(data_dir)
+        return _job_runner
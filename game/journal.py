@@ -0,0 +1,71 @@
+"""
+Append-only JSON-lines journals.
+
+A journal holds the small records written since the last compaction. Every
+access happens while holding an advisory lock on the journal file itself:
+readers and appenders that don't need to exclude each other take a shared
+lock, while compaction (fold the journal into a snapshot, then truncate it)
+takes an exclusive one.
+"""
+import os
+from contextlib import contextmanager
+from pathlib import Path
+import logging
+from typing import BinaryIO, Dict, Iterator, List
+
+from utils import metrics, tracing
+
+try:
+    import fcntl
+except ImportError:  # Windows has no advisory file locks; journals run unlocked there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+@contextmanager
+def locked(path: Path, shared: bool = False, create: bool = True) -> Iterator[BinaryIO]:
+    """
+    Open a journal or other small shared file and hold an advisory lock on it.
+    With create=False the file is opened read-only and FileNotFoundError is
+    raised if it does not exist.
+    """
+    with tracing.span("file.locked", path=str(path), shared=shared), open(path, 'a+b' if create else 'rb') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def append(f: BinaryIO, record: Dict) -> int:
+    """Append one record to a locked journal and return the new journal size"""
+    line = metrics.dump_json(record, "json", separators=(',', ':')).encode() + b'\n'
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    if size:
+        f.seek(size - 1)
+        if f.read(1) != b'\n':
+            # The previous append was cut short by a crash; start a fresh line
+            line = b'\n' + line
+    f.write(line)
+    f.flush()
+    return size + len(line)
+
+def read(f: BinaryIO) -> List[Dict]:
+    """Read every intact record of a locked journal"""
+    f.seek(0)
+    records = []
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            records.append(metrics.load_json(line, "json"))
+        except ValueError:
+            logger.warning(f"Skipping torn journal record {f.name}:{line_number}")
+    return records
+
+def truncate(f: BinaryIO) -> None:
+    """Empty a journal that is held under an exclusive lock"""
+    f.truncate(0)
+    f.flush()
@@ -1,12 +1,25 @@
-import json
+import copy
+import itertools
+import random
+import secrets
+import time
+from contextlib import contextmanager
 from pathlib import Path
 import logging
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from enum import Enum
+from game import roster
+from game.data import MAX_PLAYERS
+from game.ids import GameIdAllocator
+from game.storage import ConflictError, get_backend
+from utils import tracing
 
 logger = logging.getLogger(__name__)
 
+# How often a mutation is retried against fresh state after a conflicting write
+MAX_UPDATE_ATTEMPTS = 5
+
 class GamePhase(Enum):
     TEAM_SELECTION = "team_selection"
     DRIVER_SELECTION = "driver_selection"
@@ -14,80 +27,201 @@ class GamePhase(Enum):
     SEASON = "season"
     FINISHED = "finished"
 
+def _add_player(game: Dict, username: str):
+    """Add a player to the next free slot unless they already joined"""
+    if any(p['username'] == username for p in game['players']):
+        # Player already in game, nothing to change
+        return
+    
+    # Find next available slot
+    taken_slots = {p['slot'] for p in game['players']}
+    available_slots = set(range(MAX_PLAYERS)) - taken_slots
+    
+    if not available_slots:
+        raise ValueError("Game is full")
+    
+    game['players'].append({
+        'username': username,
+        'slot': min(available_slots),
+        'team': None
+    })
+
+def _set_team(game: Dict, username: str, team: str):
+    """Give a player a team that nobody else in the game has taken"""
+    player = next((p for p in game['players'] if p['username'] == username), None)
+    if not player:
+        raise ValueError(f"Player {username} not in game {game['id']}")
+    
+    # Check if team is already taken
+    if any(p['team'] == team for p in game['players'] if p['username'] != username):
+        raise ValueError(f"Team {team} is already taken")
+    
+    player['team'] = team
+
+def _set_drivers(game: Dict, team: str, driver_names: List[str]):
+    """Save a team's driver selection"""
+    cost = int(roster.DRIVERS.column('price', driver_names).sum())
+    if cost > roster.TEAMS[team].budget:
+        raise ValueError(f"Drivers cost ${cost:,}, over the {team} budget")
+    game.setdefault('drivers', {})[team] = driver_names
+
+def _set_phase(game: Dict, phase: GamePhase):
+    """Move a game to a new phase"""
+    game['phase'] = phase.value
+
+def _complete_driver_selection(game: Dict):
+    """Move to pre-season once every player with a team has selected drivers"""
+    drivers = game.get('drivers', {})
+    if all(p['team'] in drivers for p in game['players'] if p['team']):
+        game['phase'] = GamePhase.PRE_SEASON.value
+
+def _set_upgrade(game: Dict, team: str, upgrade: str):
+    """Save a team's pre-season upgrade choice"""
+    game.setdefault('upgrades', {})[team] = upgrade
+
+def _finish(game: Dict):
+    """Mark a game finished as of now"""
+    game['phase'] = GamePhase.FINISHED.value
+    game['completed_at'] = datetime.now().isoformat()
+
+def _infer_phase(game: Dict):
+    """Fill in the phase of old games that were saved without one"""
+    if 'phase' in game:
+        return
+    if 'drivers' in game and game['drivers']:
+        game['phase'] = GamePhase.PRE_SEASON.value
+    elif all(p.get('team') for p in game['players']):
+        game['phase'] = GamePhase.DRIVER_SELECTION.value
+    else:
+        game['phase'] = GamePhase.TEAM_SELECTION.value
+
+class GameTransaction:
+    """
+    Unit of work on one game: the game is loaded once, any number of
+    mutations are applied to it, and it is committed with a single write.
+
+    Each mutation is applied to `game` right away so callers can inspect
+    the result, and recorded so it can be replayed if another writer
+    changed the game before the commit (compare-and-swap on the version).
+    """
+    def __init__(self, manager: 'GameManager', game_id: str, game: Optional[Dict] = None):
+        self.manager = manager
+        self.game_id = game_id
+        self.game = copy.deepcopy(game) if game is not None else manager._load_game(game_id)
+        self._loaded = copy.deepcopy(self.game)
+        self._ops: List[Tuple[str, Callable[[Dict], None]]] = []
+        self._archive = False
+
+    def _apply(self, op: str, mutate: Callable[[Dict], None]):
+        mutate(self.game)
+        self._ops.append((op, mutate))
+
+    def join(self, username: str):
+        self._apply("join", lambda game: _add_player(game, username))
+
+    def select_team(self, username: str, team: str):
+        self._apply("select_team", lambda game: _set_team(game, username, team))
+
+    def select_drivers(self, team: str, driver_names: List[str]):
+        self._apply("select_drivers", lambda game: _set_drivers(game, team, driver_names))
+
+    def set_phase(self, phase: GamePhase):
+        self._apply("phase", lambda game: _set_phase(game, phase))
+
+    def complete_driver_selection(self):
+        self._apply("phase", _complete_driver_selection)
+
+    def set_upgrade(self, team: str, upgrade: str):
+        self._apply("upgrade", lambda game: _set_upgrade(game, team, upgrade))
+
+    def ensure_phase(self):
+        self._apply("phase", _infer_phase)
+
+    def archive(self):
+        """Finish the game; the commit then moves it to the archive instead of saving it"""
+        self._apply("archive", _finish)
+        self._archive = True
+
+    def commit(self) -> Dict:
+        """Write the game once, replaying the mutations on fresh state after a conflict"""
+        op = "+".join(name for name, _ in self._ops) or "save"
+        with tracing.span("GameTransaction.commit", game_id=self.game_id, op=op) as span:
+            for attempt in range(1, MAX_UPDATE_ATTEMPTS + 1):
+                if span:
+                    span.set(attempts=attempt)
+                if self.game == self._loaded:
+                    return self.game
+                try:
+                    if self._archive:
+                        self.manager._archive_game(self.game)
+                    else:
+                        self.manager._save_game(self.game, op)
+                    return self.game
+                except ConflictError:
+                    logger.info(f"Game {self.game_id} changed during {op}, retrying (attempt {attempt})")
+                    time.sleep(random.uniform(0, 0.005 * attempt))
+                    self.game = self.manager._load_game(self.game_id)
+                    self._loaded = copy.deepcopy(self.game)
+                    for _, mutate in self._ops:
+                        mutate(self.game)
+            raise ConflictError(f"Game {self.game_id} kept changing, gave up on {op}")
+
 class GameManager:
     def __init__(self, data_dir: str = "data"):
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(exist_ok=True)
-        self.games_file = self.data_dir / "games.json"
-        self.archive_file = self.data_dir / "games_archive.json"
-        self._initialize_data_stores()
-    
-    def _initialize_data_stores(self):
-        """Initialize both active and archive game stores"""
-        if not self.games_file.exists():
-            with open(self.games_file, 'w') as f:
-                json.dump([], f)
-                
-        if not self.archive_file.exists():
-            with open(self.archive_file, 'w') as f:
-                json.dump([], f)
+        self.store = get_backend(data_dir)
+        self.id_allocator = GameIdAllocator(data_dir)
 
-    def _load_games(self) -> List[Dict]:
-        """Load active games"""
-        try:
-            with open(self.games_file, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            logger.error("Error reading games file, returning empty list")
-            return []
-
-    def _load_archive(self) -> List[Dict]:
-        """Load archived games"""
-        try:
-            with open(self.archive_file, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            logger.error("Error reading archive file, returning empty list")
-            return []
-
-    def _save_games(self, games: List[Dict]):
-        """Save active games"""
-        with open(self.games_file, 'w') as f:
-            json.dump(games, f, indent=2)
-            
-    def _save_archive(self, archived_games: List[Dict]):
-        """Save archived games"""
-        with open(self.archive_file, 'w') as f:
-            json.dump(archived_games, f, indent=2)
+    def _load_game(self, game_id: str) -> Dict:
+        """Load one active game, raising if it does not exist"""
+        game = self.store.load_game(game_id)
+        if not game:
+            raise ValueError(f"Game {game_id} not found")
+        return game
+
+    def _save_game(self, game: Dict, op: str = "save"):
+        """
+        Save one active game if nobody else changed it since it was loaded.
+        Raises ConflictError otherwise; op names the mutation in the store's journal.
+        """
+        self.store.save_game(game, op, expected_version=game.get('version', 0))
+
+    def _archive_game(self, game: Dict):
+        """Archive one active game if nobody else changed it since it was loaded"""
+        self.store.archive_game(game, expected_version=game.get('version', 0))
+
+    @contextmanager
+    def transaction(self, game_id: str, game: Optional[Dict] = None) -> Iterator[GameTransaction]:
+        """
+        Apply several mutations to one game with one read and one write:
+
+            with game_manager.transaction(game_id) as tx:
+                tx.select_drivers(team, drivers)
+                tx.set_phase(GamePhase.PRE_SEASON)
+
+        Pass a game the caller already loaded to skip the read; its version
+        is checked when committing. Nothing is written if the block raises.
+        """
+        tx = GameTransaction(self, game_id, game)
+        yield tx
+        tx.commit()
 
     def _generate_game_id(self) -> str:
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        games = self._load_games()
-        archived = self._load_archive()
-        suffix = 1
-        
-        # Check both active and archived games for ID uniqueness
-        existing_ids = {game['id'] for game in games}
-        existing_ids.update({game['id'] for game in archived})
-        
-        base_id = f"{timestamp}_{suffix}"
-        while base_id in existing_ids:
-            suffix += 1
-            base_id = f"{timestamp}_{suffix}"
-            
-        return base_id
+        # Unique across processes without scanning the active or archived games
+        return self.id_allocator.next_id()
 
+    @tracing.traced()
     def create_game(self, game_name: str, creator: str) -> Dict:
         """Create a new game with the first player"""
         try:
-            games = self._load_games()
-            
             new_game = {
                 'id': self._generate_game_id(),
                 'name': game_name,
                 'created_at': datetime.now().isoformat(),
                 'phase': GamePhase.TEAM_SELECTION.value,
                 'creator': creator,
+                # Seeds every random draw of this game's season so it can be replayed
+                'seed': secrets.randbits(128),
                 'players': [
                     {
                         'username': creator,
@@ -97,206 +231,145 @@ class GameManager:
                 ]
             }
             
-            games.append(new_game)
-            self._save_games(games)
+            self._save_game(new_game, "create")
             
-            logger.info(f"Created new game: {new_game}")
+            logger.info(f"Created new game {new_game['id']}")
             return new_game
             
         except Exception as e:
             logger.error(f"Error creating game: {e}")
             raise
 
+    @tracing.traced()
     def join_game(self, game_id: str, username: str) -> Dict:
         """Add a player to an existing game"""
         try:
-            games = self._load_games()
-            game = next((g for g in games if g['id'] == game_id), None)
-            
-            if not game:
-                raise ValueError(f"Game {game_id} not found")
-            
-            if any(p['username'] == username for p in game['players']):
-                # Player already in game, return game state
-                return game
-            
-            # Find next available slot (max 5 players)
-            taken_slots = {p['slot'] for p in game['players']}
-            available_slots = set(range(5)) - taken_slots
-            
-            if not available_slots:
-                raise ValueError("Game is full")
-            
-            next_slot = min(available_slots)
-            
-            # Add player to game
-            game['players'].append({
-                'username': username,
-                'slot': next_slot,
-                'team': None
-            })
-            
-            # Update games list
-            self._save_games(games)
-            return game
+            with self.transaction(game_id) as tx:
+                tx.join(username)
+            return tx.game
             
         except Exception as e:
             logger.error(f"Error joining game: {e}")
             raise
 
+    @tracing.traced()
     def select_team(self, game_id: str, username: str, team: str) -> Dict:
         """Update a player's team selection"""
         try:
-            games = self._load_games()
-            game = next((g for g in games if g['id'] == game_id), None)
-            
-            if not game:
-                raise ValueError(f"Game {game_id} not found")
-            
-            # Find player in game
-            player = next((p for p in game['players'] if p['username'] == username), None)
-            if not player:
-                raise ValueError(f"Player {username} not in game {game_id}")
-            
-            # Check if team is already taken
-            if any(p['team'] == team for p in game['players'] if p['username'] != username):
-                raise ValueError(f"Team {team} is already taken")
-            
-            # Update player's team
-            player['team'] = team
-            
-            # Save changes
-            self._save_games(games)
-            return game
+            # The taken-team check reruns on fresh state if another player
+            # picked a team at the same moment
+            with self.transaction(game_id) as tx:
+                tx.select_team(username, team)
+            return tx.game
             
         except Exception as e:
             logger.error(f"Error selecting team: {e}")
             raise
 
+    @tracing.traced()
     def select_drivers(self, game_id: str, team: str, driver_names: List[str]) -> Dict:
         """
         Assign drivers to a team in a game
         """
         try:
-            games = self._load_games()
-            game = next((g for g in games if g['id'] == game_id), None)
-            
-            if not game:
-                raise ValueError(f"Game {game_id} not found")
-            
-            # Initialize drivers field if it doesn't exist
-            if 'drivers' not in game:
-                game['drivers'] = {}
-            
-            # Save driver selections for this team
-            game['drivers'][team] = driver_names
-            
-            # Save changes
-            self._save_games(games)
-            return game
+            with self.transaction(game_id) as tx:
+                tx.select_drivers(team, driver_names)
+            return tx.game
             
         except Exception as e:
             logger.error(f"Error selecting drivers: {e}")
             raise
 
+    @tracing.traced()
     def get_game(self, game_id: str) -> Dict:
         """Get current state of a game (check both active and archive)"""
         # Check active games first
-        games = self._load_games()
-        game = next((g for g in games if g['id'] == game_id), None)
+        game = self.store.load_game(game_id)
         
         if game:
             return game
             
         # If not found, check archive
-        archived = self._load_archive()
-        game = next((g for g in archived if g['id'] == game_id), None)
+        game = self.store.load_archived_game(game_id)
         
         if game:
             return game
             
         raise ValueError(f"Game {game_id} not found in active or archived games")
 
+    @tracing.traced()
     def get_all_games(self) -> List[Dict]:
         """Returns all active games sorted by creation date descending"""
         try:
-            games = self._load_games()
+            games = self.store.list_games()
             return sorted(games, key=lambda x: x['created_at'], reverse=True)
         except Exception as e:
             logger.error(f"Error getting games: {e}")
             raise
 
-    def get_archived_games(self) -> List[Dict]:
-        """Returns all archived games sorted by completion date descending"""
+    @tracing.traced()
+    def get_game_summaries(self, page: int = 0, page_size: int = 20, search: str = "",
+                           open_only: bool = False) -> Tuple[List[Dict], int]:
+        """
+        Returns one page of active game summaries, newest first, and the
+        number of games matching the name search and open-slot filter
+        """
+        try:
+            return self.store.list_game_summaries(page, page_size, search, open_only)
+        except Exception as e:
+            logger.error(f"Error getting game summaries: {e}")
+            raise
+
+    def get_archived_games(self, page_size: int = 50) -> Iterator[List[Dict]]:
+        """
+        Yields pages of archived games sorted by completion date descending.
+        Pages are read lazily, so only the partitions the caller gets to are loaded.
+        """
         try:
-            archived = self._load_archive()
-            return sorted(archived, key=lambda x: x['completed_at'], reverse=True)
+            archived = self.store.iter_archived_games()
+            while True:
+                page = list(itertools.islice(archived, page_size))
+                if not page:
+                    return
+                yield page
         except Exception as e:
             logger.error(f"Error getting archived games: {e}")
             raise
 
+    @tracing.traced()
     def archive_game(self, game_id: str):
         """Move a game from active to archive"""
         try:
-            # Load both stores
-            games = self._load_games()
-            archived = self._load_archive()
-            
-            # Find game to archive
-            game = next((g for g in games if g['id'] == game_id), None)
-            if not game:
-                raise ValueError(f"Game {game_id} not found")
-            
-            # Update game status and add completion timestamp
-            game['phase'] = GamePhase.FINISHED.value
-            game['completed_at'] = datetime.now().isoformat()
-            
-            # Remove from active games
-            games = [g for g in games if g['id'] != game_id]
-            
-            # Add to archive
-            archived.append(game)
-            
-            # Save both stores
-            self._save_games(games)
-            self._save_archive(archived)
+            # Finished and moved from the active store to the archive in one
+            # compare-and-swap, so a concurrent write is never archived over
+            with self.transaction(game_id) as tx:
+                tx.archive()
             
         except Exception as e:
             logger.error(f"Error archiving game: {e}")
             raise
 
+    @tracing.traced()
     def update_game_phase(self, game_id: str, new_phase: GamePhase) -> Dict:
         """Update the phase of a game"""
         try:
-            games = self._load_games()
-            game = next((g for g in games if g['id'] == game_id), None)
-            
-            if not game:
-                raise ValueError(f"Game {game_id} not found")
-            
-            game['phase'] = new_phase.value
-            self._save_games(games)
-            return game
+            with self.transaction(game_id) as tx:
+                tx.set_phase(new_phase)
+            return tx.game
             
         except Exception as e:
             logger.error(f"Error updating game phase: {e}")
             raise
             
+    @tracing.traced()
     def get_game_destination(self, game: Dict) -> str:
         """
         Determine which page a player should see based on game phase
         """
-        # If game doesn't have a phase, infer it from the state
+        # If game doesn't have a phase, infer it from the state and save it
         if 'phase' not in game:
-            if 'drivers' in game and game['drivers']:
-                game['phase'] = GamePhase.PRE_SEASON.value
-            elif all(p.get('team') for p in game['players']):
-                game['phase'] = GamePhase.DRIVER_SELECTION.value
-            else:
-                game['phase'] = GamePhase.TEAM_SELECTION.value
-            # Save the inferred phase
-            self._save_games([g if g['id'] != game['id'] else game 
-                            for g in self._load_games()])
+            _infer_phase(game)
+            self._save_game(game, "phase")
         
         phase = game['phase']
         
@@ -313,32 +386,24 @@ class GameManager:
         else:
             return 'new_game'  # Default to new_game if unknown phase
             
+    @tracing.traced()
     def save_game(self, game: Dict) -> None:
         """Save changes to a specific game"""
         try:
-            games = self._load_games()
-            # Replace the game in the list
-            games = [g if g['id'] != game['id'] else game for g in games]
-            self._save_games(games)
+            self._save_game(game)
         except Exception as e:
             logger.error(f"Error saving game: {e}")
             raise
 
+    @tracing.traced()
     def delete_game(self, game_id: str) -> bool:
         """Delete a game by ID. Returns True if successful, False if game not found"""
         try:
-            games = self._load_games()
-            
-            # Keep all games except the one we want to delete
-            new_games = [game for game in games if game['id'] != game_id]
-            
-            # If length hasn't changed, game wasn't found
-            if len(new_games) == len(games):
+            # Remove the game's file; False means it wasn't found
+            if not self.store.delete_game(game_id):
                 logger.error(f"Game {game_id} not found")
                 return False
                 
-            # Save the updated list
-            self._save_games(new_games)
             logger.info(f"Successfully deleted game {game_id}")
             return True
             
@@ -1,103 +1,406 @@
-import random
-from typing import Dict, List
-import json
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+from statistics import NormalDist
+from typing import Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
-from game.data import TEAMS, get_default_driver_assignments
+import logging
+
+import numpy as np
+
+from game import engine, journal, timeline
+from game import roster
+from game.drafting import season_entries
+from game.upgrades import UPGRADES
+from game.storage import get_backend
+from utils import tracing
+
+logger = logging.getLogger(__name__)
+
+# Seasons simulated per NumPy call when estimating championship odds
+ODDS_BATCH_SIZE = 1000
+# Estimates of at least this many seasons are spread over worker processes
+ODDS_PROCESS_THRESHOLD = 100_000
+ODDS_WORKERS = os.cpu_count() or 1
+
+# Seasons per common-random-numbers batch of the upgrade advisor
+ADVISOR_BATCH_SIZE = 250
+
+# One worker pool per server process, started on the first large estimate
+_odds_pool = None
+_odds_pool_lock = threading.Lock()
+
+def _get_odds_pool() -> ProcessPoolExecutor:
+    global _odds_pool
+    with _odds_pool_lock:
+        if _odds_pool is None:
+            # Spawned workers don't inherit the server's threads and locks
+            _odds_pool = ProcessPoolExecutor(max_workers=ODDS_WORKERS,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return _odds_pool
+
+def wilson_interval(successes: np.ndarray, trials: int, z: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilson score interval of binomial proportions, elementwise"""
+    p = successes / trials
+    denominator = 1 + z ** 2 / trials
+    center = (p + z ** 2 / (2 * trials)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2)) / denominator
+    # Rounding can leave a bound just past p when p is 0 or 1
+    return np.minimum(center - half_width, p), np.maximum(center + half_width, p)
 
 class GameMechanics:
     def __init__(self, data_dir: str = "data"):
         self.data_dir = Path(data_dir)
-        self.results_file = self.data_dir / "results.json"
-        self._initialize_results_file()
+        self.store = get_backend(data_dir)
         
         # Initialize game manager for archiving
         from game.manager import GameManager
         self.game_manager = GameManager(data_dir)
         
-    def _initialize_results_file(self):
-        """Initialize results file if it doesn't exist"""
-        if not self.results_file.exists():
-            with open(self.results_file, 'w') as f:
-                json.dump({}, f)  # Empty dict to store results by game_id
-                
-    def _load_results(self) -> Dict:
-        """Load all historical results"""
-        try:
-            with open(self.results_file, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-            
-    def _save_results(self, results: Dict):
-        """Save all results back to file"""
-        with open(self.results_file, 'w') as f:
-            json.dump(results, f, indent=2)
-            
+    @contextmanager
+    def season_lock(self, game_id: str) -> Iterator[None]:
+        """
+        Hold a game's season lock, shared by every server process on the
+        data directory, so a season is simulated and saved only once
+        """
+        if not game_id or '/' in game_id or '\\' in game_id or game_id.startswith('.'):
+            raise ValueError(f"Invalid game id {game_id!r}")
+        path = self.data_dir / "seasons" / f"{game_id}.lock"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with journal.locked(path):
+            yield
+
+    def _season_entries(self, game: Dict, players: List[Dict]) -> List[Dict]:
+        """Drivers taking part in the season: the players' picks, then the pairs AI teams draft from the rest"""
+        drivers = game.get('drivers', {})
+        lineups = {p['team']: drivers[p['team']] for p in players if p['team'] and p['team'] in drivers}
+        return season_entries(lineups, {p['team'] for p in players if p['team']})
+
+    @tracing.traced()
     def simulate_season(self, game_id: str, players: List[Dict]) -> Dict:
         """
-        Simulate an entire F1 season and determine champions
-        For now, just randomly select winners
+        Simulate an entire F1 season race by race and determine champions
         """
-        # Get all participating drivers
         game = self.game_manager.get_game(game_id)
-        all_drivers = []
-
-        # First add human players' drivers
-        for player in players:
-            if player['team'] and player['team'] in game.get('drivers', {}):
-                team_drivers = game['drivers'][player['team']]
-                for driver_name in team_drivers:
-                    all_drivers.append({
-                        'name': driver_name,
-                        'team': player['team'],
-                        'is_ai': False
-                    })
-
-        # Fill remaining teams with default drivers
-        default_assignments = get_default_driver_assignments()
-        available_teams = set([team.name for team in TEAMS]) - {p['team'] for p in players if p['team']}
-        
-        for team in available_teams:
-            for driver_name in default_assignments[team]:
-                all_drivers.append({
-                    'name': driver_name,
-                    'team': team,
-                    'is_ai': True
-                })
-            
-        # Randomly select winners
-        driver_champion = random.choice(all_drivers)
-        constructor_champion = random.choice([team.name for team in TEAMS])
-        
-        # Create result for this season
+        entries = self._season_entries(game, players)
+        upgrades = game.get('upgrades', {})
+        season = engine.simulate_season(entries, seed=self._game_seed(game), upgrades=upgrades)
+        return self._finish_season(game_id, players, season, upgrades)
+
+    def season_events(self, game_id: str, players: List[Dict]) -> Iterator[Dict]:
+        """
+        Simulate a season like simulate_season, yielding one event per race
+        as soon as it is run: the race result, retirements, points scored and
+        the championship after it. After the last race the result is saved,
+        the game archived, and the final event carries it under 'result'.
+        """
+        game = self.game_manager.get_game(game_id)
+        entries = self._season_entries(game, players)
+        team_names = list(dict.fromkeys(entry['team'] for entry in entries))
+        seed = self._game_seed(game)
+        upgrades = game.get('upgrades', {})
+
+        events = []
+        for event in engine.race_events(entries, seed=seed, upgrades=upgrades):
+            events.append(event)
+            update = {
+                'round': event.round,
+                'rounds': len(engine.TRACKS),
+                'track': event.track.name,
+                'finishing_order': [entries[i]['name'] for i in event.finishing_order],
+                'dnfs': [entries[i]['name'] for i in np.flatnonzero(event.dnf)],
+                'driver_standings': [
+                    {
+                        'driver': entries[i]['name'],
+                        'team': entries[i]['team'],
+                        'points': int(event.driver_points[i]),
+                        'race_points': int(event.points[i]),
+                        'change': int(event.standings_change[i])
+                    }
+                    for i in np.argsort(event.standings)
+                ],
+                'constructor_standings': sorted(
+                    ({'team': team, 'points': int(points)}
+                     for team, points in zip(team_names, event.constructor_points)),
+                    key=lambda row: row['points'], reverse=True
+                )
+            }
+            if event.round == len(engine.TRACKS):
+                update['result'] = self._finish_season(
+                    game_id, players, engine.season_from_events(seed, entries, events), upgrades
+                )
+            yield update
+
+    @staticmethod
+    def _game_seed(game: Dict) -> int:
+        """Season seed of a game; games created before seeds get one derived from their id"""
+        if 'seed' in game:
+            return game['seed']
+        return int.from_bytes(hashlib.sha256(game['id'].encode()).digest()[:16], 'big')
+
+    def replay_season(self, result: Dict) -> engine.Season:
+        """Regenerate the exact season behind a stored result from its seed and entries"""
+        if result.get('engine_version') != engine.ENGINE_VERSION:
+            raise ValueError(f"Result was simulated by engine version {result.get('engine_version')}, "
+                             f"this is version {engine.ENGINE_VERSION}")
+        return engine.simulate_season(result['entries'], seed=result['seed'],
+                                      upgrades=result.get('upgrades'))
+
+    @tracing.traced()
+    def get_race_results(self, game_id: str) -> List[Dict]:
+        """Race by race results of a finished game, regenerated from its stored seed"""
+        result = self.get_game_results(game_id)
+        if result is None:
+            raise ValueError(f"No results for game {game_id}")
+        if 'races' in result:
+            # Stored in full before seeded replays
+            return result['races']
+
+        season = self.replay_season(result)
+        entries = season.entries
+        return [
+            {
+                'track': track.name,
+                'finishing_order': [entries[i]['name'] for i in season.finishing_order[race]],
+                'dnfs': [entries[i]['name'] for i in np.flatnonzero(season.dnf[race])]
+            }
+            for race, track in enumerate(season.tracks)
+        ]
+
+    @tracing.traced()
+    def race_timeline(self, game_id: str) -> Optional[np.ndarray]:
+        """
+        Memory-mapped (race, lap, entry) timeline of a finished game, entries
+        ordered like the result's 'entries'. Seasons finished before timelines
+        were stored get theirs built from the seed on first use; results
+        without a seed have none.
+        """
+        path = timeline.timeline_path(self.data_dir, game_id)
+        laps = timeline.load(path)
+        if laps is not None:
+            return laps
+
+        result = self.get_game_results(game_id)
+        if result is None or result.get('seed') is None or 'races' in result:
+            return None
+        timeline.save(path, timeline.build(self.replay_season(result)))
+        return timeline.load(path)
+
+    @tracing.traced()
+    def _finish_season(self, game_id: str, players: List[Dict], season: engine.Season,
+                       upgrades: Dict[str, str]) -> Dict:
+        """Build the result of a simulated season, save it and archive the game"""
+        entries = season.entries
+        player_teams = {p['team'] for p in players if p['team']}
+
+        driver_standings = []
+        for index in season.driver_ranking():
+            entry = entries[index]
+            driver_standings.append({
+                'driver': entry['name'],
+                'team': entry['team'],
+                'is_ai': entry['is_ai'],
+                'points': int(season.driver_points[index]),
+                'wins': int((season.positions[:, index] == 0).sum()),
+                'podiums': int((season.positions[:, index] < 3).sum()),
+                'dnfs': int(season.dnf[:, index].sum())
+            })
+
+        constructor_standings = []
+        for index in season.constructor_ranking():
+            team = season.team_names[index]
+            constructor_standings.append({
+                'team': team,
+                'is_ai': team not in player_teams,
+                'points': int(season.constructor_points[index])
+            })
+
+        driver_champion = driver_standings[0]
+        constructor_champion = constructor_standings[0]
+
+        # Create result for this season. Race by race results are not stored:
+        # the seed, the entries and the engine version regenerate them exactly
         result = {
             'timestamp': datetime.now().isoformat(),
+            'engine_version': engine.ENGINE_VERSION,
+            'seed': season.seed,
+            'entries': entries,
+            'upgrades': upgrades,
             'drivers_championship': {
-                'driver': driver_champion['name'],
+                'driver': driver_champion['driver'],
                 'team': driver_champion['team'],
                 'is_ai': driver_champion['is_ai']
             },
             'constructors_championship': {
-                'team': constructor_champion,
-                'is_ai': constructor_champion not in {p['team'] for p in players if p['team']}
+                'team': constructor_champion['team'],
+                'is_ai': constructor_champion['is_ai']
             },
+            'driver_standings': driver_standings,
+            'constructor_standings': constructor_standings,
             'players': players  # Store final player lineup
         }
         
-        # Load existing results and add this one
-        all_results = self._load_results()
-        all_results[game_id] = result
-        
-        # Save updated results
-        self._save_results(all_results)
+        # Save this season's result
+        self.store.save_result(game_id, result)
+
+        # The lap-by-lap timeline can be rebuilt from the seed, so failing to
+        # write it now does not fail the season
+        try:
+            timeline.save(timeline.timeline_path(self.data_dir, game_id), timeline.build(season))
+        except Exception as e:
+            logger.error(f"Error saving race timeline of game {game_id}: {e}")
         
         # Archive the game
         self.game_manager.archive_game(game_id)
         
         return result
         
+    @tracing.traced()
+    def championship_odds(self, game_id: str, seasons: int = 10_000, confidence: float = 0.95,
+                          tolerance: Optional[float] = None, seed=None,
+                          batch_size: int = ODDS_BATCH_SIZE, processes: Optional[bool] = None) -> Dict:
+        """
+        Estimate title probabilities for a game's current lineup by
+        simulating up to `seasons` seasons in batches. Estimates run on a
+        process pool if `processes` is set, or by default once they are
+        large. With a tolerance, simulation stops as soon as every
+        confidence interval is narrower than +/- tolerance.
+        """
+        if seasons <= 0 or batch_size <= 0:
+            raise ValueError(f"seasons and batch_size must be positive, got {seasons} and {batch_size}")
+        game = self.game_manager.get_game(game_id)
+        entries = self._season_entries(game, game['players'])
+        upgrades = game.get('upgrades', {})
+        team_names = list(dict.fromkeys(entry['team'] for entry in entries))
+        player_teams = {p['team'] for p in game['players'] if p['team']}
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+        batch_sizes = [min(batch_size, seasons - start) for start in range(0, seasons, batch_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+        if processes is None:
+            processes = seasons >= ODDS_PROCESS_THRESHOLD
+        pool = _get_odds_pool() if processes else None
+        # Batches run in rounds of one per worker; intervals are checked after each round
+        round_size = ODDS_WORKERS if pool else 1
+
+        driver_counts = np.zeros(len(entries), dtype=int)
+        constructor_counts = np.zeros(len(team_names), dtype=int)
+        simulated = 0
+        converged = False
+        for start in range(0, len(batch_sizes), round_size):
+            sizes = batch_sizes[start:start + round_size]
+            round_seeds = seeds[start:start + round_size]
+            if pool:
+                counts = pool.map(engine.count_championships, repeat(entries), sizes, round_seeds,
+                                  repeat(upgrades))
+            else:
+                counts = map(engine.count_championships, repeat(entries), sizes, round_seeds,
+                             repeat(upgrades))
+            for drivers, constructors in counts:
+                driver_counts += drivers
+                constructor_counts += constructors
+            simulated += sum(sizes)
+
+            if tolerance is not None:
+                widths = [high - low for low, high in (wilson_interval(driver_counts, simulated, z),
+                                                       wilson_interval(constructor_counts, simulated, z))]
+                if max(width.max() for width in widths) / 2 <= tolerance:
+                    converged = True
+                    break
+
+        driver_low, driver_high = wilson_interval(driver_counts, simulated, z)
+        constructor_low, constructor_high = wilson_interval(constructor_counts, simulated, z)
+        drivers = [
+            {
+                'driver': entry['name'],
+                'team': entry['team'],
+                'is_ai': entry['is_ai'],
+                'probability': float(driver_counts[i] / simulated),
+                'low': float(driver_low[i]),
+                'high': float(driver_high[i])
+            }
+            for i, entry in enumerate(entries)
+        ]
+        constructors = [
+            {
+                'team': team,
+                'is_ai': team not in player_teams,
+                'probability': float(constructor_counts[i] / simulated),
+                'low': float(constructor_low[i]),
+                'high': float(constructor_high[i])
+            }
+            for i, team in enumerate(team_names)
+        ]
+        logger.info(f"Estimated odds for game {game_id} from {simulated} seasons")
+        return {
+            'seasons': simulated,
+            'confidence': confidence,
+            'converged': converged,
+            'drivers': sorted(drivers, key=lambda row: row['probability'], reverse=True),
+            'constructors': sorted(constructors, key=lambda row: row['probability'], reverse=True)
+        }
+
+    @tracing.traced()
+    def upgrade_advice(self, game_id: str, team: str, seasons: int = 2000,
+                       max_seconds: float = 1.0, seed=None) -> Dict:
+        """
+        Rank the upgrades a team can afford by its expected season points.
+        All candidates race the same simulated seasons (common random
+        numbers), run in batches until `seasons` is reached or the time
+        budget is spent. Each gain over no upgrade comes with a 95% interval.
+        """
+        game = self.game_manager.get_game(game_id)
+        entries = self._season_entries(game, game['players'])
+        budget = roster.TEAMS[team].budget
+        affordable = [name for name, details in UPGRADES.items() if details['cost'] <= budget]
+        candidates = [None] + affordable
+        rng = np.random.default_rng(seed)
+
+        totals = np.zeros(len(candidates))
+        gains = np.zeros(len(candidates))
+        gains_squared = np.zeros(len(candidates))
+        simulated = 0
+        started = time.monotonic()
+        while simulated < seasons and (simulated == 0 or time.monotonic() - started < max_seconds):
+            batch = min(ADVISOR_BATCH_SIZE, seasons - simulated)
+            points = engine.team_points_by_upgrade(entries, team, candidates, batch, rng,
+                                                   game.get('upgrades', {}))
+            # Paired with the no-upgrade baseline season by season
+            differences = points - points[0]
+            totals += points.sum(axis=1)
+            gains += differences.sum(axis=1)
+            gains_squared += (differences ** 2).sum(axis=1)
+            simulated += batch
+
+        mean_gain = gains / simulated
+        variance = np.maximum(gains_squared / simulated - mean_gain ** 2, 0)
+        margin = 1.96 * np.sqrt(variance / max(simulated - 1, 1))
+        advice = [
+            {
+                'upgrade': upgrade,
+                'cost': UPGRADES[upgrade]['cost'],
+                'expected_points': float(totals[i] / simulated),
+                'gain': float(mean_gain[i]),
+                'gain_low': float(mean_gain[i] - margin[i]),
+                'gain_high': float(mean_gain[i] + margin[i])
+            }
+            for i, upgrade in enumerate(candidates) if upgrade
+        ]
+        logger.info(f"Ranked {len(advice)} upgrades for {team} in game {game_id} "
+                    f"from {simulated} seasons")
+        return {
+            'seasons': simulated,
+            'baseline_points': float(totals[0] / simulated),
+            'upgrades': sorted(advice, key=lambda row: row['expected_points'], reverse=True)
+        }
+
+    @tracing.traced()
     def get_game_results(self, game_id: str) -> Dict:
         """Get historical results for a specific game"""
-        results = self._load_results()
-        return results.get(game_id)
\ No newline at end of file
+        return self.store.load_result(game_id)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from typing import List, Optional
 from dataclasses import dataclass, field
 
-@dataclass
+@dataclass(slots=True)
 class Driver:
     name: str
     skill: int  # 1-100
@@ -14,7 +14,7 @@ class Driver:
     def __repr__(self) -> str:
         return f"Driver(name={self.name}, skill={self.skill}, consistency={self.consistency})"
 
-@dataclass
+@dataclass(slots=True)
 class Team:
     name: str
     car_performance: int  # 1-100
@@ -26,7 +26,7 @@ class Team:
     def __repr__(self) -> str:
         return f"Team(name={self.name}, car_performance={self.car_performance}, drivers={len(self.drivers)})"
 
-@dataclass
+@dataclass(slots=True)
 class Track:
     name: str
     difficulty: int  # 1-100
@@ -0,0 +1,140 @@
+"""
+Derived performance matrices.
+
+Combining driver skill and consistency, car performance, pre-season
+upgrades (see game/upgrades.py) and track character into the track x entry
+arrays a race needs is the same work for every season of a lineup, so the
+result is memoized in an LRU cache keyed by a hash of the lineup, upgrades
+and tracks. Cached arrays are shared and read-only.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from game import roster
+from game.data import TRACKS
+from game.models import Track
+from game.upgrades import upgrade_modifiers
+
+# Weights of the car and the driver in the base pace
+CAR_WEIGHT = 1.0
+SKILL_WEIGHT = 0.8
+# Spread of the per-race pace noise for a driver of average consistency
+NOISE_SCALE = 12.0
+# Chance of a retirement per race before driver and track factors
+BASE_DNF_RATE = 0.03
+
+# Distinct lineups kept in memory
+MATRIX_CACHE_SIZE = 256
+
+def entry_attributes(entries: List[Dict],
+                     upgrades: Optional[Dict[str, str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Skill, consistency and car performance of each entry as arrays, gathered
+    from the roster columns, with its team's upgrade (upgrades maps team
+    name to upgrade) applied
+    """
+    drivers = roster.DRIVERS.indices(entry['name'] for entry in entries)
+    teams = roster.TEAMS.indices(entry['team'] for entry in entries)
+    modifiers = [upgrade_modifiers((upgrades or {}).get(entry['team'])) for entry in entries]
+    modifier = {key: np.array([m[key] for m in modifiers])
+                for key in ('skill', 'consistency', 'car', 'reliability', 'wet')}
+    return {
+        'skill': roster.DRIVERS.columns['skill'][drivers] + modifier['skill'],
+        'consistency': np.minimum(100, roster.DRIVERS.columns['consistency'][drivers] + modifier['consistency']),
+        'car': roster.TEAMS.columns['car_performance'][teams] + modifier['car'],
+        'reliability': modifier['reliability'],
+        'wet': modifier['wet']
+    }
+
+def track_attributes(tracks: Sequence[Track] = TRACKS) -> Dict[str, np.ndarray]:
+    """Characteristics of roster tracks scaled to 0-1, one value per track"""
+    rows = roster.TRACKS.indices(track.name for track in tracks)
+    return {
+        'difficulty': roster.TRACKS.columns['difficulty'][rows] / 100,
+        'weather': roster.TRACKS.columns['weather_impact'][rows] / 100,
+        'overtaking': roster.TRACKS.columns['overtaking_difficulty'][rows] / 100
+    }
+
+def _build_matrix(entries: List[Dict], tracks: Sequence[Track],
+                  upgrades: Optional[Dict[str, str]]) -> Dict[str, np.ndarray]:
+    """
+    Difficult tracks reward skill, wet ones add noise and retirements, and
+    inconsistent drivers get both
+    """
+    driver = entry_attributes(entries, upgrades)
+    track = track_attributes(tracks)
+    difficulty = track['difficulty'][:, None]
+    weather = track['weather'][:, None]
+    inconsistency = 1 - driver['consistency'][None, :] / 100
+
+    pace = (CAR_WEIGHT * driver['car'][None, :]
+            + SKILL_WEIGHT * (0.5 + difficulty) * driver['skill'][None, :])
+    spread = NOISE_SCALE * (0.5 + inconsistency) * (1 + weather * driver['wet'][None, :])
+    dnf_rate = (BASE_DNF_RATE * driver['reliability'][None, :]
+                * (1 + 2 * inconsistency) * (0.5 + difficulty) * (0.5 + weather))
+    return {'pace': pace, 'spread': spread, 'dnf_rate': dnf_rate,
+            'dnf_threshold': np.vectorize(NormalDist().inv_cdf)(dnf_rate),
+            'overtaking': np.broadcast_to(track['overtaking'][:, None], pace.shape)}
+
+def matrix_key(entries: List[Dict], upgrades: Optional[Dict[str, str]] = None,
+               tracks: Sequence[Track] = TRACKS) -> str:
+    """Hash of everything a performance matrix is derived from"""
+    inputs = {
+        'entries': [(entry['name'], entry['team']) for entry in entries],
+        'upgrades': sorted((upgrades or {}).items()),
+        'tracks': [(track.name, track.difficulty, track.weather_impact, track.overtaking_difficulty)
+                   for track in tracks]
+    }
+    return hashlib.sha1(json.dumps(inputs).encode()).hexdigest()
+
+class MatrixCache:
+    """Thread-safe LRU cache of read-only performance matrices"""
+    def __init__(self, max_entries: int = MATRIX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, entries: List[Dict], upgrades: Optional[Dict[str, str]] = None,
+            tracks: Sequence[Track] = TRACKS) -> Dict[str, np.ndarray]:
+        key = matrix_key(entries, upgrades, tracks)
+        with self._lock:
+            matrix = self._entries.get(key)
+            if matrix is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return matrix
+            self.misses += 1
+
+        # Built outside the lock; two threads missing at once just build it twice
+        matrix = _build_matrix(entries, tracks, upgrades)
+        for array in matrix.values():
+            array.flags.writeable = False
+        with self._lock:
+            self._entries[key] = matrix
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return matrix
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+matrix_cache = MatrixCache()
+
+def performance_matrix(entries: List[Dict], tracks: Sequence[Track] = TRACKS,
+                       upgrades: Optional[Dict[str, str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Per track x entry arrays driving a race: base pace, noise spread and
+    retirement probability (with the matching standard normal threshold).
+    Served from the process-wide cache; the arrays must not be modified.
+    """
+    return matrix_cache.get(entries, upgrades, tracks)
@@ -0,0 +1,58 @@
+"""
+Roster catalog: the teams, drivers and tracks of game/data.py as
+struct-of-arrays tables shared by the views and the season engine.
+
+Each table keeps the (slotted) records in their data.py order, a name to
+row index dict for O(1) lookups, and every numeric attribute as a read-only
+NumPy column aligned with the rows, so the engine gathers a lineup's values
+with one fancy index:
+
+    rows = roster.DRIVERS.indices(['Max Verstappen', 'Lando Norris'])
+    skill = roster.DRIVERS.columns['skill'][rows]
+"""
+from typing import Dict, Generic, Iterable, Iterator, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from game import data
+from game.models import Driver, Team, Track
+
+R = TypeVar('R')
+
+class Catalog(Generic[R]):
+    """Named records in a fixed order, with their name index and numeric columns"""
+    def __init__(self, records: Sequence[R], columns: Sequence[str]):
+        self.records: Tuple[R, ...] = tuple(records)
+        self.index: Dict[str, int] = {record.name: row for row, record in enumerate(self.records)}
+        if len(self.index) != len(self.records):
+            raise ValueError("Catalog record names must be unique")
+        self.names: Tuple[str, ...] = tuple(self.index)
+        self.columns: Dict[str, np.ndarray] = {}
+        for column in columns:
+            values = np.array([getattr(record, column) for record in self.records])
+            values.flags.writeable = False
+            self.columns[column] = values
+
+    def __getitem__(self, name: str) -> R:
+        return self.records[self.index[name]]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __iter__(self) -> Iterator[R]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def indices(self, names: Iterable[str]) -> np.ndarray:
+        """Row of every name, raising KeyError for names not in the catalog"""
+        return np.array([self.index[name] for name in names], dtype=np.intp)
+
+    def column(self, column: str, names: Iterable[str]) -> np.ndarray:
+        """One numeric attribute of the named records, in the order given"""
+        return self.columns[column][self.indices(names)]
+
+TEAMS: Catalog[Team] = Catalog(data.TEAMS, ('car_performance', 'budget'))
+DRIVERS: Catalog[Driver] = Catalog(data.DRIVERS, ('skill', 'consistency', 'price'))
+TRACKS: Catalog[Track] = Catalog(data.TRACKS, ('difficulty', 'weather_impact', 'overtaking_difficulty'))
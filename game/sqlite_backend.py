@@ -0,0 +1,357 @@
+import sqlite3
+import threading
+from pathlib import Path
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from game.data import MAX_PLAYERS
+from game.storage import ConflictError, StorageBackend, JsonBackend, is_result, store_call, summarize_result
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+DB_FILE = "f1sim.db"
+
+# Created after _upgrade_schema has added the columns to older databases
+UPGRADED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_games_open ON games (archived, player_count, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_driver_champion ON results (driver_champion);
+CREATE INDEX IF NOT EXISTS idx_results_constructor_champion ON results (constructor_champion);
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    phase TEXT,
+    creator TEXT,
+    archived INTEGER NOT NULL DEFAULT 0,
+    completed_at TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    player_count INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_games_phase ON games (archived, phase);
+CREATE INDEX IF NOT EXISTS idx_games_created_at ON games (archived, created_at);
+CREATE INDEX IF NOT EXISTS idx_games_completed_at ON games (archived, completed_at);
+
+CREATE TABLE IF NOT EXISTS game_players (
+    game_id TEXT NOT NULL REFERENCES games (id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    PRIMARY KEY (game_id, username)
+);
+CREATE INDEX IF NOT EXISTS idx_game_players_username ON game_players (username);
+
+CREATE TABLE IF NOT EXISTS results (
+    game_id TEXT PRIMARY KEY,
+    timestamp TEXT,
+    driver_champion TEXT,
+    constructor_champion TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS results_players (
+    game_id TEXT NOT NULL REFERENCES results (game_id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    PRIMARY KEY (game_id, username)
+);
+CREATE INDEX IF NOT EXISTS idx_results_players_username ON results_players (username);
+
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+class SqliteBackend(StorageBackend):
+    """
+    SQLite backend (data/f1sim.db) running in WAL mode so several Streamlit
+    sessions and server processes can read and write concurrently.
+
+    Each game is stored as a JSON document next to indexed columns for the
+    fields used in lookups and listings. On first use the database is
+    filled from the existing JSON files in the data directory.
+    """
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.db_file = self.data_dir / DB_FILE
+        self._local = threading.local()
+
+        is_new = not self.db_file.exists()
+        self._conn.executescript(SCHEMA)
+        self._upgrade_schema()
+        self._conn.executescript(UPGRADED_INDEXES)
+        if is_new:
+            self._import_json_stores()
+
+    def _upgrade_schema(self):
+        """Add columns introduced after a database was created"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(games)")}
+        if 'version' not in columns:
+            with self._conn as conn:
+                conn.execute("ALTER TABLE games ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        if 'player_count' not in columns:
+            with self._conn as conn:
+                conn.execute("ALTER TABLE games ADD COLUMN player_count INTEGER NOT NULL DEFAULT 0")
+                conn.execute("""
+                    UPDATE games SET player_count =
+                        (SELECT COUNT(*) FROM game_players WHERE game_players.game_id = games.id)
+                """)
+
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+        if 'timestamp' not in columns:
+            with self._conn as conn:
+                for column in ('timestamp', 'driver_champion', 'constructor_champion'):
+                    conn.execute(f"ALTER TABLE results ADD COLUMN {column} TEXT")
+                # Fill the new columns and the players table from the stored
+                # documents, dropping junk entries imported from results.json
+                rows = conn.execute("SELECT game_id, data FROM results").fetchall()
+                for game_id, data in rows:
+                    result = metrics.load_json(data, "sqlite")
+                    if is_result(result):
+                        self._write_result(conn, game_id, result)
+                    else:
+                        conn.execute("DELETE FROM results WHERE game_id = ?", (game_id,))
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections can't be shared"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _import_json_stores(self):
+        """Copy games, results and users from the JSON files into the database"""
+        json_backend = JsonBackend(str(self.data_dir))
+        games = json_backend.list_games()
+        archived = list(json_backend.iter_archived_games())
+        results = json_backend.list_results()
+        users = json_backend.list_users()
+
+        with self._conn as conn:
+            for game in games:
+                self._write_game(conn, game, archived=False)
+            for game in archived:
+                self._write_game(conn, game, archived=True)
+            for game_id, result in results.items():
+                if is_result(result):
+                    self._write_result(conn, game_id, result)
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (username, data) VALUES (?, ?)",
+                [(username, metrics.dump_json(record, "sqlite")) for username, record in users.items()]
+            )
+        logger.info(f"Imported {len(games)} active games, {len(archived)} archived games, "
+                    f"{len(results)} results and {len(users)} users into {self.db_file}")
+
+    @staticmethod
+    def _write_game(conn: sqlite3.Connection, game: Dict, archived: bool):
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO games
+                (id, name, created_at, phase, creator, archived, completed_at, version,
+                 player_count, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (game['id'], game['name'], game['created_at'], game.get('phase'),
+             game.get('creator'), int(archived), game.get('completed_at'),
+             game.get('version', 0), len(game.get('players', [])), metrics.dump_json(game, "sqlite"))
+        )
+        conn.execute("DELETE FROM game_players WHERE game_id = ?", (game['id'],))
+        conn.executemany(
+            "INSERT INTO game_players (game_id, username) VALUES (?, ?)",
+            [(game['id'], player['username']) for player in game.get('players', [])]
+        )
+
+    @staticmethod
+    def _write_result(conn: sqlite3.Connection, game_id: str, result: Dict):
+        summary = summarize_result(game_id, result)
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO results
+                (game_id, timestamp, driver_champion, constructor_champion, data)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (game_id, summary['timestamp'], summary['driver_champion'],
+             summary['constructor_champion'], metrics.dump_json(result, "sqlite"))
+        )
+        conn.execute("DELETE FROM results_players WHERE game_id = ?", (game_id,))
+        conn.executemany(
+            "INSERT INTO results_players (game_id, username) VALUES (?, ?)",
+            [(game_id, username) for username in summary['usernames']]
+        )
+
+    def _load_game(self, game_id: str, archived: bool) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT data FROM games WHERE id = ? AND archived = ?", (game_id, int(archived))
+        ).fetchone()
+        return metrics.load_json(row[0], "sqlite") if row else None
+
+
+    @store_call("sqlite", "load_game")
+    def load_game(self, game_id: str) -> Optional[Dict]:
+        return self._load_game(game_id, archived=False)
+
+    @store_call("sqlite", "load_archived_game")
+    def load_archived_game(self, game_id: str) -> Optional[Dict]:
+        return self._load_game(game_id, archived=True)
+
+    @store_call("sqlite", "save_game")
+    def save_game(self, game: Dict, op: str = "save",
+                  expected_version: Optional[int] = None) -> None:
+        conn = self._conn
+        with conn:
+            # Take the write lock up front so the version check and the write
+            # happen atomically
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT version FROM games WHERE id = ? AND archived = 0", (game['id'],)
+            ).fetchone()
+            # A deleted or archived game is never brought back by a late writer
+            if row is None and op != "create":
+                raise ValueError(f"Game {game['id']} not found")
+            current_version = row[0] if row else 0
+            if expected_version is not None and expected_version != current_version:
+                raise ConflictError(
+                    f"Game {game['id']} is at version {current_version}, expected {expected_version}"
+                )
+            # The caller's game only gets the new version once the commit succeeds
+            stored = dict(game, version=current_version + 1)
+            self._write_game(conn, stored, archived=False)
+        game['version'] = stored['version']
+
+    @store_call("sqlite", "delete_game")
+    def delete_game(self, game_id: str) -> bool:
+        with self._conn as conn:
+            cursor = conn.execute("DELETE FROM games WHERE id = ? AND archived = 0", (game_id,))
+        return cursor.rowcount > 0
+
+    @store_call("sqlite", "archive_game")
+    def archive_game(self, game: Dict, expected_version: Optional[int] = None) -> None:
+        stored = game
+        conn = self._conn
+        with conn:
+            if expected_version is not None:
+                # Same check as save_game, under the same write lock
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT version FROM games WHERE id = ? AND archived = 0", (game['id'],)
+                ).fetchone()
+                if row is None:
+                    raise ValueError(f"Game {game['id']} not found")
+                if expected_version != row[0]:
+                    raise ConflictError(
+                        f"Game {game['id']} is at version {row[0]}, expected {expected_version}"
+                    )
+                stored = dict(game, version=row[0] + 1)
+            self._write_game(conn, stored, archived=True)
+        if expected_version is not None:
+            game['version'] = stored['version']
+
+    @store_call("sqlite", "list_games")
+    def list_games(self) -> List[Dict]:
+        rows = self._conn.execute(
+            "SELECT data FROM games WHERE archived = 0 ORDER BY created_at DESC"
+        ).fetchall()
+        return [metrics.load_json(row[0], "sqlite") for row in rows]
+
+    @store_call("sqlite", "list_game_summaries")
+    def list_game_summaries(self, page: int = 0, page_size: int = 20, search: str = "",
+                            open_only: bool = False) -> Tuple[List[Dict], int]:
+        conditions, params = ["archived = 0"], []
+        if search:
+            # Escape LIKE wildcards so the search is a plain substring match
+            pattern = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            params.append(f"%{pattern}%")
+        if open_only:
+            conditions.append("player_count < ?")
+            params.append(MAX_PLAYERS)
+        where = " AND ".join(conditions)
+
+        total = self._conn.execute(f"SELECT COUNT(*) FROM games WHERE {where}", params).fetchone()[0]
+        rows = self._conn.execute(
+            f"""
+            SELECT id, name, created_at, phase, creator, player_count FROM games
+            WHERE {where} ORDER BY created_at DESC LIMIT ? OFFSET ?
+            """,
+            params + [page_size, page * page_size]
+        ).fetchall()
+        summaries = [
+            {'id': game_id, 'name': name, 'created_at': created_at, 'phase': phase,
+             'creator': creator, 'player_count': player_count,
+             'open_slots': MAX_PLAYERS - player_count}
+            for game_id, name, created_at, phase, creator, player_count in rows
+        ]
+        return summaries, total
+
+    def iter_archived_games(self) -> Iterator[Dict]:
+        # Rows are fetched as the caller iterates, using the completed_at index
+        cursor = self._conn.execute(
+            "SELECT data FROM games WHERE archived = 1 ORDER BY completed_at DESC"
+        )
+        for row in cursor:
+            yield metrics.load_json(row[0], "sqlite")
+
+    @store_call("sqlite", "load_result")
+    def load_result(self, game_id: str) -> Optional[Dict]:
+        row = self._conn.execute("SELECT data FROM results WHERE game_id = ?", (game_id,)).fetchone()
+        return metrics.load_json(row[0], "sqlite") if row else None
+
+    @store_call("sqlite", "save_result")
+    def save_result(self, game_id: str, result: Dict) -> None:
+        with self._conn as conn:
+            self._write_result(conn, game_id, result)
+
+    @store_call("sqlite", "list_results")
+    def list_results(self) -> Dict[str, Dict]:
+        rows = self._conn.execute("SELECT game_id, data FROM results").fetchall()
+        return {game_id: metrics.load_json(data, "sqlite") for game_id, data in rows}
+
+    @store_call("sqlite", "find_results")
+    def find_results(self, champion: Optional[str] = None, username: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        conditions, params = [], []
+        if champion is not None:
+            conditions.append("(driver_champion = ? OR constructor_champion = ?)")
+            params += [champion, champion]
+        if username is not None:
+            conditions.append("game_id IN (SELECT game_id FROM results_players WHERE username = ?)")
+            params.append(username)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._conn.execute(
+            f"SELECT game_id, data FROM results {where} ORDER BY timestamp DESC", params
+        ).fetchall()
+        return [summarize_result(game_id, metrics.load_json(data, "sqlite")) for game_id, data in rows]
+
+    @store_call("sqlite", "load_user")
+    def load_user(self, username: str) -> Optional[Dict]:
+        row = self._conn.execute("SELECT data FROM users WHERE username = ?", (username,)).fetchone()
+        return metrics.load_json(row[0], "sqlite") if row else None
+
+    @store_call("sqlite", "create_user")
+    def create_user(self, username: str, record: Dict) -> bool:
+        with self._conn as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO users (username, data) VALUES (?, ?)",
+                (username, metrics.dump_json(record, "sqlite"))
+            )
+        return cursor.rowcount > 0
+
+    @store_call("sqlite", "list_users")
+    def list_users(self) -> Dict[str, Dict]:
+        rows = self._conn.execute("SELECT username, data FROM users").fetchall()
+        return {username: metrics.load_json(data, "sqlite") for username, data in rows}
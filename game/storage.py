@@ -0,0 +1,802 @@
+import copy
+import json
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import logging
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from game import journal
+from game.archive import GameArchive, partition_key
+from game.data import MAX_PLAYERS
+from utils import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+INDEX_JOURNAL = "index.log"
+
+# Journals are folded into their snapshot once they grow past these sizes
+GAME_COMPACT_BYTES = 16 * 1024
+INDEX_COMPACT_BYTES = 256 * 1024
+
+# Environment variable selecting the storage backend ("json" or "sqlite")
+BACKEND_ENV_VAR = "F1_STORAGE_BACKEND"
+
+# Journal compaction runs on one background thread shared by all backends
+_compaction_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal-compaction")
+_compaction_lock = threading.Lock()
+_pending_compactions = set()
+
+# One backend per (kind, data directory) for the whole server process
+_backends = {}
+_backends_lock = threading.Lock()
+
+def store_call(backend: str, op: str):
+    """Decorator timing a backend call in the store metrics and tracing it as a span"""
+    def decorator(fn):
+        timed = metrics.STORE_CALL_SECONDS.timed(backend=backend, op=op)(fn)
+        return tracing.traced(f"store.{op}", backend=backend)(timed)
+    return decorator
+
+def summarize_game(game: Dict) -> Dict:
+    """Build the lightweight summary kept in a store index"""
+    summary = {
+        'id': game['id'],
+        'name': game['name'],
+        'created_at': game['created_at'],
+        'phase': game.get('phase'),
+        'creator': game.get('creator'),
+        'player_count': len(game.get('players', [])),
+        'open_slots': MAX_PLAYERS - len(game.get('players', []))
+    }
+    if 'completed_at' in game:
+        summary['completed_at'] = game['completed_at']
+    return summary
+
+def is_result(value) -> bool:
+    """Whether a stored value is a season result (old results.json files hold junk keys)"""
+    return isinstance(value, dict) and 'drivers_championship' in value
+
+def summarize_result(game_id: str, result: Dict) -> Dict:
+    """Build the summary of a season result kept in the results index"""
+    drivers = result.get('drivers_championship') or {}
+    constructors = result.get('constructors_championship') or {}
+    return {
+        'game_id': game_id,
+        'timestamp': result.get('timestamp'),
+        'driver_champion': drivers.get('driver'),
+        'driver_champion_team': drivers.get('team'),
+        'constructor_champion': constructors.get('team'),
+        'usernames': sorted({player['username'] for player in result.get('players', [])
+                             if player.get('username')})
+    }
+
+def matches_lobby_filter(summary: Dict, search: str, open_only: bool) -> bool:
+    """Whether a game summary passes the welcome page's name search and open-slot filter"""
+    if search and search.casefold() not in summary['name'].casefold():
+        return False
+    # Summaries written before open_slots existed only have the player count
+    open_slots = summary.get('open_slots', MAX_PLAYERS - summary['player_count'])
+    return not open_only or open_slots > 0
+
+class ConflictError(Exception):
+    """Raised when a game changed since the version a writer expected"""
+
+def _file_signature(*paths: Path) -> tuple:
+    """Identify the current version of some files (None for a missing file)"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+class _ParsedFileCache:
+    """
+    Parsed file contents kept in memory until the files change on disk.
+
+    Entries are validated against a file signature (inode, size, mtime) so
+    writes made by other processes are picked up with one stat per file.
+    Cached values are shared: callers must copy before mutating them.
+    """
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, signature: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, signature: tuple, value) -> None:
+        with self._lock:
+            self._entries[key] = (signature, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+def _diff_games(old: Dict, new: Dict) -> Dict:
+    """Journal record turning old into new, empty if nothing changed"""
+    record = {}
+    changed = {key: value for key, value in new.items() if old.get(key) != value or key not in old}
+    removed = [key for key in old if key not in new]
+    if changed:
+        record['set'] = changed
+    if removed:
+        record['unset'] = removed
+    return record
+
+def _apply_patch(game: Dict, record: Dict) -> None:
+    """Apply one journal record to a game in place"""
+    game.update(record.get('set', {}))
+    for key in record.get('unset', []):
+        game.pop(key, None)
+
+class StorageBackend(ABC):
+    """
+    Persistence interface used by GameManager, GameMechanics and UserManager.
+
+    Games are plain dicts keyed by their 'id'. Results are keyed by game id
+    and users by username.
+    """
+
+    # Games
+
+    @abstractmethod
+    def load_game(self, game_id: str) -> Optional[Dict]:
+        """Load one active game, or None if it does not exist"""
+
+    @abstractmethod
+    def load_archived_game(self, game_id: str) -> Optional[Dict]:
+        """Load one archived game, or None if it does not exist"""
+
+    @abstractmethod
+    def save_game(self, game: Dict, op: str = "save",
+                  expected_version: Optional[int] = None) -> None:
+        """
+        Create or replace one active game and bump its 'version' (also set
+        on the passed dict). When expected_version is given the write only
+        happens if the stored version still matches (0 for a game that does
+        not exist yet), otherwise ConflictError is raised. op names the
+        mutation for logging.
+        """
+
+    @abstractmethod
+    def delete_game(self, game_id: str) -> bool:
+        """Delete one active game. Returns False if it does not exist"""
+
+    @abstractmethod
+    def archive_game(self, game: Dict, expected_version: Optional[int] = None) -> None:
+        """
+        Move one game from the active store to the archive. When
+        expected_version is given the active game must still be at that
+        version, as for save_game, and the archived copy gets the next one.
+        """
+
+    @abstractmethod
+    def list_games(self) -> List[Dict]:
+        """Load every active game"""
+
+    @abstractmethod
+    def list_game_summaries(self, page: int = 0, page_size: int = 20, search: str = "",
+                            open_only: bool = False) -> Tuple[List[Dict], int]:
+        """
+        One page of active game summaries (see summarize_game), newest first,
+        plus the total number matching. search is a case-insensitive
+        substring of the name; open_only keeps games with a free slot.
+        """
+
+    @abstractmethod
+    def iter_archived_games(self) -> Iterator[Dict]:
+        """Lazily yield archived games, most recently completed first"""
+
+    # Results
+
+    @abstractmethod
+    def load_result(self, game_id: str) -> Optional[Dict]:
+        """Load the season result of one game, or None"""
+
+    @abstractmethod
+    def save_result(self, game_id: str, result: Dict) -> None:
+        """Store the season result of one game"""
+
+    @abstractmethod
+    def list_results(self) -> Dict[str, Dict]:
+        """Load every stored result keyed by game id"""
+
+    @abstractmethod
+    def find_results(self, champion: Optional[str] = None, username: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        """
+        Result summaries (see summarize_result), newest first. champion
+        matches the drivers' champion or the constructors' champion team;
+        since/until bound the ISO timestamp, until being exclusive.
+        """
+
+    # Users
+
+    @abstractmethod
+    def load_user(self, username: str) -> Optional[Dict]:
+        """Load one user record, or None if it does not exist"""
+
+    @abstractmethod
+    def create_user(self, username: str, record: Dict) -> bool:
+        """Store a new user. Returns False if the username is taken"""
+
+    @abstractmethod
+    def list_users(self) -> Dict[str, Dict]:
+        """Load every user record keyed by username"""
+
+class JsonBackend(StorageBackend):
+    """
+    File based backend. Every game lives in its own snapshot file plus an
+    append-only journal: a mutation appends one record holding the changed
+    fields, and the journal is folded back into the snapshot in the
+    background once it grows. A crash can at worst tear the last journal
+    line, which is skipped when the game is next read.
+
+    Layout inside the data directory:
+        games/<id>.json       snapshot of one active game
+        games/<id>.log        journal of that game since its last compaction; also
+                              its lock file, removed along with the game
+        games/index.json      summaries of all active games
+        games/index.log       journal of summary changes
+        archive/<YYYY-MM>.*   archived games partitioned by completion
+                              month, see game/archive.py
+        archive/offsets.log   where each archived game's record starts
+        archive/index.json    summaries of all archived games
+        archive/index.log     journal of summary changes
+        results/<id>.json     season result of one game
+        results/index.json    result summaries by game id
+        results/index.log     journal of summary changes
+        users.json            user records keyed by username
+        users.lock            lock file held while a user is created
+
+    The legacy games.json / games_archive.json / results.json files (and
+    per-game archive files from older versions) are migrated the first time
+    the backend is opened.
+
+    Parsed files are cached in memory and re-read only when their signature
+    on disk changes, so one backend instance should be shared per process
+    (see get_backend).
+    """
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = Path(data_dir)
+        self.games_dir = self.data_dir / "games"
+        self.archive_dir = self.data_dir / "archive"
+        self.results_dir = self.data_dir / "results"
+        self.users_file = self.data_dir / "users.json"
+        self.users_lock_file = self.data_dir / "users.lock"
+        self.games_dir.mkdir(parents=True, exist_ok=True)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self._cache = _ParsedFileCache()
+        self.archive = GameArchive(self.archive_dir)
+        self._migrate_legacy_stores()
+        self._migrate_archive_files()
+        self._migrate_results_file()
+        if self.archive.needs_offsets():
+            self._schedule('archive-offsets', self.archive.build_offsets)
+        if self.archive.needs_compression():
+            self._schedule('archive', self.archive.compress_cold_partitions)
+
+    def _migrate_legacy_stores(self):
+        """Split the legacy single-file stores into per-game files (runs once)"""
+        legacy_stores = (
+            (self.data_dir / "games.json", self.games_dir),
+            (self.data_dir / "games_archive.json", self.archive_dir)
+        )
+        for legacy_file, target_dir in legacy_stores:
+            if (target_dir / INDEX_FILE).exists():
+                continue
+
+            legacy_games = []
+            if legacy_file.exists():
+                try:
+                    with open(legacy_file, 'r') as f:
+                        legacy_games = json.load(f)
+                except json.JSONDecodeError:
+                    logger.error(f"Error reading {legacy_file}, nothing to migrate")
+
+            index = {}
+            for game in legacy_games:
+                if target_dir == self.archive_dir:
+                    self.archive.append(game)
+                else:
+                    self._write_json(target_dir / f"{game['id']}.json", game)
+                index[game['id']] = summarize_game(game)
+
+            self._write_json(target_dir / INDEX_FILE, index)
+            if legacy_games:
+                logger.info(f"Migrated {len(legacy_games)} games from {legacy_file} to {target_dir}")
+
+    def _migrate_archive_files(self):
+        """Move per-game archive files written by older versions into partitions"""
+        for path in self.archive_dir.glob("*.json"):
+            if path.name == INDEX_FILE:
+                continue
+            game = self._read_json(path)
+            if game:
+                self.archive.append(game)
+                # Summaries of old files may lack the completion date used to find the partition
+                self._update_index(self.archive_dir, game['id'], summarize_game(game))
+            path.unlink()
+            logger.info(f"Moved archived game {path.stem} into its partition")
+
+    def _migrate_results_file(self):
+        """Split the legacy results.json into per-game result files (runs once)"""
+        if (self.results_dir / INDEX_FILE).exists():
+            return
+
+        legacy_file = self.data_dir / "results.json"
+        results = {}
+        if legacy_file.exists():
+            try:
+                results = self._read_json(legacy_file) or {}
+            except json.JSONDecodeError:
+                logger.error(f"Error reading {legacy_file}, nothing to migrate")
+
+        index = {}
+        for game_id, result in results.items():
+            if not is_result(result):
+                logger.warning(f"Skipping malformed entry {game_id!r} in {legacy_file}")
+                continue
+            self._write_json(self._game_path(self.results_dir, game_id), result)
+            index[game_id] = summarize_result(game_id, result)
+
+        self._write_json(self.results_dir / INDEX_FILE, index)
+        if index:
+            logger.info(f"Migrated {len(index)} results from {legacy_file} to {self.results_dir}")
+
+    @staticmethod
+    def _write_json(path: Path, data) -> None:
+        """Write a JSON file atomically so readers never see a partial file"""
+        with tracing.span("file.write", path=str(path)) as span:
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    text = metrics.dump_json(data, "json", indent=2)
+                    f.write(text)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            if span:
+                span.set(bytes=len(text))
+
+    @staticmethod
+    def _read_json(path: Path):
+        """Read a JSON file, returning None if it does not exist"""
+        with tracing.span("file.read", path=str(path)) as span:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+            if span:
+                span.set(bytes=len(data))
+            return metrics.load_json(data, "json")
+
+    @staticmethod
+    def _game_path(directory: Path, game_id: str) -> Path:
+        if not game_id or '/' in game_id or '\\' in game_id or game_id.startswith('.'):
+            raise ValueError(f"Invalid game id {game_id!r}")
+        return directory / f"{game_id}.json"
+
+    def _journal_path(self, game_id: str) -> Path:
+        return self._game_path(self.games_dir, game_id).with_suffix(".log")
+
+    @contextmanager
+    def _locked_journal(self, game_id: str, shared: bool = False,
+                        create: bool = True) -> Iterator[BinaryIO]:
+        """
+        Lock a game's journal, which is also the per-game lock. A delete
+        unlinks the journal while holding it, so a caller that was waiting
+        locks the file again by its path. With create=False a missing
+        journal raises FileNotFoundError.
+        """
+        while True:
+            with journal.locked(self._journal_path(game_id), shared=shared, create=create) as log:
+                if os.fstat(log.fileno()).st_nlink == 0:
+                    continue
+                yield log
+                return
+
+    def _replay(self, snapshot_path: Path, log) -> Optional[Dict]:
+        """Rebuild a game from its snapshot plus the journal tail"""
+        game = self._read_json(snapshot_path)
+        if game is None:
+            return None
+        for record in journal.read(log):
+            _apply_patch(game, record)
+        return game
+
+    def _schedule(self, key, task) -> None:
+        """Run a compaction task in the background unless one is already queued"""
+        with _compaction_lock:
+            if key in _pending_compactions:
+                return
+            _pending_compactions.add(key)
+
+        def run():
+            with _compaction_lock:
+                _pending_compactions.discard(key)
+            try:
+                task()
+            except Exception as e:
+                logger.error(f"Error compacting {key}: {e}")
+
+        _compaction_executor.submit(run)
+
+    def _current_game(self, game_id: str, log) -> Optional[Dict]:
+        """
+        State of a game while its journal lock is held, served from the cache
+        when the files are unchanged. The returned dict must not be mutated.
+        """
+        snapshot_path = self._game_path(self.games_dir, game_id)
+        signature = _file_signature(snapshot_path, self._journal_path(game_id))
+        game = self._cache.get(('game', game_id), signature)
+        if game is None:
+            game = self._replay(snapshot_path, log)
+            if game is not None:
+                self._cache.put(('game', game_id), signature, game)
+        return game
+
+    def compact_game(self, game_id: str) -> None:
+        """Fold a game's journal into its snapshot and empty the journal"""
+        snapshot_path = self._game_path(self.games_dir, game_id)
+        journal_path = self._journal_path(game_id)
+        with self._locked_journal(game_id) as log:
+            game = self._current_game(game_id, log)
+            if game is None:
+                # Deleted or archived since the compaction was scheduled
+                journal_path.unlink()
+                return
+            self._write_json(snapshot_path, game)
+            journal.truncate(log)
+            self._cache.put(('game', game_id), _file_signature(snapshot_path, journal_path), game)
+
+    def _load_index(self, directory: Path) -> Dict[str, Dict]:
+        """
+        Load an index snapshot with its journal tail applied. The result is
+        cached and must not be mutated.
+        """
+        with journal.locked(directory / INDEX_JOURNAL, shared=True) as log:
+            signature = _file_signature(directory / INDEX_FILE, directory / INDEX_JOURNAL)
+            index = self._cache.get(('index', directory), signature)
+            if index is not None:
+                return index
+            try:
+                index = self._read_json(directory / INDEX_FILE) or {}
+            except json.JSONDecodeError:
+                logger.error(f"Error reading index in {directory}, rebuilding it")
+                index = self._rebuild_index(directory)
+            for record in journal.read(log):
+                if record['summary'] is None:
+                    index.pop(record['id'], None)
+                else:
+                    index[record['id']] = record['summary']
+            self._cache.put(('index', directory), signature, index)
+            return index
+
+    def _rebuild_index(self, directory: Path) -> Dict[str, Dict]:
+        """Recreate an index from the game files in a directory"""
+        if directory == self.results_dir:
+            index = {}
+            for path in directory.glob("*.json"):
+                result = self._read_json(path) if path.name != INDEX_FILE else None
+                if is_result(result):
+                    index[path.stem] = summarize_result(path.stem, result)
+            self._write_json(directory / INDEX_FILE, index)
+            return index
+
+        if directory == self.archive_dir:
+            games = self.archive.iter_games()
+        else:
+            games = (self.load_game(path.stem) for path in directory.glob("*.json")
+                     if path.name != INDEX_FILE)
+        index = {game['id']: summarize_game(game) for game in games if game}
+        self._write_json(directory / INDEX_FILE, index)
+        return index
+
+    def _update_index(self, directory: Path, game_id: str, summary: Optional[Dict]) -> None:
+        """Journal a new summary (or a removal, when summary is None) for one game"""
+        # Appenders share the lock; O_APPEND keeps their lines from interleaving
+        with journal.locked(directory / INDEX_JOURNAL, shared=True) as log:
+            size = journal.append(log, {'id': game_id, 'summary': summary})
+        if size > INDEX_COMPACT_BYTES:
+            self._schedule((directory, INDEX_FILE), lambda: self.compact_index(directory))
+
+    def compact_index(self, directory: Path) -> None:
+        """Fold an index journal into index.json and empty the journal"""
+        with journal.locked(directory / INDEX_JOURNAL) as log:
+            index = self._read_json(directory / INDEX_FILE) or {}
+            for record in journal.read(log):
+                if record['summary'] is None:
+                    index.pop(record['id'], None)
+                else:
+                    index[record['id']] = record['summary']
+            self._write_json(directory / INDEX_FILE, index)
+            journal.truncate(log)
+
+    @store_call("json", "load_game")
+    def load_game(self, game_id: str) -> Optional[Dict]:
+        snapshot_path = self._game_path(self.games_dir, game_id)
+        journal_path = self._journal_path(game_id)
+        try:
+            with self._locked_journal(game_id, shared=True, create=False) as log:
+                return copy.deepcopy(self._current_game(game_id, log))
+        except FileNotFoundError:
+            pass
+        # No journal: a deleted game, or a migrated one that was never mutated
+        signature = _file_signature(snapshot_path, journal_path)
+        game = self._cache.get(('game', game_id), signature)
+        if game is None:
+            game = self._read_json(snapshot_path)
+            if game is None:
+                return None
+            self._cache.put(('game', game_id), signature, game)
+        return copy.deepcopy(game)
+
+    @store_call("json", "load_archived_game")
+    def load_archived_game(self, game_id: str) -> Optional[Dict]:
+        # Seek straight to the record through the offset index
+        game = self.archive.lookup(game_id)
+        if game is not None:
+            return game
+
+        # Not indexed yet: the summary's completion date tells which partition to search
+        summary = self._load_index(self.archive_dir).get(game_id)
+        if summary is None:
+            return None
+        return self.archive.find(game_id, partition_key(summary))
+
+    @store_call("json", "save_game")
+    def save_game(self, game: Dict, op: str = "save",
+                  expected_version: Optional[int] = None) -> None:
+        snapshot_path = self._game_path(self.games_dir, game['id'])
+        journal_path = self._journal_path(game['id'])
+        # The game's journal lock is the per-game lock: writers of different
+        # games never wait on each other
+        with self._locked_journal(game['id']) as log:
+            # Checked under the lock: the game may have been deleted or
+            # archived while this writer waited for it
+            current = self._current_game(game['id'], log)
+            if current is None and op != "create":
+                # Leave no lock file behind for a game that does not exist
+                journal_path.unlink()
+                raise ValueError(f"Game {game['id']} not found")
+            current_version = current.get('version', 0) if current else 0
+            if expected_version is not None and expected_version != current_version:
+                raise ConflictError(
+                    f"Game {game['id']} is at version {current_version}, expected {expected_version}"
+                )
+            # The caller's game only gets the new version once it is stored
+            stored = dict(game, version=current_version + 1)
+
+            if current is None:
+                # A new game starts out as a snapshot with an empty journal
+                self._write_json(snapshot_path, stored)
+                size = 0
+            else:
+                record = _diff_games(current, stored)
+                record['op'] = op
+                size = journal.append(log, record)
+            # Writes go through the cache so the next read needs no parse
+            self._cache.put(('game', game['id']), _file_signature(snapshot_path, journal_path),
+                            copy.deepcopy(stored))
+        game['version'] = stored['version']
+
+        summary = summarize_game(game)
+        if current is None or summary != summarize_game(current):
+            self._update_index(self.games_dir, game['id'], summary)
+        if size > GAME_COMPACT_BYTES:
+            self._schedule(game['id'], lambda: self.compact_game(game['id']))
+
+    def _remove_game(self, game_id: str) -> bool:
+        """
+        Remove a game's snapshot and journal while its journal lock is held.
+        Writers waiting on the lock find the journal unlinked and start over
+        on a fresh one, where the game no longer exists.
+        """
+        try:
+            self._game_path(self.games_dir, game_id).unlink()
+            removed = True
+        except FileNotFoundError:
+            removed = False
+        self._journal_path(game_id).unlink()
+        self._cache.discard(('game', game_id))
+        return removed
+
+    @store_call("json", "delete_game")
+    def delete_game(self, game_id: str) -> bool:
+        # Checked first so deleting an unknown id creates no lock file
+        if not self._game_path(self.games_dir, game_id).exists():
+            return False
+        with self._locked_journal(game_id):
+            if not self._remove_game(game_id):
+                return False
+        self._update_index(self.games_dir, game_id, None)
+        return True
+
+    @store_call("json", "archive_game")
+    def archive_game(self, game: Dict, expected_version: Optional[int] = None) -> None:
+        stored = game
+        with self._locked_journal(game['id']) as log:
+            if expected_version is not None:
+                current = self._current_game(game['id'], log)
+                if current is None:
+                    self._journal_path(game['id']).unlink()
+                    raise ValueError(f"Game {game['id']} not found")
+                current_version = current.get('version', 0)
+                if expected_version != current_version:
+                    raise ConflictError(
+                        f"Game {game['id']} is at version {current_version}, expected {expected_version}"
+                    )
+                stored = dict(game, version=current_version + 1)
+            # Archived and removed under the game's lock, so no write lands in between
+            self.archive.append(stored)
+            removed = self._remove_game(game['id'])
+        if expected_version is not None:
+            game['version'] = stored['version']
+
+        self._update_index(self.archive_dir, game['id'], summarize_game(stored))
+        if removed:
+            self._update_index(self.games_dir, game['id'], None)
+        if self.archive.needs_compression():
+            self._schedule('archive', self.archive.compress_cold_partitions)
+
+    @store_call("json", "list_games")
+    def list_games(self) -> List[Dict]:
+        games = (self.load_game(game_id) for game_id in self._load_index(self.games_dir))
+        return [game for game in games if game]
+
+    def _sorted_game_summaries(self) -> List[Dict]:
+        """Active game summaries newest first, cached until the index changes"""
+        # Taken before loading so the cached list is never older than its signature
+        signature = _file_signature(self.games_dir / INDEX_FILE, self.games_dir / INDEX_JOURNAL)
+        summaries = self._cache.get(('lobby',), signature)
+        if summaries is None:
+            summaries = sorted(self._load_index(self.games_dir).values(),
+                               key=lambda s: s['created_at'], reverse=True)
+            self._cache.put(('lobby',), signature, summaries)
+        return summaries
+
+    @store_call("json", "list_game_summaries")
+    def list_game_summaries(self, page: int = 0, page_size: int = 20, search: str = "",
+                            open_only: bool = False) -> Tuple[List[Dict], int]:
+        summaries = self._sorted_game_summaries()
+        if search or open_only:
+            summaries = [s for s in summaries if matches_lobby_filter(s, search, open_only)]
+        start = page * page_size
+        return copy.deepcopy(summaries[start:start + page_size]), len(summaries)
+
+    def iter_archived_games(self) -> Iterator[Dict]:
+        return self.archive.iter_games()
+
+    def _load_dict_file(self, path: Path) -> Dict:
+        """Load a JSON dict file through the cache. The result must not be mutated"""
+        signature = _file_signature(path)
+        data = self._cache.get(('file', path), signature)
+        if data is None:
+            try:
+                data = self._read_json(path) or {}
+            except json.JSONDecodeError:
+                logger.error(f"Error reading {path}, returning empty dict")
+                return {}
+            self._cache.put(('file', path), signature, data)
+        return data
+
+    def _update_dict_file(self, path: Path, key: str, value: Dict) -> None:
+        """Set one entry of a JSON dict file and refresh the cache"""
+        data = dict(self._load_dict_file(path))
+        data[key] = copy.deepcopy(value)
+        self._write_json(path, data)
+        self._cache.put(('file', path), _file_signature(path), data)
+
+    @store_call("json", "load_result")
+    def load_result(self, game_id: str) -> Optional[Dict]:
+        result = self._load_dict_file(self._game_path(self.results_dir, game_id))
+        return copy.deepcopy(result) if result else None
+
+    @store_call("json", "save_result")
+    def save_result(self, game_id: str, result: Dict) -> None:
+        path = self._game_path(self.results_dir, game_id)
+        self._write_json(path, result)
+        self._cache.discard(('file', path))
+        self._update_index(self.results_dir, game_id, summarize_result(game_id, result))
+
+    @store_call("json", "list_results")
+    def list_results(self) -> Dict[str, Dict]:
+        return {game_id: self.load_result(game_id) for game_id in self._load_index(self.results_dir)}
+
+    def _result_lookups(self) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Game ids of results grouped by champion and by username, built from
+        the results index and cached until it changes
+        """
+        # Taken before loading so the cached lookups are never older than their signature
+        signature = _file_signature(self.results_dir / INDEX_FILE, self.results_dir / INDEX_JOURNAL)
+        index = self._load_index(self.results_dir)
+        lookups = self._cache.get(('result-lookups',), signature)
+        if lookups is None:
+            lookups = {'champion': {}, 'username': {}}
+            for game_id, summary in index.items():
+                champions = {summary['driver_champion'], summary['constructor_champion']} - {None}
+                for champion in champions:
+                    lookups['champion'].setdefault(champion, []).append(game_id)
+                for username in summary['usernames']:
+                    lookups['username'].setdefault(username, []).append(game_id)
+            self._cache.put(('result-lookups',), signature, lookups)
+        return lookups
+
+    @store_call("json", "find_results")
+    def find_results(self, champion: Optional[str] = None, username: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        index = self._load_index(self.results_dir)
+        game_ids = set(index)
+        if champion is not None:
+            game_ids &= set(self._result_lookups()['champion'].get(champion, []))
+        if username is not None:
+            game_ids &= set(self._result_lookups()['username'].get(username, []))
+
+        summaries = [index[game_id] for game_id in game_ids]
+        if since is not None:
+            summaries = [s for s in summaries if (s['timestamp'] or '') >= since]
+        if until is not None:
+            summaries = [s for s in summaries if (s['timestamp'] or '') < until]
+        return copy.deepcopy(sorted(summaries, key=lambda s: s['timestamp'] or '', reverse=True))
+
+    @store_call("json", "load_user")
+    def load_user(self, username: str) -> Optional[Dict]:
+        return copy.deepcopy(self._load_dict_file(self.users_file).get(username))
+
+    @store_call("json", "create_user")
+    def create_user(self, username: str, record: Dict) -> bool:
+        # A file lock, so two server processes cannot both take a username
+        with journal.locked(self.users_lock_file):
+            if username in self._load_dict_file(self.users_file):
+                return False
+            self._update_dict_file(self.users_file, username, record)
+            return True
+
+    @store_call("json", "list_users")
+    def list_users(self) -> Dict[str, Dict]:
+        return copy.deepcopy(self._load_dict_file(self.users_file))
+
+def get_backend(data_dir: str = "data") -> StorageBackend:
+    """
+    Return the process-wide storage backend for a data directory, selected
+    by the F1_STORAGE_BACKEND variable. Sharing one instance lets every
+    Streamlit session reuse the same in-memory cache.
+    """
+    kind = os.environ.get(BACKEND_ENV_VAR, "json").lower()
+    key = (kind, os.path.abspath(data_dir))
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if kind == "json":
+                backend = JsonBackend(data_dir)
+            elif kind == "sqlite":
+                from game.sqlite_backend import SqliteBackend
+                backend = SqliteBackend(data_dir)
+            else:
+                raise ValueError(f"Unknown storage backend {kind!r}")
+            _backends[key] = backend
+    return backend
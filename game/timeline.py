@@ -0,0 +1,113 @@
+"""
+Lap-by-lap race timelines.
+
+The season engine only decides each race's result. A timeline fills in the
+laps: every running car's time behind the race leader follows a Brownian
+bridge, pinned to zero at the start and to a final gap that puts the field
+in its finishing order at the flag. Retirements drop out on a random lap,
+later retirements being classified ahead like in the result. The laps come
+from their own generator spawned from the season seed, so a timeline is
+reproducible and never changes the result it is drawn for.
+
+A season's timeline is one .npy file of a (race, lap, entry) array of 3-byte
+records: the 1-based position and the gap to the leader in tenths of a
+second. Files are memory-mapped, so reading timeline[race, lap] touches a
+few dozen bytes wherever the lap is in the season.
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from game.engine import Season
+
+# Laps of every race, so a season is a fixed-width array
+LAPS = 50
+
+TIMELINE_DTYPE = np.dtype([('position', np.uint8), ('gap', np.uint16)])
+# Seconds per unit of the stored gap; gaps beyond GAP_MAX are clipped to it
+GAP_UNIT = 0.1
+GAP_RETIRED = np.iinfo(np.uint16).max
+GAP_MAX = GAP_RETIRED - 1
+
+# Spread of a car's gap per lap (seconds) where overtaking is easiest
+LAP_SIGMA = 0.8
+# Mean interval between consecutive finishers at the flag (seconds)
+MEAN_INTERVAL = 4.0
+# Spawn key component separating lap draws from the race draws (spawn key (race,))
+TIMELINE_STREAM = 1
+
+# Sorts retired cars behind every running one
+_RETIRED_KEY = 1e9
+
+def _race(seed: int, race: int, positions: np.ndarray, dnf: np.ndarray,
+          finishing_order: np.ndarray, overtaking_difficulty: int, laps: int) -> np.ndarray:
+    """Timeline of one race, indexed [lap, entry]"""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(race, TIMELINE_STREAM)))
+    entries = len(positions)
+
+    # Retirement laps: finishers run every lap, and of two retirements the
+    # one classified ahead (earlier in finishing_order) retires later
+    retired_from = np.full(entries, laps)
+    retirees = finishing_order[dnf[finishing_order]]
+    retired_from[retirees] = np.sort(rng.integers(1, laps, size=len(retirees)))[::-1]
+
+    # Final gaps grow along the finishing order; retirees' never show
+    final_gap = np.empty(entries)
+    final_gap[finishing_order] = np.cumsum(np.r_[0.0, rng.exponential(MEAN_INTERVAL, entries - 1)])
+
+    # Brownian bridge from 0 before lap 1 to final_gap after the last lap
+    sigma = LAP_SIGMA * (1 - 0.75 * overtaking_difficulty / 100)
+    walk = np.cumsum(rng.normal(0.0, sigma, (laps, entries)), axis=0)
+    t = (np.arange(laps) + 1)[:, None] / laps
+    deficit = t * final_gap + walk - t * walk[-1]
+
+    running = np.arange(laps)[:, None] < retired_from
+    # Retired cars keep the order they are classified in at the end
+    key = np.where(running, deficit, _RETIRED_KEY + positions)
+    order = np.argsort(key, axis=1)
+
+    timeline = np.empty((laps, entries), dtype=TIMELINE_DTYPE)
+    lap_positions = np.empty((laps, entries), dtype=np.uint8)
+    np.put_along_axis(lap_positions, order, np.arange(1, entries + 1, dtype=np.uint8), axis=1)
+    timeline['position'] = lap_positions
+
+    leader = np.where(running, deficit, np.inf).min(axis=1, keepdims=True)
+    gap = np.minimum(np.rint((deficit - leader) / GAP_UNIT), GAP_MAX)
+    timeline['gap'] = np.where(running, gap, GAP_RETIRED)
+    return timeline
+
+def build(season: Season, laps: int = LAPS) -> np.ndarray:
+    """The (race, lap, entry) timeline of a simulated season"""
+    races, entries = season.positions.shape
+    timeline = np.empty((races, laps, entries), dtype=TIMELINE_DTYPE)
+    for race, track in enumerate(season.tracks):
+        timeline[race] = _race(season.seed, race, season.positions[race], season.dnf[race],
+                               season.finishing_order[race], track.overtaking_difficulty, laps)
+    return timeline
+
+def timeline_path(data_dir: Path, game_id: str) -> Path:
+    if not game_id or '/' in game_id or '\\' in game_id or game_id.startswith('.'):
+        raise ValueError(f"Invalid game id {game_id!r}")
+    return Path(data_dir) / "timelines" / f"{game_id}.npy"
+
+def save(path: Path, timeline: np.ndarray) -> None:
+    """Write a timeline atomically so readers never map a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, timeline)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def load(path: Path) -> Optional[np.ndarray]:
+    """Memory-map a timeline read-only, None if it was never written"""
+    try:
+        return np.load(path, mmap_mode='r')
+    except FileNotFoundError:
+        return None
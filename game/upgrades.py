@@ -0,0 +1,59 @@
+from typing import Dict, Optional
+
+# Pre-season upgrade options, their costs and their effect on the performance model:
+#   car, skill, consistency  points added to the team's car performance and
+#                            to its drivers' skill and consistency
+#   reliability              multiplier on the chance of retiring from a race
+#   wet                      multiplier on the extra noise of wet, unpredictable tracks
+UPGRADES = {
+    "hydraulics": {
+        "cost": 8000000,
+        "description": "Improves car reliability and handling",
+        "modifiers": {"car": 0.5, "reliability": 0.75}
+    },
+    "aerodynamics": {
+        "cost": 15000000,
+        "description": "Better downforce and straight-line speed",
+        "modifiers": {"car": 2.0}
+    },
+    "tyres": {
+        "cost": 5000000,
+        "description": "Better tyre wear and grip",
+        "modifiers": {"car": 0.8, "consistency": 2.0}
+    },
+    "power_unit": {
+        "cost": 20000000,
+        "description": "More power and better fuel efficiency",
+        "modifiers": {"car": 2.5, "reliability": 1.1}
+    },
+    "brakes": {
+        "cost": 7000000,
+        "description": "Enhanced braking performance",
+        "modifiers": {"car": 1.0, "reliability": 0.9}
+    },
+    "driver_fitness": {
+        "cost": 3000000,
+        "description": "Improves driver stamina",
+        "modifiers": {"consistency": 3.0}
+    },
+    "driver_reactions": {
+        "cost": 4000000,
+        "description": "Faster response times",
+        "modifiers": {"skill": 1.5}
+    },
+    "driver_mentality": {
+        "cost": 2000000,
+        "description": "Better focus and race management",
+        "modifiers": {"consistency": 2.0, "wet": 0.85}
+    }
+}
+
+# Modifiers of a team without an upgrade
+NO_MODIFIERS = {"car": 0.0, "skill": 0.0, "consistency": 0.0, "reliability": 1.0, "wet": 1.0}
+
+def upgrade_modifiers(upgrade: Optional[str]) -> Dict[str, float]:
+    """Full set of performance modifiers of an upgrade (None for no upgrade)"""
+    modifiers = dict(NO_MODIFIERS)
+    if upgrade:
+        modifiers.update(UPGRADES[upgrade]["modifiers"])
+    return modifiers
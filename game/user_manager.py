@@ -1,35 +1,21 @@
-import json
 from pathlib import Path
 import logging
-from typing import Dict, Optional
+from typing import Optional
 import hashlib
+import os
 import secrets
+from game.storage import get_backend
+from utils import tracing
 
 logger = logging.getLogger(__name__)
 
+# Comma-separated usernames allowed to see the diagnostics page
+ADMIN_USERS_ENV_VAR = "F1_ADMIN_USERS"
+
 class UserManager:
     def __init__(self, data_dir: str = "data"):
         self.data_dir = Path(data_dir)
-        self.data_dir.mkdir(exist_ok=True)
-        self.users_file = self.data_dir / "users.json"
-        self._initialize_data_store()
-    
-    def _initialize_data_store(self):
-        if not self.users_file.exists():
-            with open(self.users_file, 'w') as f:
-                json.dump({}, f)
-
-    def _load_users(self) -> Dict:
-        try:
-            with open(self.users_file, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            logger.error("Error reading users file, returning empty dict")
-            return {}
-
-    def _save_users(self, users: Dict):
-        with open(self.users_file, 'w') as f:
-            json.dump(users, f, indent=2)
+        self.store = get_backend(data_dir)
 
     def _hash_password(self, password: str, salt: Optional[str] = None) -> tuple[str, str]:
         if not salt:
@@ -38,30 +24,32 @@ class UserManager:
         hashed = hashlib.sha256(salted.encode()).hexdigest()
         return hashed, salt
 
+    @tracing.traced()
     def create_user(self, username: str, password: str) -> bool:
         """Create a new user. Returns True if successful, False if username exists"""
-        users = self._load_users()
-        
-        if username in users:
+        if self.store.load_user(username):
             return False
             
         hashed_pw, salt = self._hash_password(password)
-        users[username] = {
+        return self.store.create_user(username, {
             'password_hash': hashed_pw,
             'salt': salt
-        }
-        
-        self._save_users(users)
-        return True
+        })
 
+    @tracing.traced()
     def verify_login(self, username: str, password: str) -> bool:
         """Verify login credentials. Returns True if valid."""
-        users = self._load_users()
+        user = self.store.load_user(username)
         
-        if username not in users:
+        if not user:
             return False
             
-        user = users[username]
         hashed_input, _ = self._hash_password(password, user['salt'])
         
-        return hashed_input == user['password_hash']
\ No newline at end of file
+        return hashed_input == user['password_hash']
+
+    @staticmethod
+    def is_admin(username: Optional[str]) -> bool:
+        """Whether a user is listed in F1_ADMIN_USERS"""
+        admins = {name.strip() for name in os.environ.get(ADMIN_USERS_ENV_VAR, "").split(",")}
+        return bool(username) and username in admins - {""}
\ No newline at end of file
@@ -1,7 +1,15 @@
 import streamlit as st
 from components.styles import get_css
+from game.user_manager import UserManager
+from utils import metrics, tracing
 from utils.state import init_session_state
-from views import welcome, new_game, login, game_start, results, select_drivers, pre_season
+from views import welcome, new_game, login, game_start, results, select_drivers, pre_season, diagnostics
+
+def render(page: str, view):
+    """Show a view, counting the routing decision and timing its show()"""
+    metrics.ROUTES.inc(page=page, decision="show")
+    with metrics.PAGE_RENDER_SECONDS.time(page=page):
+        view.show()
 
 def main():
     """
@@ -20,32 +28,48 @@ def main():
     # Initialize session state variables (like user login status, current page, etc.)
     init_session_state()
 
-    # Route to appropriate page based on session state
+    # Periodically write the process's metrics to disk (started once per process)
+    metrics.start_file_exporter()
+
+    # One trace per script run, so a click's manager and file calls can be grouped
+    with tracing.trace("script_run", user=st.session_state.user, page=st.session_state.page,
+                       game_id=st.session_state.game_id):
+        route()
+
+def route():
+    """Show the page of the session state, sending logged-out users to the login page"""
     if st.session_state.page == 'login':
         # Show login page if we're on the login page
-        login.show()
+        render('login', login)
     elif not st.session_state.is_logged_in:
         # If user isn't logged in, redirect to login page
+        metrics.ROUTES.inc(page=st.session_state.page, decision="redirect_login")
         st.session_state.page = 'login'
         st.rerun()
     elif st.session_state.page == 'welcome':
         # Show welcome page (list of games)
-        welcome.show()
+        render('welcome', welcome)
     elif st.session_state.page == 'new_game':
         # Show new game page (team selection)
-        new_game.show()
+        render('new_game', new_game)
     elif st.session_state.page == 'select_drivers':
         # Show driver selection page
-        select_drivers.show()
+        render('select_drivers', select_drivers)
     elif st.session_state.page == 'pre_season':
         # Show pre-season development page
-        pre_season.show()
+        render('pre_season', pre_season)
     elif st.session_state.page == 'game_start':
         # Show game start page (final lineup and start button)
-        game_start.show()
+        render('game_start', game_start)
     elif st.session_state.page == 'results':
         # Show results page (championship winners)
-        results.show()
+        render('results', results)
+    elif st.session_state.page == 'diagnostics' and UserManager.is_admin(st.session_state.user):
+        # Show store and page metrics, for admins only
+        render('diagnostics', diagnostics)
+    else:
+        # Unknown page, or diagnostics for a non-admin: nothing to show
+        metrics.ROUTES.inc(page=st.session_state.page, decision="not_found")
 
 # This is the entry point of the application
 if __name__ == "__main__":
@@ -0,0 +1,39 @@
+import pytest
+
+from game.sqlite_backend import SqliteBackend
+from game.storage import BACKEND_ENV_VAR, JsonBackend
+
+BACKENDS = {'json': JsonBackend, 'sqlite': SqliteBackend}
+
+@pytest.fixture(autouse=True)
+def no_tracing(monkeypatch):
+    # Keep sampled traces out of the repository's data directory
+    monkeypatch.setenv("F1_TRACE_SAMPLE_RATE", "0")
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend_kind(request, monkeypatch):
+    """Run a test once per storage backend, also selecting it for get_backend"""
+    monkeypatch.setenv(BACKEND_ENV_VAR, request.param)
+    return request.param
+
+@pytest.fixture
+def backend(backend_kind, tmp_path):
+    return BACKENDS[backend_kind](str(tmp_path))
+
+@pytest.fixture
+def make_game():
+    """Build a game dict the way GameManager.create_game does"""
+    def make(game_id, name="Test Game", created_at="2024-05-01T12:00:00", usernames=("alice",), **fields):
+        game = {
+            'id': game_id,
+            'name': name,
+            'created_at': created_at,
+            'phase': 'team_selection',
+            'creator': usernames[0],
+            'seed': 1,
+            'players': [{'username': username, 'slot': slot, 'team': None}
+                        for slot, username in enumerate(usernames)]
+        }
+        game.update(fields)
+        return game
+    return make
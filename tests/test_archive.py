@@ -0,0 +1,106 @@
+import gzip
+import json
+from datetime import datetime
+
+from game.archive import OFFSETS_FILE, GameArchive
+from game.storage import JsonBackend
+
+NOW = datetime.now().isoformat()
+
+def _archived(game_id, completed_at):
+    return {'id': game_id, 'name': f"Game {game_id}", 'created_at': completed_at,
+            'completed_at': completed_at, 'phase': 'finished', 'players': []}
+
+def _archive(tmp_path):
+    archive_dir = tmp_path / "archive"
+    archive_dir.mkdir()
+    return GameArchive(archive_dir)
+
+def _archive_view(tmp_path):
+    return GameArchive(tmp_path / "archive")
+
+def test_lookup_reads_hot_records_through_the_offset_index(tmp_path):
+    archive = _archive(tmp_path)
+    games = [_archived(f"g{i}", NOW) for i in range(5)]
+    for game in games:
+        archive.append(game)
+
+    for game in games:
+        assert archive.lookup(game['id']) == game
+    assert archive.lookup("missing") is None
+    # Another process's index reads offsets.log from the start
+    assert _archive_view(tmp_path).lookup("g3") == games[3]
+
+def test_compressed_partitions_hold_one_gzip_member_per_game(tmp_path):
+    archive = _archive(tmp_path)
+    old = [_archived(f"old{i}", f"2020-01-0{i + 1}T00:00:00") for i in range(3)]
+    recent = _archived("recent", NOW)
+    for game in old + [recent]:
+        archive.append(game)
+
+    assert archive.needs_compression()
+    archive.compress_cold_partitions()
+    assert not archive.needs_compression()
+    assert not archive.hot_path("2020-01").exists()
+
+    # Each record decompresses on its own from its recorded offset...
+    for game in old:
+        assert archive.offsets.lookup(game['id'])[0] == "2020-01.jsonl.gz"
+        assert archive.lookup(game['id']) == game
+    # ...and the file still reads as one gzip stream
+    with gzip.open(archive.cold_path("2020-01"), 'rt') as f:
+        assert [json.loads(line)['id'] for line in f] == ["old0", "old1", "old2"]
+    assert [game['id'] for game in archive.read_partition("2020-01")] == ["old2", "old1", "old0"]
+    assert [game['id'] for game in archive.iter_games()] == ["recent", "old2", "old1", "old0"]
+    assert archive.lookup("recent") == recent
+
+def test_late_game_in_a_compressed_month(tmp_path):
+    archive = _archive(tmp_path)
+    archive.append(_archived("early", "2020-01-01T00:00:00"))
+    archive.compress_cold_partitions()
+    late = _archived("late", "2020-01-31T00:00:00")
+    archive.append(late)
+
+    assert [game['id'] for game in archive.read_partition("2020-01")] == ["late", "early"]
+    archive.compress_cold_partitions()
+    assert archive.lookup("late") == late
+    assert [game['id'] for game in archive.read_partition("2020-01")] == ["late", "early"]
+
+def test_build_offsets_indexes_partitions_written_without_them(tmp_path):
+    archive = _archive(tmp_path)
+    cold = [_archived(f"cold{i}", f"2020-01-0{i + 1}T00:00:00") for i in range(3)]
+    hot = _archived("hot", NOW)
+    # Older versions wrote cold partitions as a single gzip stream
+    with gzip.open(archive.cold_path("2020-01"), 'wt') as f:
+        f.writelines(json.dumps(game) + "\n" for game in cold)
+    archive.hot_path(hot['completed_at'][:7]).write_text(json.dumps(hot) + "\n")
+
+    assert archive.needs_offsets()
+    assert archive.lookup("cold0") is None
+    archive.build_offsets()
+
+    assert not archive.needs_offsets()
+    for game in cold + [hot]:
+        assert archive.lookup(game['id']) == game
+
+def test_torn_offset_line_is_ignored(tmp_path):
+    archive = _archive(tmp_path)
+    game = _archived("g1", NOW)
+    archive.append(game)
+    with open(tmp_path / "archive" / OFFSETS_FILE, 'ab') as f:
+        f.write(b'{"id": "g2", "fi')
+
+    assert _archive_view(tmp_path).lookup("g1") == game
+    assert _archive_view(tmp_path).lookup("g2") is None
+
+def test_load_archived_game_from_compressed_partition(tmp_path, make_game):
+    backend = JsonBackend(str(tmp_path))
+    game = make_game("g1", created_at="2020-01-01T00:00:00", completed_at="2020-01-02T00:00:00")
+    backend.save_game(game, "create")
+    backend.archive_game(game)
+    backend.archive.compress_cold_partitions()
+
+    assert backend.load_archived_game("g1") == game
+    # Without the offset index the summary's month locates the partition
+    (tmp_path / "archive" / OFFSETS_FILE).unlink()
+    assert JsonBackend(str(tmp_path)).load_archived_game("g1") == game
@@ -0,0 +1,57 @@
+from game.storage import JsonBackend, get_backend
+
+def test_get_backend_is_shared_per_data_dir(tmp_path, monkeypatch, backend_kind):
+    monkeypatch.chdir(tmp_path)
+    backend = get_backend("data")
+
+    assert get_backend(str(tmp_path / "data")) is backend
+    assert get_backend("other") is not backend
+    assert type(backend).__name__.lower().startswith(backend_kind)
+
+def test_cache_sees_writes_of_another_process(tmp_path, make_game):
+    reader = JsonBackend(str(tmp_path))
+    writer = JsonBackend(str(tmp_path))
+    game = make_game("g1")
+    writer.save_game(game, "create")
+    assert reader.load_game("g1")['version'] == 1
+    assert reader.list_game_summaries()[1] == 1
+
+    game['phase'] = 'driver_selection'
+    writer.save_game(game, "phase")
+    writer.save_game(make_game("g2", created_at="2024-06-01T00:00:00"), "create")
+
+    assert reader.load_game("g1")['phase'] == 'driver_selection'
+    summaries, total = reader.list_game_summaries()
+    assert total == 2
+    assert summaries[0]['id'] == "g2"
+
+    writer.delete_game("g2")
+    assert reader.load_game("g2") is None
+    assert reader.list_game_summaries()[1] == 1
+
+def test_cache_sees_results_and_users_of_another_process(tmp_path):
+    reader = JsonBackend(str(tmp_path))
+    writer = JsonBackend(str(tmp_path))
+    assert reader.find_results() == []
+    assert reader.list_users() == {}
+
+    writer.save_result("g1", {
+        'timestamp': "2024-01-01T00:00:00",
+        'drivers_championship': {'driver': "Lando Norris", 'team': "McLaren", 'is_ai': True},
+        'constructors_championship': {'team': "McLaren", 'is_ai': True},
+        'players': []
+    })
+    writer.create_user("alice", {'password_hash': 'x'})
+
+    assert [r['game_id'] for r in reader.find_results(champion="Lando Norris")] == ["g1"]
+    assert reader.load_user("alice") == {'password_hash': 'x'}
+
+def test_cached_values_are_not_shared_with_callers(tmp_path, make_game):
+    backend = JsonBackend(str(tmp_path))
+    backend.save_game(make_game("g1"), "create")
+
+    backend.list_game_summaries()[0][0]['name'] = "Changed"
+    backend.list_users()['alice'] = {}
+
+    assert backend.list_game_summaries()[0][0]['name'] == "Test Game"
+    assert backend.list_users() == {}
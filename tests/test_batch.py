@@ -0,0 +1,77 @@
+import io
+import json
+
+import pytest
+
+from game import batch, roster
+
+LINEUP = {"McLaren": ["Lando Norris", "Oscar Piastri"]}
+
+def _write(tmp_path, spec):
+    path = tmp_path / "scenarios.json"
+    path.write_text(json.dumps(spec))
+    return str(path)
+
+def test_scenario_defaults_and_overrides(tmp_path):
+    scenarios = batch.load_scenarios(_write(tmp_path, {
+        'seasons': 300,
+        'seeds': [0, 3],
+        'scenarios': [
+            {},
+            {'name': "mclaren", 'lineups': LINEUP, 'upgrades': {"McLaren": "power_unit"},
+             'seeds': 7, 'batch_size': 50}
+        ]
+    }))
+
+    first, second = scenarios
+    assert (first.name, first.seeds, first.seasons, first.batch_size) == \
+        ("scenario_1", [0, 1, 2], 300, batch.DEFAULT_BATCH_SIZE)
+    assert first.total_seasons == 900
+    assert all(entry['is_ai'] for entry in first.entries)
+    assert (second.name, second.seeds, second.batch_size) == ("mclaren", [7], 50)
+    assert second.entries[:2] == [{'name': name, 'team': "McLaren", 'is_ai': False}
+                                  for name in LINEUP["McLaren"]]
+    assert len(second.entries) == 2 * len(roster.TEAMS)
+
+@pytest.mark.parametrize('scenario, message', [
+    ({'lineups': {"Minardi": ["Lando Norris", "Oscar Piastri"]}}, "unknown team"),
+    ({'lineups': {"McLaren": ["Lando Norris", "Nobody"]}}, "unknown drivers"),
+    ({'lineups': {"McLaren": ["Lando Norris"]}}, "exactly 2 drivers"),
+    ({'lineups': {"McLaren": ["Lando Norris", "Oscar Piastri"],
+                  "Ferrari": ["Lando Norris", "Charles Leclerc"]}}, "more than one team"),
+    ({'upgrades': {"Minardi": "tyres"}}, "unknown team"),
+    ({'upgrades': {"McLaren": "jet_engine"}}, "unknown upgrade"),
+    ({'seasons': 0}, "must be positive"),
+    ({'batch_size': 0}, "must be positive"),
+    ({'seeds': [5, 5]}, "Empty seed range"),
+    ({'seeds': "all"}, "Seeds must be"),
+])
+def test_invalid_scenarios_are_rejected(tmp_path, scenario, message):
+    with pytest.raises(ValueError, match=message):
+        batch.load_scenarios(_write(tmp_path, {'scenarios': [scenario]}))
+
+def _run(scenarios, workers):
+    csv_file, json_file = io.StringIO(), io.StringIO()
+    batch.run(scenarios, csv_file, json_file, workers=workers)
+    return csv_file.getvalue(), json_file.getvalue()
+
+def test_output_does_not_depend_on_the_worker_count(tmp_path):
+    scenarios = batch.load_scenarios(_write(tmp_path, {
+        'seasons': 250,
+        'seeds': [0, 2],
+        'batch_size': 100,
+        'scenarios': [{'name': "defaults"},
+                      {'name': "mclaren", 'lineups': LINEUP, 'upgrades': {"McLaren": "power_unit"}}]
+    }))
+
+    csv_text, json_text = _run(scenarios, workers=1)
+    assert _run(scenarios, workers=2) == (csv_text, json_text)
+
+    summaries = [json.loads(line) for line in json_text.splitlines()]
+    assert [summary['scenario'] for summary in summaries] == ["defaults", "mclaren"]
+    for summary in summaries:
+        assert summary['seasons'] == 500
+        assert sum(row['titles'] for row in summary['drivers']) == 500
+        assert sum(row['titles'] for row in summary['teams']) == 500
+    # Header plus one row per driver and team of each scenario
+    assert len(csv_text.splitlines()) == 1 + 2 * 3 * len(roster.TEAMS)
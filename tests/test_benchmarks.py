@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from benchmarks import run
+
+def _report(**medians):
+    return {'meta': {'storage_backend': "json"},
+            'benchmarks': {name: {'median_ms': median} for name, median in medians.items()}}
+
+@pytest.fixture
+def one_run(monkeypatch):
+    """Time every benchmark once, so the suite checks it runs rather than how fast"""
+    monkeypatch.setattr(run, "MIN_RUNS", 1)
+    monkeypatch.setattr(run, "MIN_SECONDS", 0)
+    monkeypatch.setattr(run, "MAX_RUNS", 1)
+
+def test_compare_reports_only_real_slowdowns():
+    baseline = _report(faster=1.0, within_tolerance=1.0, slower=1.0, noise=0.1)
+    current = _report(faster=0.5, within_tolerance=1.4, slower=2.0, noise=0.5, new=9.0)
+
+    regressions = run.compare(current, baseline, tolerance=0.5, min_delta_ms=0.5)
+    assert regressions == ["slower: 1.000 ms -> 2.000 ms (2.00x)"]
+
+def test_main_fails_on_a_regression(tmp_path, monkeypatch):
+    monkeypatch.setattr(run, "run", lambda sizes, data_root: _report(slower=2.0))
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(_report(slower=1.0)))
+
+    assert run.main(["--baseline", str(baseline)]) == 1
+    assert run.main(["--baseline", str(baseline), "--tolerance", "1.5"]) == 0
+
+def test_every_benchmark_runs_and_is_in_the_baseline(tmp_path, one_run):
+    output = tmp_path / "bench.json"
+    # Only whether the baseline can be compared against is checked here:
+    # one run per benchmark on a test machine says nothing about speed
+    status = run.main(["--sizes", "10", "--data-root", str(tmp_path / "data"), "--output", str(output),
+                       "--baseline", str(run.DEFAULT_BASELINE), "--tolerance", "1e9"])
+
+    assert status == 0
+    measured = json.loads(output.read_text())['benchmarks']
+    baseline = json.loads(run.DEFAULT_BASELINE.read_text())['benchmarks']
+    # A benchmark missing from the baseline is never checked for regressions
+    assert sorted(set(measured) - set(baseline)) == []
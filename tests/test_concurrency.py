@@ -0,0 +1,142 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from game.manager import GameManager
+from game.storage import ConflictError
+
+def test_stale_version_is_rejected(backend, make_game):
+    game = make_game("g1")
+    backend.save_game(game, "create", expected_version=0)
+    stale = dict(game)
+    game['phase'] = 'driver_selection'
+    backend.save_game(game, "phase", expected_version=1)
+
+    stale['name'] = "Renamed"
+    with pytest.raises(ConflictError):
+        backend.save_game(stale, "save", expected_version=1)
+    # The caller's copy keeps the version it was loaded at
+    assert stale['version'] == 1
+    assert backend.load_game("g1") == game
+
+def test_create_conflicts_with_an_existing_game(backend, make_game):
+    backend.save_game(make_game("g1"), "create", expected_version=0)
+
+    with pytest.raises(ConflictError):
+        backend.save_game(make_game("g1", name="Other"), "create", expected_version=0)
+    assert backend.load_game("g1")['name'] == "Test Game"
+
+def test_stale_archive_is_rejected(backend, make_game):
+    game = make_game("g1")
+    backend.save_game(game, "create", expected_version=0)
+    stale = dict(game, phase='finished', completed_at="2024-05-02T12:00:00")
+    game['phase'] = 'driver_selection'
+    backend.save_game(game, "phase", expected_version=1)
+
+    with pytest.raises(ConflictError):
+        backend.archive_game(stale, expected_version=1)
+    assert backend.load_game("g1") == game
+    assert backend.load_archived_game("g1") is None
+
+    backend.archive_game(dict(game, phase='finished'), expected_version=2)
+    assert backend.load_game("g1") is None
+    assert backend.load_archived_game("g1")['version'] == 3
+
+def test_archive_keeps_a_write_made_after_the_game_was_loaded(tmp_path, backend_kind):
+    manager = GameManager(str(tmp_path))
+    game = manager.create_game("Test Game", "alice")
+    stale = manager.get_game(game['id'])
+    manager.join_game(game['id'], "bob")
+
+    with manager.transaction(game['id'], stale) as tx:
+        tx.archive()
+
+    archived = manager.store.load_archived_game(game['id'])
+    assert [p['username'] for p in archived['players']] == ["alice", "bob"]
+    assert archived['phase'] == 'finished' and archived['completed_at']
+    assert manager.store.load_game(game['id']) is None
+
+def test_transaction_replays_its_mutations_after_a_conflict(tmp_path, backend_kind):
+    manager = GameManager(str(tmp_path))
+    game = manager.create_game("Test Game", "alice")
+    stale = manager.get_game(game['id'])
+    manager.join_game(game['id'], "bob")
+
+    with manager.transaction(game['id'], stale) as tx:
+        tx.join("carol")
+
+    assert [p['username'] for p in tx.game['players']] == ["alice", "bob", "carol"]
+    assert manager.get_game(game['id']) == tx.game
+    assert tx.game['version'] == 3
+
+def test_failed_mutation_writes_nothing(tmp_path, backend_kind):
+    manager = GameManager(str(tmp_path))
+    game = manager.create_game("Test Game", "alice")
+    manager.join_game(game['id'], "bob")
+    manager.select_team(game['id'], "alice", "McLaren")
+
+    with pytest.raises(ValueError):
+        manager.select_team(game['id'], "bob", "McLaren")
+    assert manager.get_game(game['id'])['version'] == 3
+
+def test_concurrent_joins_from_threads(tmp_path, backend_kind):
+    manager = GameManager(str(tmp_path))
+    game = manager.create_game("Test Game", "alice")
+    usernames = ["bob", "carol", "dave", "erin"]
+
+    threads = [threading.Thread(target=manager.join_game, args=(game['id'], username))
+               for username in usernames]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    players = manager.get_game(game['id'])['players']
+    assert sorted(p['username'] for p in players) == sorted(["alice"] + usernames)
+    assert sorted(p['slot'] for p in players) == list(range(5))
+
+def _join(data_dir, game_id, username):
+    GameManager(data_dir).join_game(game_id, username)
+
+def test_concurrent_joins_from_processes(tmp_path, backend_kind):
+    manager = GameManager(str(tmp_path))
+    game = manager.create_game("Test Game", "alice")
+    usernames = ["bob", "carol", "dave", "erin"]
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_join, args=(str(tmp_path), game['id'], username))
+                 for username in usernames]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * len(usernames)
+
+    players = manager.get_game(game['id'])['players']
+    assert sorted(p['username'] for p in players) == sorted(["alice"] + usernames)
+    assert sorted(p['slot'] for p in players) == list(range(5))
+
+def _create_users(data_dir, usernames, start, created):
+    store = GameManager(data_dir).store
+    start.wait()
+    created.put([username for username in usernames
+                 if store.create_user(username, {'password_hash': 'x'})])
+
+def test_concurrent_signups_from_processes_take_each_username_once(tmp_path, backend_kind):
+    usernames = [f"user{i}" for i in range(50)]
+    context = multiprocessing.get_context("spawn")
+    start, created = context.Event(), context.Queue()
+    processes = [context.Process(target=_create_users, args=(str(tmp_path), usernames, start, created))
+                 for _ in range(4)]
+    for process in processes:
+        process.start()
+    start.set()
+    results = [created.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * len(processes)
+
+    # Each username went to exactly one process, and no process's write was lost
+    assert sorted(username for result in results for username in result) == sorted(usernames)
+    assert sorted(GameManager(str(tmp_path)).store.list_users()) == sorted(usernames)
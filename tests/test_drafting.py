@@ -0,0 +1,91 @@
+import random
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from game import engine, roster
+from game.drafting import (DRIVER_RATINGS, affordable_pairs, best_pair, draft_lineups, pair_cost,
+                           pair_rating, season_entries)
+
+ALL_DRIVERS = frozenset(roster.DRIVERS.names)
+BUDGETS = sorted({team.budget for team in roster.TEAMS} | {16_000_000, 30_000_000, 60_000_000})
+
+def _available_sets():
+    rng = random.Random(0)
+    sets = [ALL_DRIVERS]
+    for size in (2, 3, 5, 8, 12):
+        sets.extend(frozenset(rng.sample(roster.DRIVERS.names, size)) for _ in range(5))
+    return sets
+
+def _brute_force(budget, available):
+    return [pair for pair in combinations(sorted(available), 2) if pair_cost(pair) <= budget]
+
+@pytest.mark.parametrize('budget', BUDGETS)
+def test_best_pair_matches_brute_force(budget):
+    for available in _available_sets():
+        pairs = _brute_force(budget, available)
+        best = best_pair(budget, available)
+        if not pairs:
+            assert best is None
+            continue
+        optimum = min(pairs, key=lambda pair: (-pair_rating(pair), pair_cost(pair)))
+        assert pair_cost(best) <= budget
+        assert set(best) <= available
+        assert pair_rating(best) == pytest.approx(pair_rating(optimum))
+        assert pair_cost(best) == pair_cost(optimum)
+
+@pytest.mark.parametrize('budget', BUDGETS)
+def test_affordable_pairs_match_brute_force(budget):
+    for available in _available_sets():
+        pairs = affordable_pairs(budget, available)
+        assert {frozenset(pair) for pair in pairs} == {frozenset(pair) for pair in _brute_force(budget, available)}
+        keys = [(-pair_rating(pair), pair_cost(pair)) for pair in pairs]
+        assert keys == sorted(keys)
+        if pairs:
+            assert pair_rating(pairs[0]) == pytest.approx(pair_rating(best_pair(budget, available)))
+
+def test_draft_lineups_are_disjoint_and_affordable():
+    teams = list(roster.TEAMS.names)
+    lineups = draft_lineups(teams, ALL_DRIVERS)
+
+    drafted = [name for pair in lineups.values() for name in pair]
+    assert list(lineups) == teams
+    assert len(drafted) == len(set(drafted)) == 2 * len(teams)
+    assert all(pair_cost(tuple(pair)) <= roster.TEAMS[team].budget for team, pair in lineups.items())
+
+def test_weakest_car_drafts_first():
+    lineups = draft_lineups(list(roster.TEAMS.names), ALL_DRIVERS)
+    weakest = min(roster.TEAMS, key=lambda team: team.car_performance).name
+    strongest = max(roster.TEAMS, key=lambda team: team.car_performance).name
+
+    assert max(ALL_DRIVERS, key=DRIVER_RATINGS.get) in lineups[weakest]
+    best_two = sorted(ALL_DRIVERS, key=DRIVER_RATINGS.get)[-2:]
+    assert not set(best_two) & set(lineups[strongest])
+
+def test_ai_drafts_do_not_monopolize_titles():
+    entries = season_entries({})
+    drivers, _ = engine.simulate_championships(entries, 5000, rng=np.random.default_rng(0))
+
+    team_titles = {}
+    for entry, titles in zip(entries, np.bincount(drivers, minlength=len(entries))):
+        team_titles[entry['team']] = team_titles.get(entry['team'], 0) + titles
+    # The best car still wins most often, but its drivers must not take
+    # (nearly) every title as they did when it drafted the best pair
+    assert max(team_titles.values()) / 5000 < 0.75
+    assert sum(share > 0.02 * 5000 for share in team_titles.values()) >= 3
+
+def test_draft_runs_out_of_drivers():
+    with pytest.raises(ValueError):
+        draft_lineups(list(roster.TEAMS.names), frozenset(roster.DRIVERS.names[:3]))
+
+def test_season_entries_put_players_first():
+    lineups = {'McLaren': ['Lando Norris', 'Oscar Piastri']}
+    entries = season_entries(lineups, {'McLaren', 'Ferrari'})
+
+    assert entries[:2] == [{'name': 'Lando Norris', 'team': 'McLaren', 'is_ai': False},
+                           {'name': 'Oscar Piastri', 'team': 'McLaren', 'is_ai': False}]
+    ai_teams = {entry['team'] for entry in entries[2:]}
+    assert all(entry['is_ai'] for entry in entries[2:])
+    assert ai_teams == set(roster.TEAMS.names) - {'McLaren', 'Ferrari'}
+    assert len({entry['name'] for entry in entries}) == len(entries)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from game import engine
+from game.drafting import season_entries
+
+@pytest.fixture(scope="module")
+def entries():
+    """A full grid of AI teams"""
+    return season_entries({})
+
+def test_race_results_are_valid_finishing_orders(entries):
+    season = engine.simulate_season(entries, seed=42)
+    races = len(engine.TRACKS)
+
+    assert season.positions.shape == (races, len(entries))
+    for race in range(races):
+        assert sorted(season.positions[race]) == list(range(len(entries)))
+        assert (season.positions[race][season.finishing_order[race]] == np.arange(len(entries))).all()
+        # Retirements are classified behind every finisher
+        finishers = (~season.dnf[race]).sum()
+        assert season.dnf[race][season.finishing_order[race][finishers:]].all()
+
+    classified = ~season.dnf & (season.positions < len(engine.POINTS))
+    expected = np.where(classified, engine.POINTS[np.minimum(season.positions, len(engine.POINTS) - 1)], 0)
+    assert (season.points == expected).all()
+    assert (season.driver_points == season.points.sum(axis=0)).all()
+    assert season.constructor_points.sum() == season.driver_points.sum()
+
+def test_rankings_follow_points(entries):
+    season = engine.simulate_season(entries, seed=42)
+
+    ranked_points = season.driver_points[season.driver_ranking()]
+    assert (np.diff(ranked_points) <= 0).all()
+    ranked_constructors = season.constructor_points[season.constructor_ranking()]
+    assert (np.diff(ranked_constructors) <= 0).all()
+
+def test_streamed_season_matches_the_batch_season(entries):
+    season = engine.simulate_season(entries, seed=7)
+    events = list(engine.race_events(entries, seed=7))
+    streamed = engine.season_from_events(7, entries, events)
+
+    for field in ('finishing_order', 'positions', 'dnf', 'points', 'driver_points', 'constructor_points'):
+        assert (getattr(streamed, field) == getattr(season, field)).all(), field
+    assert (events[-1].driver_points == season.driver_points).all()
+    assert (events[-1].standings == np.argsort(season.driver_ranking())).all()
+
+def test_season_totals_shapes_and_champions(entries):
+    points, wins, podiums, dnfs = engine.season_totals(entries, 50, rng=np.random.default_rng(0))
+
+    assert points.shape == wins.shape == podiums.shape == dnfs.shape == (50, len(entries))
+    assert (wins.sum(axis=1) == len(engine.TRACKS)).all()
+    assert (podiums.sum(axis=1) == 3 * len(engine.TRACKS)).all()
+
+    drivers, constructors = engine.champions(entries, points, wins, podiums)
+    assert (points[np.arange(50), drivers] == points.max(axis=1)).all()
+    assert constructors.max() < len(engine.entry_teams(entries)[0])
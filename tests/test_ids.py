@@ -0,0 +1,35 @@
+import re
+import threading
+
+from game.ids import COUNTER_FILE, GameIdAllocator
+
+def test_ids_are_unique_across_threads_and_allocators(tmp_path):
+    ids = []
+    lock = threading.Lock()
+
+    def allocate():
+        allocator = GameIdAllocator(str(tmp_path))
+        for _ in range(25):
+            game_id = allocator.next_id()
+            with lock:
+                ids.append(game_id)
+
+    threads = [threading.Thread(target=allocate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == 200
+    assert all(re.fullmatch(r"\d{14}_\d+", game_id) for game_id in ids)
+
+def test_clock_going_backwards_reuses_the_last_timestamp(tmp_path):
+    (tmp_path / COUNTER_FILE).write_text("29991231235959_3")
+
+    assert GameIdAllocator(str(tmp_path)).next_id() == "29991231235959_4"
+    assert (tmp_path / COUNTER_FILE).read_text() == "29991231235959_4"
+
+def test_new_timestamp_restarts_the_suffix(tmp_path):
+    (tmp_path / COUNTER_FILE).write_text("20000101000000_7")
+
+    assert GameIdAllocator(str(tmp_path)).next_id().endswith("_1")
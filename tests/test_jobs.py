@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from game.jobs import JobRunner, JobStatus
+from game.manager import GameManager
+
+def _wait(job, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, f"job {job.id} still {job.status}"
+        time.sleep(0.01)
+    return job
+
+@pytest.fixture
+def game(tmp_path):
+    return GameManager(str(tmp_path)).create_game("Test Game", "alice")
+
+def test_players_of_a_game_share_its_season_job(tmp_path, game):
+    runner = JobRunner(str(tmp_path), reveal_seconds=0)
+    job = runner.submit_season(game['id'], game['players'])
+
+    assert runner.submit_season(game['id'], game['players']) is job
+    _wait(job)
+    assert job.status == JobStatus.DONE
+    assert job.rounds_done == job.rounds
+    assert [race['round'] for race in job.races] == list(range(1, job.rounds + 1))
+    assert job.races[-1] is job.latest_race
+    assert job.result['drivers_championship']
+    assert runner.job_for_game(game['id']) is job
+
+def test_season_already_run_elsewhere_is_not_run_again(tmp_path, game):
+    # Another server process on the same data directory
+    first = _wait(JobRunner(str(tmp_path), reveal_seconds=0).submit_season(game['id'], game['players']))
+    second = _wait(JobRunner(str(tmp_path), reveal_seconds=0).submit_season(game['id'], game['players']))
+
+    assert second.status == JobStatus.DONE
+    assert second.result == first.result
+    assert second.latest_race is None
+    assert second.races == []
+
+def test_cancelled_season_saves_nothing(tmp_path, game):
+    runner = JobRunner(str(tmp_path), reveal_seconds=5)
+    job = runner.submit_season(game['id'], game['players'])
+    while job.rounds_done == 0:
+        time.sleep(0.01)
+
+    assert runner.cancel(job.id)
+    _wait(job)
+    assert job.status == JobStatus.CANCELLED
+    assert GameManager(str(tmp_path)).store.load_result(game['id']) is None
+
+    retry = runner.submit_season(game['id'], game['players'])
+    assert retry is not job
+    runner.cancel(retry.id)
+    _wait(retry)
+
+def test_odds_jobs_are_shared_per_game_version(tmp_path, game):
+    runner = JobRunner(str(tmp_path))
+    job = runner.submit_odds(game['id'], 1, 200, 0.5)
+
+    assert runner.submit_odds(game['id'], 1, 200, 0.5) is job
+    assert runner.submit_odds(game['id'], 2, 200, 0.5) is not job
+    _wait(job, timeout=120)
+    assert job.status == JobStatus.DONE
+    assert 0 < job.result['seasons'] <= 200
+
+def test_failed_odds_job_is_submitted_again(tmp_path):
+    runner = JobRunner(str(tmp_path))
+    job = _wait(runner.submit_odds("missing", 1, 200, 0.5))
+    assert job.status == JobStatus.FAILED
+
+    retry = runner.submit_odds("missing", 1, 200, 0.5)
+    assert retry is not job
+    _wait(retry)
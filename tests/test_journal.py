@@ -0,0 +1,120 @@
+import threading
+
+import pytest
+
+from game import journal
+from game.sqlite_backend import SqliteBackend
+from game.storage import JsonBackend
+
+def test_torn_record_is_skipped_and_next_append_starts_a_new_line(tmp_path):
+    path = tmp_path / "game.log"
+    with journal.locked(path) as f:
+        journal.append(f, {'n': 1})
+        # A crash in the middle of an append
+        f.write(b'{"n": 2, "pla')
+        f.flush()
+        journal.append(f, {'n': 3})
+        assert journal.read(f) == [{'n': 1}, {'n': 3}]
+
+def test_truncate_empties_the_journal(tmp_path):
+    path = tmp_path / "game.log"
+    with journal.locked(path) as f:
+        journal.append(f, {'n': 1})
+        journal.truncate(f)
+        assert journal.read(f) == []
+        assert journal.append(f, {'n': 2}) == len(b'{"n":2}\n')
+
+def test_locked_without_create(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        with journal.locked(tmp_path / "missing.log", create=False):
+            pass
+
+def test_mutations_are_journaled_and_compacted(tmp_path, make_game):
+    backend = JsonBackend(str(tmp_path))
+    game = make_game("g1")
+    backend.save_game(game, "create")
+    game['phase'] = 'driver_selection'
+    backend.save_game(game, "phase")
+    del game['seed']
+    backend.save_game(game, "save")
+
+    log = tmp_path / "games" / "g1.log"
+    assert len(log.read_bytes().splitlines()) == 2
+    # Another process reads the snapshot plus the journal
+    assert JsonBackend(str(tmp_path)).load_game("g1") == game
+
+    backend.compact_game("g1")
+    assert log.read_bytes() == b""
+    assert backend.load_game("g1") == game
+    assert JsonBackend(str(tmp_path)).load_game("g1") == game
+
+def test_torn_game_journal_loses_only_the_last_write(tmp_path, make_game):
+    backend = JsonBackend(str(tmp_path))
+    game = make_game("g1")
+    backend.save_game(game, "create")
+    game['phase'] = 'driver_selection'
+    backend.save_game(game, "phase")
+    with open(tmp_path / "games" / "g1.log", 'ab') as f:
+        f.write(b'{"set": {"phase": "pre_')
+
+    reopened = JsonBackend(str(tmp_path))
+    loaded = reopened.load_game("g1")
+    assert loaded == game
+
+    loaded['phase'] = 'pre_season'
+    reopened.save_game(loaded, "phase", expected_version=2)
+    assert JsonBackend(str(tmp_path)).load_game("g1")['phase'] == 'pre_season'
+
+def test_delete_and_archive_leave_no_files_behind(tmp_path, make_game):
+    backend = JsonBackend(str(tmp_path))
+    for game_id in ("g1", "g2"):
+        game = make_game(game_id, completed_at="2024-05-02T12:00:00")
+        backend.save_game(game, "create")
+        game['phase'] = 'driver_selection'
+        backend.save_game(game, "phase")
+
+    assert backend.delete_game("g1")
+    backend.archive_game(backend.load_game("g2"))
+    assert not backend.delete_game("missing")
+    with pytest.raises(ValueError):
+        backend.save_game(make_game("missing"), "phase")
+
+    assert sorted(path.name for path in (tmp_path / "games").iterdir()) == ["index.json", "index.log"]
+
+def test_writer_waiting_on_a_deleted_game_sees_the_delete(tmp_path, make_game):
+    backend = JsonBackend(str(tmp_path))
+    game = make_game("g1")
+    backend.save_game(game, "create")
+    errors = []
+
+    def save():
+        try:
+            backend.save_game(dict(game, phase='driver_selection'), "phase")
+        except ValueError as e:
+            errors.append(e)
+
+    # Hold the game's lock as delete_game does while a writer queues up on it
+    with backend._locked_journal("g1"):
+        writer = threading.Thread(target=save)
+        writer.start()
+        writer.join(0.2)
+        backend._remove_game("g1")
+    writer.join()
+
+    assert len(errors) == 1
+    assert backend.load_game("g1") is None
+    assert not (tmp_path / "games" / "g1.log").exists()
+
+@pytest.mark.parametrize('backend_class', [JsonBackend, SqliteBackend])
+def test_late_save_does_not_resurrect_a_deleted_game(tmp_path, make_game, backend_class):
+    backend = backend_class(str(tmp_path))
+    game = make_game("g1")
+    backend.save_game(game, "create")
+    backend.delete_game("g1")
+
+    game['phase'] = 'driver_selection'
+    with pytest.raises(ValueError):
+        backend.save_game(game, "phase", expected_version=1)
+    assert game['version'] == 1
+    assert backend.load_game("g1") is None
+    assert backend.list_game_summaries() == ([], 0)
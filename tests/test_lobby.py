@@ -0,0 +1,57 @@
+import pytest
+
+from game.data import MAX_PLAYERS
+from game.manager import GameManager
+from game.storage import matches_lobby_filter
+
+@pytest.fixture
+def manager(tmp_path, backend_kind, make_game):
+    """A lobby of 25 games created a day apart; every third one is full"""
+    manager = GameManager(str(tmp_path))
+    for day in range(25):
+        usernames = [f"player{i}" for i in range(MAX_PLAYERS if day % 3 == 0 else 1)]
+        name = f"{'Monza' if day % 2 else 'Monaco'} league {day}"
+        manager.store.save_game(make_game(f"g{day:02d}", name=name, usernames=usernames,
+                                          created_at=f"2024-01-{day + 1:02d}T00:00:00"), "create")
+    return manager
+
+def test_pages_are_newest_first(manager):
+    first, total = manager.get_game_summaries(page=0, page_size=10)
+    last, _ = manager.get_game_summaries(page=2, page_size=10)
+
+    assert total == 25
+    assert [s['id'] for s in first] == [f"g{day:02d}" for day in range(24, 14, -1)]
+    assert [s['id'] for s in last] == [f"g{day:02d}" for day in range(4, -1, -1)]
+    assert manager.get_game_summaries(page=3, page_size=10) == ([], 25)
+
+def test_search_is_a_case_insensitive_name_substring(manager):
+    summaries, total = manager.get_game_summaries(page_size=50, search="MONZA")
+
+    assert total == 12
+    assert all("Monza" in s['name'] for s in summaries)
+    assert manager.get_game_summaries(search="league 7")[1] == 1
+    assert manager.get_game_summaries(search="Silverstone") == ([], 0)
+
+def test_open_only_keeps_games_with_a_free_slot(manager):
+    summaries, total = manager.get_game_summaries(page_size=50, open_only=True)
+
+    assert total == 16
+    assert all(s['open_slots'] > 0 for s in summaries)
+    summaries, total = manager.get_game_summaries(page_size=5, search="monaco", open_only=True)
+    assert total == 8
+    assert len(summaries) == 5
+
+def test_summaries_follow_joins_and_deletes(manager):
+    manager.join_game("g01", "newcomer")
+    summary = next(s for s in manager.get_game_summaries(page_size=50)[0] if s['id'] == "g01")
+    assert summary['player_count'] == 2
+
+    manager.delete_game("g01")
+    assert manager.get_game_summaries(page_size=50, search="league 1")[1] == 10
+
+def test_filter_on_summaries_without_open_slots():
+    # Summaries written before open_slots existed only carry the player count
+    summary = {'name': "Old game", 'player_count': MAX_PLAYERS}
+
+    assert not matches_lobby_filter(summary, "", True)
+    assert matches_lobby_filter(summary, "old", False)
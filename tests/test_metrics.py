@@ -0,0 +1,62 @@
+import pytest
+
+from utils import metrics
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty process-wide registry, so only the test's metrics are rendered"""
+    monkeypatch.setattr(metrics, "_registry", {})
+
+def test_counter_renders_one_line_per_label_set():
+    requests = metrics.Counter("f1_test_total", "Test counter")
+    requests.inc(page="welcome")
+    requests.inc(2.5, page="welcome")
+    requests.inc(page='say "hi"\\\n')
+
+    assert requests.render() == [
+        'f1_test_total{page="welcome"} 3.5',
+        'f1_test_total{page="say \\"hi\\"\\\\\\n"} 1',
+    ]
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    sizes = metrics.Histogram("f1_test_bytes", "Test histogram", buckets=(10, 100))
+    # A value on a bound belongs to that bucket; above the last one only to +Inf
+    for value in (5, 10, 50, 1000):
+        sizes.observe(value, backend="json")
+
+    assert sizes.render() == [
+        'f1_test_bytes_bucket{backend="json",le="10"} 2',
+        'f1_test_bytes_bucket{backend="json",le="100"} 3',
+        'f1_test_bytes_bucket{backend="json",le="+Inf"} 4',
+        'f1_test_bytes_sum{backend="json"} 1065',
+        'f1_test_bytes_count{backend="json"} 4',
+    ]
+    sample = sizes.samples()[(("backend", "json"),)]
+    assert sizes.quantile(sample, 0.5) == 10
+    assert sizes.quantile(sample, 1.0) is None
+
+def test_render_adds_help_and_type_and_sorts_by_name(registry):
+    metrics.histogram("f1_test_seconds", "Test timings", buckets=(1,)).observe(0.5)
+    metrics.counter("f1_test_calls_total", "Test calls").inc()
+    # Registering a name again returns the existing metric
+    metrics.counter("f1_test_calls_total", "Other help").inc()
+
+    assert metrics.render() == "\n".join([
+        "# HELP f1_test_calls_total Test calls",
+        "# TYPE f1_test_calls_total counter",
+        "f1_test_calls_total 2",
+        "# HELP f1_test_seconds Test timings",
+        "# TYPE f1_test_seconds histogram",
+        'f1_test_seconds_bucket{le="1"} 1',
+        'f1_test_seconds_bucket{le="+Inf"} 1',
+        "f1_test_seconds_sum 0.5",
+        "f1_test_seconds_count 1",
+    ]) + "\n"
+
+def test_write_file_replaces_the_file_whole(registry, tmp_path):
+    metrics.counter("f1_test_total", "Test counter").inc()
+    path = tmp_path / "metrics" / "app.prom"
+
+    metrics.write_file(path)
+    assert path.read_text() == metrics.render()
+    assert [p.name for p in path.parent.iterdir()] == ["app.prom"]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from game.manager import GameManager
+from game.mechanics import GameMechanics, wilson_interval
+
+Z95 = 1.959963984540054
+
+def test_wilson_interval_contains_the_estimate():
+    successes = np.array([0, 1, 50, 99, 100])
+    low, high = wilson_interval(successes, 100, Z95)
+
+    assert (low <= successes / 100).all() and (successes / 100 <= high).all()
+    assert (low >= 0).all() and (high <= 1).all()
+    assert low[0] == 0 and high[-1] == pytest.approx(1)
+    # Symmetric around one half
+    assert low[2] == pytest.approx(1 - high[2])
+
+def test_wilson_interval_narrows_with_more_trials():
+    widths = [np.subtract(*wilson_interval(np.array([n // 4]), n, Z95)[::-1])[0]
+              for n in (100, 1000, 10000)]
+
+    assert widths[0] > widths[1] > widths[2]
+    # Close to the normal approximation once n is large
+    assert widths[2] / 2 == pytest.approx(Z95 * np.sqrt(0.25 * 0.75 / 10000), rel=0.01)
+
+@pytest.fixture
+def game(tmp_path):
+    return GameManager(str(tmp_path)).create_game("Test Game", "alice")
+
+def test_odds_are_distributions(tmp_path, game):
+    odds = GameMechanics(str(tmp_path)).championship_odds(game['id'], 500, seed=1, batch_size=200,
+                                                          processes=False)
+
+    assert odds['seasons'] == 500
+    for rows in (odds['drivers'], odds['constructors']):
+        assert sum(row['probability'] for row in rows) == pytest.approx(1)
+        assert all(row['low'] <= row['probability'] <= row['high'] for row in rows)
+        probabilities = [row['probability'] for row in rows]
+        assert probabilities == sorted(probabilities, reverse=True)
+
+def test_odds_are_reproducible_from_a_seed(tmp_path, game):
+    mechanics = GameMechanics(str(tmp_path))
+    first = mechanics.championship_odds(game['id'], 300, seed=5, batch_size=100, processes=False)
+    second = mechanics.championship_odds(game['id'], 300, seed=5, batch_size=100, processes=False)
+
+    assert first == second
+
+def test_tolerance_stops_early(tmp_path, game):
+    odds = GameMechanics(str(tmp_path)).championship_odds(game['id'], 20_000, tolerance=0.1, seed=1,
+                                                          batch_size=100, processes=False)
+
+    assert odds['converged']
+    assert odds['seasons'] < 20_000
+    assert all((row['high'] - row['low']) / 2 <= 0.1 for row in odds['drivers'])
+
+@pytest.mark.parametrize('seasons, batch_size', [(0, 100), (-1, 100), (100, 0)])
+def test_empty_estimates_are_rejected(tmp_path, game, seasons, batch_size):
+    with pytest.raises(ValueError):
+        GameMechanics(str(tmp_path)).championship_odds(game['id'], seasons, batch_size=batch_size)
@@ -0,0 +1,65 @@
+from itertools import permutations
+
+import pytest
+
+from game import roster
+from game.data import TRACKS
+from game.drafting import season_entries
+from game.performance import MATRIX_CACHE_SIZE, MatrixCache
+
+@pytest.fixture(scope="module")
+def entries():
+    return season_entries({})
+
+def _lineups(count):
+    """Distinct two-driver lineups of one team"""
+    team = roster.TEAMS.names[0]
+    pairs = permutations(roster.DRIVERS.names, 2)
+    return [[{'name': first, 'team': team}, {'name': second, 'team': team}]
+            for first, second in (next(pairs) for _ in range(count))]
+
+def test_cache_hit_returns_the_same_read_only_arrays(entries):
+    cache = MatrixCache()
+    matrix = cache.get(entries)
+    # An equal lineup built separately hits the same entry
+    again = cache.get([dict(entry) for entry in entries])
+
+    assert again is matrix
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert matrix['pace'].shape == (len(TRACKS), len(entries))
+    for array in matrix.values():
+        assert not array.flags.writeable
+    with pytest.raises(ValueError):
+        matrix['pace'][0, 0] = 0
+
+def test_other_upgrades_lineups_and_tracks_miss_the_cache(entries):
+    cache = MatrixCache()
+    matrix = cache.get(entries)
+    team = entries[0]['team']
+
+    upgraded = cache.get(entries, {team: 'power_unit'})
+    other_upgrade = cache.get(entries, {team: 'tyres'})
+    reordered = cache.get(entries[::-1])
+    fewer_tracks = cache.get(entries, tracks=TRACKS[:5])
+
+    assert cache.misses == 5 and cache.hits == 0
+    assert (upgraded['pace'][:, 0] > matrix['pace'][:, 0]).all()
+    assert (upgraded['pace'][:, -1] == matrix['pace'][:, -1]).all()
+    assert not (other_upgrade['pace'] == upgraded['pace']).all()
+    assert (reordered['pace'] == matrix['pace'][:, ::-1]).all()
+    assert fewer_tracks['pace'].shape == (5, len(entries))
+
+def test_least_recently_used_lineup_is_evicted_past_the_cache_size():
+    cache = MatrixCache()
+    lineups = _lineups(MATRIX_CACHE_SIZE + 1)
+    for lineup in lineups[:MATRIX_CACHE_SIZE]:
+        cache.get(lineup)
+    # Using the oldest lineup again makes the second one the least recently used
+    first = cache.get(lineups[0])
+    cache.get(lineups[MATRIX_CACHE_SIZE])
+    assert cache.misses == MATRIX_CACHE_SIZE + 1
+
+    assert cache.get(lineups[0]) is first
+    assert cache.misses == MATRIX_CACHE_SIZE + 1
+    cache.get(lineups[1])
+    assert cache.misses == MATRIX_CACHE_SIZE + 2
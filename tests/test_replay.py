@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from game import engine, timeline
+from game.drafting import season_entries
+from game.manager import GameManager
+from game.mechanics import GameMechanics
+
+@pytest.fixture(scope="module")
+def entries():
+    return season_entries({})
+
+def test_same_seed_same_season(entries):
+    first = engine.simulate_season(entries, seed=1234)
+    second = engine.simulate_season(entries, seed=1234)
+    other = engine.simulate_season(entries, seed=1235)
+
+    assert (first.positions == second.positions).all()
+    assert (first.dnf == second.dnf).all()
+    assert not (first.positions == other.positions).all()
+
+def test_single_race_replay_matches_the_season(entries):
+    season = engine.simulate_season(entries, seed=1234)
+
+    for race in (0, 7, len(engine.TRACKS) - 1):
+        finishing_order, positions, dnf, points = engine.simulate_race(entries, race, 1234)
+        assert (finishing_order == season.finishing_order[race]).all()
+        assert (positions == season.positions[race]).all()
+        assert (dnf == season.dnf[race]).all()
+        assert (points == season.points[race]).all()
+
+def test_upgrades_are_part_of_the_replay(entries):
+    upgrades = {entries[0]['team']: 'hydraulics'}
+    upgraded = engine.simulate_season(entries, seed=99, upgrades=upgrades)
+    _, positions, _, _ = engine.simulate_race(entries, 3, 99, upgrades=upgrades)
+
+    assert (positions == upgraded.positions[3]).all()
+
+def test_stored_result_replays_exactly(tmp_path):
+    manager = GameManager(str(tmp_path))
+    mechanics = GameMechanics(str(tmp_path))
+    game = manager.create_game("Test Game", "alice")
+    result = mechanics.simulate_season(game['id'], game['players'])
+
+    stored = mechanics.get_game_results(game['id'])
+    assert stored['seed'] == game['seed']
+    assert 'races' not in stored
+
+    season = mechanics.replay_season(stored)
+    assert [season.entries[i]['name'] for i in season.driver_ranking()] == \
+        [row['driver'] for row in result['driver_standings']]
+    races = mechanics.get_race_results(game['id'])
+    assert len(races) == len(engine.TRACKS)
+    assert races[0]['finishing_order'][0] == season.entries[season.finishing_order[0][0]]['name']
+
+    # The saved lap-by-lap timeline is the one rebuilt from the seed
+    laps = mechanics.race_timeline(game['id'])
+    assert (np.asarray(laps) == timeline.build(season)).all()
+
+def test_replay_refuses_other_engine_versions(tmp_path):
+    result = {'engine_version': engine.ENGINE_VERSION - 1, 'seed': 1, 'entries': []}
+
+    with pytest.raises(ValueError):
+        GameMechanics(str(tmp_path)).replay_season(result)
@@ -0,0 +1,46 @@
+from collections import namedtuple
+
+import pytest
+
+from game import data, roster
+
+CATALOGS = [
+    (roster.TEAMS, data.TEAMS, ('car_performance', 'budget')),
+    (roster.DRIVERS, data.DRIVERS, ('skill', 'consistency', 'price')),
+    (roster.TRACKS, data.TRACKS, ('difficulty', 'weather_impact', 'overtaking_difficulty')),
+]
+
+@pytest.mark.parametrize('catalog, records, columns', CATALOGS)
+def test_name_index_follows_data_order(catalog, records, columns):
+    assert len(catalog) == len(records)
+    assert catalog.names == tuple(record.name for record in records)
+    for row, record in enumerate(records):
+        assert catalog.index[record.name] == row
+        assert catalog[record.name] is catalog.records[row]
+        assert record.name in catalog
+    assert "Nobody" not in catalog
+
+@pytest.mark.parametrize('catalog, records, columns', CATALOGS)
+def test_columns_match_data(catalog, records, columns):
+    assert sorted(catalog.columns) == sorted(columns)
+    for column in columns:
+        values = catalog.columns[column]
+        assert values.tolist() == [getattr(record, column) for record in records]
+        with pytest.raises(ValueError):
+            values[0] = 0
+
+def test_lookups_gather_in_the_order_given():
+    names = [data.DRIVERS[3].name, data.DRIVERS[0].name, data.DRIVERS[3].name]
+
+    assert roster.DRIVERS.indices(names).tolist() == [3, 0, 3]
+    assert roster.DRIVERS.column('price', names).tolist() == \
+        [data.DRIVERS[3].price, data.DRIVERS[0].price, data.DRIVERS[3].price]
+    assert roster.DRIVERS.indices([]).tolist() == []
+    with pytest.raises(KeyError):
+        roster.DRIVERS.indices(["Nobody"])
+
+def test_duplicate_names_are_rejected():
+    Record = namedtuple('Record', 'name value')
+
+    with pytest.raises(ValueError):
+        roster.Catalog([Record("a", 1), Record("a", 2)], ('value',))
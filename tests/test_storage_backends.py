@@ -0,0 +1,99 @@
+"""Behaviour every StorageBackend shares, run against the JSON and SQLite backends"""
+from game.sqlite_backend import SqliteBackend
+from game.storage import JsonBackend
+
+def _result(champion, team, usernames, timestamp):
+    return {
+        'timestamp': timestamp,
+        'drivers_championship': {'driver': champion, 'team': team, 'is_ai': False},
+        'constructors_championship': {'team': team, 'is_ai': False},
+        'players': [{'username': username, 'team': team} for username in usernames]
+    }
+
+def test_save_and_load_game(backend, make_game):
+    game = make_game("g1")
+    backend.save_game(game, "create")
+
+    assert game['version'] == 1
+    assert backend.load_game("g1") == game
+    assert backend.load_game("missing") is None
+
+def test_save_bumps_version_and_keeps_changes(backend, make_game):
+    game = make_game("g1")
+    backend.save_game(game, "create")
+    game['players'].append({'username': 'bob', 'slot': 1, 'team': None})
+    game['phase'] = 'driver_selection'
+    backend.save_game(game, "join")
+
+    loaded = backend.load_game("g1")
+    assert loaded['version'] == 2
+    assert [p['username'] for p in loaded['players']] == ['alice', 'bob']
+    assert loaded['phase'] == 'driver_selection'
+
+def test_loaded_games_are_copies(backend, make_game):
+    backend.save_game(make_game("g1"), "create")
+    backend.load_game("g1")['players'].clear()
+
+    assert len(backend.load_game("g1")['players']) == 1
+
+def test_delete_game(backend, make_game):
+    backend.save_game(make_game("g1"), "create")
+
+    assert backend.delete_game("g1") is True
+    assert backend.load_game("g1") is None
+    assert backend.delete_game("g1") is False
+    assert backend.list_game_summaries() == ([], 0)
+
+def test_archive_game(backend, make_game):
+    game = make_game("g1", completed_at="2024-05-02T12:00:00", phase='finished')
+    backend.save_game(game, "create")
+    backend.archive_game(game)
+
+    assert backend.load_game("g1") is None
+    assert backend.load_archived_game("g1")['id'] == "g1"
+    assert [g['id'] for g in backend.iter_archived_games()] == ["g1"]
+    assert backend.list_games() == []
+
+def test_list_games_and_summaries(backend, make_game):
+    backend.save_game(make_game("old", name="Old", created_at="2024-01-01T00:00:00"), "create")
+    backend.save_game(make_game("new", name="New", created_at="2024-02-01T00:00:00",
+                                usernames=("alice", "bob")), "create")
+
+    assert {g['id'] for g in backend.list_games()} == {"old", "new"}
+    summaries, total = backend.list_game_summaries()
+    assert total == 2
+    assert [s['id'] for s in summaries] == ["new", "old"]
+    assert summaries[0]['player_count'] == 2
+    assert summaries[0]['open_slots'] == 3
+
+def test_results(backend):
+    backend.save_result("g1", _result("Max Verstappen", "Red Bull Racing", ["alice"], "2024-01-01T00:00:00"))
+    backend.save_result("g2", _result("Lando Norris", "McLaren", ["alice", "bob"], "2024-02-01T00:00:00"))
+
+    assert backend.load_result("g1")['drivers_championship']['driver'] == "Max Verstappen"
+    assert backend.load_result("missing") is None
+    assert set(backend.list_results()) == {"g1", "g2"}
+
+    assert [r['game_id'] for r in backend.find_results()] == ["g2", "g1"]
+    assert [r['game_id'] for r in backend.find_results(champion="McLaren")] == ["g2"]
+    assert [r['game_id'] for r in backend.find_results(username="alice")] == ["g2", "g1"]
+    assert [r['game_id'] for r in backend.find_results(username="bob")] == ["g2"]
+    assert [r['game_id'] for r in backend.find_results(since="2024-01-15")] == ["g2"]
+    assert [r['game_id'] for r in backend.find_results(until="2024-01-15")] == ["g1"]
+
+def test_users(backend):
+    assert backend.create_user("alice", {'password_hash': 'x'}) is True
+    assert backend.create_user("alice", {'password_hash': 'y'}) is False
+
+    assert backend.load_user("alice") == {'password_hash': 'x'}
+    assert backend.load_user("bob") is None
+    assert list(backend.list_users()) == ["alice"]
+
+def test_sqlite_imports_json_stores(tmp_path, make_game):
+    json_backend = JsonBackend(str(tmp_path))
+    json_backend.save_game(make_game("g1"), "create")
+    json_backend.create_user("alice", {'password_hash': 'x'})
+
+    sqlite_backend = SqliteBackend(str(tmp_path))
+    assert sqlite_backend.load_game("g1")['name'] == "Test Game"
+    assert sqlite_backend.load_user("alice") == {'password_hash': 'x'}
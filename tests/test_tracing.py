@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from utils import tracing
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv(tracing.TRACE_FILE_ENV_VAR, str(path))
+    return path
+
+def _spans(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+class Store:
+    @tracing.traced()
+    def load_game(self, game_id):
+        return {'id': game_id}
+
+    @tracing.traced("Store.save", kind="json")
+    def save_game(self, game, op="save"):
+        raise ValueError("read-only")
+
+def test_nothing_is_recorded_at_sample_rate_zero(trace_file, monkeypatch):
+    monkeypatch.setenv(tracing.TRACE_SAMPLE_RATE_ENV_VAR, "0")
+
+    with tracing.trace("script_run", user="alice") as root:
+        assert root is None
+        with tracing.span("child") as child:
+            assert child is None
+        assert Store().load_game("g1") == {'id': "g1"}
+    assert tracing.current_span() is None
+    assert not trace_file.exists()
+
+def test_every_trace_is_recorded_at_sample_rate_one(trace_file, monkeypatch):
+    monkeypatch.setenv(tracing.TRACE_SAMPLE_RATE_ENV_VAR, "1")
+    for _ in range(20):
+        with tracing.trace("script_run") as root:
+            assert root is not None
+
+    spans = _spans(trace_file)
+    assert len(spans) == 20
+    assert len({span['trace_id'] for span in spans}) == 20
+
+def test_spans_nest_under_the_innermost_open_span(trace_file, monkeypatch):
+    monkeypatch.setenv(tracing.TRACE_SAMPLE_RATE_ENV_VAR, "1")
+    store = Store()
+
+    with tracing.trace("script_run", user="alice", page="welcome") as root:
+        with tracing.span("GameManager.join_game", game_id="g1") as manager_call:
+            store.load_game("g1")
+            with pytest.raises(ValueError):
+                store.save_game({'id': "g1"}, op="join")
+            manager_call.set(attempts=1)
+        # A trace started inside another one is just a child span
+        with tracing.trace("season_job", user="bob"):
+            pass
+        assert tracing.current_span() is root
+
+    spans = {span['name']: span for span in _spans(trace_file)}
+    # Children end first, so the root span is the last line
+    assert list(spans)[-1] == "script_run"
+    assert {span['trace_id'] for span in spans.values()} == {root.trace.trace_id}
+    assert {span['user'] for span in spans.values()} == {"alice"}
+
+    assert spans["script_run"]['parent_id'] is None
+    assert spans["script_run"]['attributes'] == {'page': "welcome"}
+    assert spans["GameManager.join_game"]['parent_id'] == spans["script_run"]['span_id']
+    assert spans["GameManager.join_game"]['attributes'] == {'game_id': "g1", 'attempts': 1}
+    assert spans["season_job"]['parent_id'] == spans["script_run"]['span_id']
+
+    assert spans["Store.load_game"]['parent_id'] == spans["GameManager.join_game"]['span_id']
+    assert spans["Store.load_game"]['attributes'] == {'game_id': "g1"}
+    assert spans["Store.load_game"]['exception'] is None
+    assert spans["Store.save"]['parent_id'] == spans["GameManager.join_game"]['span_id']
+    assert spans["Store.save"]['attributes'] == {'kind': "json", 'game_id': "g1", 'op': "join"}
+    assert spans["Store.save"]['exception'] == "ValueError"
+    assert all(span['duration_ms'] >= 0 for span in spans.values())
+
+def test_bad_sample_rate_falls_back_to_the_default(monkeypatch):
+    monkeypatch.setenv(tracing.TRACE_SAMPLE_RATE_ENV_VAR, "often")
+    assert tracing._sample_rate() == tracing.DEFAULT_TRACE_SAMPLE_RATE
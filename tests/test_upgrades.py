@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from game import engine
+from game.drafting import season_entries
+from game.manager import GameManager
+from game.mechanics import GameMechanics
+from game.performance import performance_matrix
+from game.upgrades import NO_MODIFIERS, UPGRADES, upgrade_modifiers
+
+@pytest.fixture(scope="module")
+def entries():
+    return season_entries({})
+
+@pytest.fixture
+def game(tmp_path):
+    manager = GameManager(str(tmp_path))
+    game = manager.create_game("Test Game", "alice")
+    manager.select_team(game['id'], "alice", "McLaren")
+    return manager.select_drivers(game['id'], "McLaren", ["Lando Norris", "Oscar Piastri"])
+
+def test_upgrade_modifiers_fill_in_the_neutral_ones():
+    assert upgrade_modifiers(None) == NO_MODIFIERS
+    assert upgrade_modifiers("tyres") == dict(NO_MODIFIERS, car=0.8, consistency=2.0)
+
+@pytest.mark.parametrize('upgrade', sorted(UPGRADES))
+def test_upgrade_changes_only_its_teams_columns(entries, upgrade):
+    team = entries[0]['team']
+    plain = performance_matrix(entries)
+    upgraded = performance_matrix(entries, upgrades={team: upgrade})
+    own = np.array([entry['team'] == team for entry in entries])
+
+    changed = np.zeros(len(entries), dtype=bool)
+    for key in plain:
+        assert (upgraded[key][:, ~own] == plain[key][:, ~own]).all()
+        changed |= (upgraded[key] != plain[key]).any(axis=0)
+    assert changed[own].all()
+
+def test_season_with_upgrades_replays_exactly(tmp_path, game):
+    manager = GameManager(str(tmp_path))
+    mechanics = GameMechanics(str(tmp_path))
+    with manager.transaction(game['id']) as tx:
+        tx.set_upgrade("McLaren", "power_unit")
+    result = mechanics.simulate_season(game['id'], game['players'])
+
+    stored = mechanics.get_game_results(game['id'])
+    assert stored['upgrades'] == {"McLaren": "power_unit"}
+    season = mechanics.replay_season(stored)
+    assert [season.entries[i]['name'] for i in season.driver_ranking()] == \
+        [row['driver'] for row in result['driver_standings']]
+
+    upgraded = engine.simulate_season(stored['entries'], seed=stored['seed'], upgrades=stored['upgrades'])
+    plain = engine.simulate_season(stored['entries'], seed=stored['seed'])
+    assert (season.positions == upgraded.positions).all()
+    assert (season.dnf == upgraded.dnf).all()
+    assert not (season.positions == plain.positions).all()
+
+def test_upgrade_advice_ranks_the_affordable_upgrades(tmp_path, game, monkeypatch):
+    # Priced out of every budget
+    monkeypatch.setitem(UPGRADES["power_unit"], "cost", 10 ** 9)
+    mechanics = GameMechanics(str(tmp_path))
+    advice = mechanics.upgrade_advice(game['id'], "McLaren", seasons=400, max_seconds=60, seed=0)
+
+    assert advice['seasons'] == 400
+    assert sorted(row['upgrade'] for row in advice['upgrades']) == sorted(set(UPGRADES) - {"power_unit"})
+    expected = [row['expected_points'] for row in advice['upgrades']]
+    assert expected == sorted(expected, reverse=True)
+    for row in advice['upgrades']:
+        assert row['gain_low'] <= row['gain'] <= row['gain_high']
+        assert row['expected_points'] == pytest.approx(advice['baseline_points'] + row['gain'])
+    # The biggest car upgrade left beats no upgrade in the same seasons
+    assert advice['upgrades'][0]['upgrade'] == "aerodynamics"
+    assert advice['upgrades'][0]['gain_low'] > 0
+
+    assert mechanics.upgrade_advice(game['id'], "McLaren", seasons=400, max_seconds=60, seed=0) == advice
@@ -0,0 +1,73 @@
+from typing import Dict, List
+import streamlit as st
+from game.jobs import Job, JobStatus, get_job_runner
+
+# How often a page watching a running season checks its job again
+JOB_POLL_SECONDS = 0.25
+
+def show_race_table(races: List[Dict]):
+    """One row per race: the winner, the podium and the retirements"""
+    st.dataframe(
+        [
+            {
+                'Round': round_number,
+                'Grand Prix': race['track'],
+                'Winner': race['finishing_order'][0],
+                'Podium': ", ".join(race['finishing_order'][:3]),
+                'Retired': ", ".join(race['dnfs'])
+            }
+            for round_number, race in enumerate(races, 1)
+        ],
+        hide_index=True,
+        use_container_width=True
+    )
+
+def show_season_job(job: Job):
+    """
+    Render a season job as it runs: a progress bar, the latest race and the
+    live standings. Only reads the job's in-memory state, so pages can poll
+    it on every rerun.
+    """
+    if job.status == JobStatus.QUEUED:
+        st.progress(0.0, text="Waiting for the season to start...")
+        return
+
+    event = job.latest_race
+    if event is None:
+        st.progress(0.0, text="Starting the season...")
+        return
+
+    st.progress(job.progress,
+                text=f"Round {event['round']} of {event['rounds']}: {event['track']}")
+
+    winner = event['finishing_order'][0]
+    retirements = f" | Retired: {', '.join(event['dnfs'])}" if event['dnfs'] else ""
+    st.markdown(f"**{event['track']}** won by **{winner}**{retirements}")
+
+    st.dataframe(
+        [
+            {
+                'Pos': position,
+                'Driver': row['driver'],
+                'Team': row['team'],
+                'Points': row['points'],
+                'Last Race': f"+{row['race_points']}",
+                'Change': f"{row['change']:+d}" if row['change'] else ""
+            }
+            for position, row in enumerate(event['driver_standings'], 1)
+        ],
+        hide_index=True,
+        use_container_width=True
+    )
+
+    # Copied first: the job's thread keeps appending to the list
+    st.markdown("**Race by race**")
+    show_race_table(list(job.races))
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def watch_season_job(job_id: str):
+    """Poll a season job without rerunning the page, then rerun it once the job is over"""
+    job = get_job_runner().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    show_season_job(job)
@@ -0,0 +1,252 @@
+"""
+In-process metrics: labelled counters and histograms, cheap enough to update
+on every store call and page render.
+
+Metrics are exposed two ways: a background thread periodically writes them
+in the Prometheus text format to METRICS_FILE (for node_exporter's textfile
+collector or any scraper), and the admin-only diagnostics page reads them
+through metrics().
+"""
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Where and how often the Prometheus text file is written
+METRICS_FILE_ENV_VAR = "F1_METRICS_FILE"
+METRICS_INTERVAL_ENV_VAR = "F1_METRICS_INTERVAL"
+DEFAULT_METRICS_FILE = "data/metrics.prom"
+DEFAULT_METRICS_INTERVAL = 15.0
+
+# Histogram buckets (upper bounds) for durations in seconds and sizes in bytes
+SECONDS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Counter:
+    """Monotonic count per label set"""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Dict[Labels, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {value:g}" for labels, value in self.samples().items()]
+
+class _HistogramValues:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * bucket_count
+        self.sum = 0.0
+        self.count = 0
+
+class Histogram:
+    """Observations per label set in fixed buckets, with their count and sum"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = SECONDS_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._values: Dict[Labels, _HistogramValues] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        # Values above the last bound land in the implicit +Inf bucket
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = _HistogramValues(len(self.buckets) + 1)
+            values.counts[bucket] += 1
+            values.sum += value
+            values.count += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall time of a block, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels):
+        """Decorator observing the wall time of every call"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def samples(self) -> Dict[Labels, Dict]:
+        with self._lock:
+            return {
+                labels: {'counts': list(values.counts), 'sum': values.sum, 'count': values.count}
+                for labels, values in self._values.items()
+            }
+
+    def quantile(self, sample: Dict, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile of a sample (None if above the last bound)"""
+        if not sample['count']:
+            return None
+        rank = q * sample['count']
+        seen = 0
+        for bound, count in zip(self.buckets, sample['counts']):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, sample in self.samples().items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, sample['counts']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', '+Inf'))} {sample['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {sample['sum']:g}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {sample['count']}")
+        return lines
+
+_registry: Dict[str, object] = {}
+_registry_lock = threading.Lock()
+
+def _register(metric):
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+def counter(name: str, help_text: str) -> Counter:
+    """The process-wide counter of a name, created on first use"""
+    return _register(Counter(name, help_text))
+
+def histogram(name: str, help_text: str, buckets: Sequence[float] = SECONDS_BUCKETS) -> Histogram:
+    """The process-wide histogram of a name, created on first use"""
+    return _register(Histogram(name, help_text, buckets))
+
+def metrics() -> List:
+    with _registry_lock:
+        return sorted(_registry.values(), key=lambda metric: metric.name)
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in metrics():
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def write_file(path: Path) -> None:
+    """Write render() atomically, so scrapers never read a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(render())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def start_file_exporter(path: Optional[str] = None, interval: Optional[float] = None) -> None:
+    """
+    Write the metrics file every `interval` seconds from a daemon thread.
+    Only the first call per process starts it; path and interval default
+    to the F1_METRICS_FILE and F1_METRICS_INTERVAL variables.
+    """
+    global _exporter
+    with _exporter_lock:
+        if _exporter is not None:
+            return
+        path = Path(path or os.environ.get(METRICS_FILE_ENV_VAR, DEFAULT_METRICS_FILE))
+        interval = interval or float(os.environ.get(METRICS_INTERVAL_ENV_VAR, DEFAULT_METRICS_INTERVAL))
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    write_file(path)
+                except Exception as e:
+                    logger.error(f"Error writing metrics to {path}: {e}")
+
+        _exporter = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+        _exporter.start()
+        logger.info(f"Writing metrics to {path} every {interval:g}s")
+
+# Store I/O, shared by every storage backend
+STORE_CALL_SECONDS = histogram("f1_store_call_seconds", "Wall time of storage backend calls")
+STORE_READ_BYTES = counter("f1_store_read_bytes_total", "Bytes of JSON read from the store")
+STORE_WRITE_BYTES = counter("f1_store_write_bytes_total", "Bytes of JSON written to the store")
+STORE_DOCUMENT_BYTES = histogram("f1_store_document_bytes", "Size of JSON documents read or written",
+                                 BYTES_BUCKETS)
+STORE_PARSE_SECONDS = histogram("f1_store_parse_seconds", "Time spent parsing JSON read from the store")
+STORE_SERIALIZE_SECONDS = histogram("f1_store_serialize_seconds",
+                                    "Time spent serializing JSON written to the store")
+
+# Pages
+PAGE_RENDER_SECONDS = histogram("f1_page_render_seconds", "Wall time of a view's show()")
+ROUTES = counter("f1_routes_total", "Routing decisions of the app's main()")
+
+def load_json(data: Union[bytes, str], backend: str):
+    """json.loads for store documents, recording their size and parse time"""
+    start = time.perf_counter()
+    value = json.loads(data)
+    STORE_PARSE_SECONDS.observe(time.perf_counter() - start, backend=backend)
+    STORE_READ_BYTES.inc(len(data), backend=backend)
+    STORE_DOCUMENT_BYTES.observe(len(data), backend=backend, direction="read")
+    return value
+
+def dump_json(value, backend: str, **kwargs) -> str:
+    """json.dumps for store documents, recording their size and serialize time"""
+    start = time.perf_counter()
+    data = json.dumps(value, **kwargs)
+    STORE_SERIALIZE_SECONDS.observe(time.perf_counter() - start, backend=backend)
+    STORE_WRITE_BYTES.inc(len(data), backend=backend)
+    STORE_DOCUMENT_BYTES.observe(len(data), backend=backend, direction="write")
+    return data
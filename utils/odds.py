@@ -0,0 +1,62 @@
+import streamlit as st
+from game.jobs import JobStatus, get_job_runner
+from utils.live_season import JOB_POLL_SECONDS
+
+# Seasons and interval half-width used for the odds shown on the game pages
+ODDS_SEASONS = 20_000
+ODDS_TOLERANCE = 0.01
+
+def _format_odds(row: dict) -> str:
+    return f"{row['probability']:.1%} ({row['low']:.1%} - {row['high']:.1%})"
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _wait_for_odds(job_id: str):
+    """Poll an odds job without rerunning the page, then rerun it once the job is over"""
+    job = get_job_runner().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    st.caption("Estimating title odds...")
+
+def show_title_odds(game: dict):
+    """
+    Show championship odds for a game's lineup, estimated once per game
+    version by a background job
+    """
+    st.markdown('<h3 class="section-title">Title Odds</h3>', unsafe_allow_html=True)
+
+    cache_key = (game['id'], game.get('version', 0))
+    if st.session_state.get('title_odds_key') != cache_key:
+        job = get_job_runner().submit_odds(game['id'], game.get('version', 0),
+                                           ODDS_SEASONS, ODDS_TOLERANCE)
+        if job.status == JobStatus.FAILED:
+            st.warning(f"Could not estimate title odds: {job.error}")
+            return
+        if job.status != JobStatus.DONE:
+            _wait_for_odds(job.id)
+            return
+        st.session_state.title_odds = job.result
+        st.session_state.title_odds_key = cache_key
+    odds = st.session_state.title_odds
+
+    # Player entries are always listed, AI ones only if they won a simulated title
+    col1, col2 = st.columns(2)
+    with col1:
+        st.dataframe(
+            [
+                {'Driver': row['driver'], 'Team': row['team'], 'Chance': _format_odds(row)}
+                for row in odds['drivers'] if row['probability'] > 0 or not row['is_ai']
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+    with col2:
+        st.dataframe(
+            [
+                {'Team': row['team'], 'Chance': _format_odds(row)}
+                for row in odds['constructors'] if row['probability'] > 0 or not row['is_ai']
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+    st.caption(f"From {odds['seasons']:,} simulated seasons, "
+               f"{odds['confidence']:.0%} confidence intervals")
@@ -0,0 +1,176 @@
+"""
+Lightweight tracing: one trace per Streamlit script run (or background job),
+with child spans for every manager call, store call and file operation.
+
+Whether a trace is recorded is decided once when it starts (F1_TRACE_SAMPLE_RATE),
+so an unsampled run costs one context variable lookup per span. Spans of a
+sampled trace are buffered and appended to TRACE_FILE as JSON lines when its
+root span ends, one object per span:
+
+    {"trace_id": ..., "span_id": ..., "parent_id": ..., "name": "GameManager.select_drivers",
+     "start": 1700000000.123, "duration_ms": 4.2, "user": "alice",
+     "attributes": {"game_id": "..."}, "exception": null}
+
+Grouping the lines by trace_id shows every read and write one click caused.
+"""
+import contextvars
+import inspect
+import json
+import os
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Where traces go and which fraction of them is recorded (0 disables tracing)
+TRACE_FILE_ENV_VAR = "F1_TRACE_FILE"
+TRACE_SAMPLE_RATE_ENV_VAR = "F1_TRACE_SAMPLE_RATE"
+DEFAULT_TRACE_FILE = "data/traces.jsonl"
+DEFAULT_TRACE_SAMPLE_RATE = 0.01
+
+# Call arguments copied onto a traced function's span
+ATTRIBUTE_ARGS = ('game_id', 'username', 'team', 'op', 'page', 'month')
+
+class _Trace:
+    __slots__ = ('trace_id', 'user', 'spans')
+
+    def __init__(self, user: Optional[str]):
+        self.trace_id = secrets.token_hex(16)
+        self.user = user
+        self.spans: List[Dict] = []
+
+class Span:
+    """An open span; attributes can be added until it ends"""
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes')
+
+    def __init__(self, trace: _Trace, parent_id: Optional[str], name: str, attributes: Dict):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+# The innermost open span of the current thread or task
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('span', default=None)
+_write_lock = threading.Lock()
+
+def _sample_rate() -> float:
+    try:
+        return float(os.environ.get(TRACE_SAMPLE_RATE_ENV_VAR, DEFAULT_TRACE_SAMPLE_RATE))
+    except ValueError:
+        return DEFAULT_TRACE_SAMPLE_RATE
+
+def trace_file() -> Path:
+    return Path(os.environ.get(TRACE_FILE_ENV_VAR, DEFAULT_TRACE_FILE))
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+@contextmanager
+def _open(span: Span) -> Iterator[Span]:
+    """Make a span current for a block and record it when the block exits"""
+    token = _current.set(span)
+    start = time.time()
+    started = time.perf_counter()
+    exception = None
+    try:
+        yield span
+    except BaseException as e:
+        # Also Streamlit's rerun/stop exceptions, so navigation shows up in the trace
+        exception = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        span.trace.spans.append({
+            'trace_id': span.trace.trace_id,
+            'span_id': span.span_id,
+            'parent_id': span.parent_id,
+            'name': span.name,
+            'start': round(start, 6),
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            'user': span.trace.user,
+            'attributes': span.attributes,
+            'exception': exception
+        })
+
+@contextmanager
+def trace(name: str, user: Optional[str] = None, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Start a trace with a root span, sampled at F1_TRACE_SAMPLE_RATE.
+    Yields None when the trace is not sampled; nested traces become child spans.
+    """
+    if _current.get() is not None:
+        with span(name, **attributes) as child:
+            yield child
+        return
+
+    rate = _sample_rate()
+    if rate <= 0 or random.random() >= rate:
+        yield None
+        return
+
+    root = Span(_Trace(user), None, name, attributes)
+    try:
+        with _open(root):
+            yield root
+    finally:
+        _write(root.trace)
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """A child span of the current span; does nothing outside a sampled trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _open(Span(parent.trace, parent.span_id, name, attributes)) as child:
+        yield child
+
+def traced(name: Optional[str] = None, **static_attributes):
+    """
+    Decorator running every call in a child span named after the function.
+    Arguments listed in ATTRIBUTE_ARGS, and the id of a `game` argument,
+    become span attributes next to the given static ones.
+    """
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+        signature = inspect.signature(fn)
+        wanted = [arg for arg in ATTRIBUTE_ARGS if arg in signature.parameters]
+        takes_game = 'game' in signature.parameters
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+            attributes = dict(static_attributes)
+            attributes.update((arg, arguments[arg]) for arg in wanted if arg in arguments)
+            if takes_game and isinstance(arguments.get('game'), dict):
+                attributes['game_id'] = arguments['game'].get('id')
+            with span(span_name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _write(finished: _Trace) -> None:
+    """Append a finished trace's spans; tracing problems never break the app"""
+    path = trace_file()
+    try:
+        # Children end before their parents, so the root span is the last line
+        data = "".join(json.dumps(record, default=str) + "\n" for record in finished.spans)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _write_lock:
+            with open(path, 'a') as f:
+                f.write(data)
+    except Exception as e:
+        logger.error(f"Error writing trace {finished.trace_id} to {path}: {e}")
@@ -0,0 +1,61 @@
+import streamlit as st
+from game.user_manager import UserManager
+from utils import metrics
+from utils.state import navigate_back
+
+def _labels(labels) -> str:
+    return ", ".join(f"{name}={value}" for name, value in labels)
+
+def _format(value, seconds: bool) -> str:
+    """A histogram value; None is a quantile above the last bucket"""
+    if value is None:
+        return "above last bucket"
+    return f"{value * 1000:.2f} ms" if seconds else f"{value:,.0f} B"
+
+def show():
+    try:
+        # Admins only; main() routes here just for them, this guards direct session edits
+        if not UserManager.is_admin(st.session_state.user):
+            st.error("Diagnostics are only available to admins")
+            return
+
+        st.markdown('<div class="content-container">', unsafe_allow_html=True)
+        st.markdown('<h1 class="big-title">Diagnostics</h1>', unsafe_allow_html=True)
+        st.caption("Metrics of this server process since it started")
+
+        for metric in metrics.metrics():
+            st.markdown(f'<h3 class="section-title">{metric.name}</h3>', unsafe_allow_html=True)
+            st.caption(metric.help_text)
+            if metric.kind == "counter":
+                rows = [
+                    {'Labels': _labels(labels), 'Value': value}
+                    for labels, value in sorted(metric.samples().items())
+                ]
+            else:
+                seconds = metric.buckets == metrics.SECONDS_BUCKETS
+                rows = []
+                for labels, sample in sorted(metric.samples().items()):
+                    rows.append({
+                        'Labels': _labels(labels),
+                        'Count': sample['count'],
+                        'Mean': _format(sample['sum'] / sample['count'], seconds),
+                        # Bucket upper bounds, so the real percentiles are at most these
+                        'p50 ≤': _format(metric.quantile(sample, 0.5), seconds),
+                        'p95 ≤': _format(metric.quantile(sample, 0.95), seconds)
+                    })
+            if rows:
+                st.dataframe(rows, hide_index=True, use_container_width=True)
+            else:
+                st.write("No samples yet")
+
+        st.download_button("Download Prometheus text", metrics.render(),
+                           file_name="metrics.prom", mime="text/plain")
+
+        if st.button("Back", use_container_width=True):
+            navigate_back()
+
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    except Exception as e:
+        st.error(f"Error in diagnostics view: {str(e)}")
+        st.write("Debug info:", str(e))  # Temporary debug line
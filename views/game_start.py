@@ -1,13 +1,13 @@
 import streamlit as st
+from game.jobs import JobStatus, get_job_runner
 from game.manager import GameManager
-from game.mechanics import GameMechanics
+from utils.odds import show_title_odds
 from utils.state import navigate_to
 
 def show():
     try:
-        # Initialize managers
+        # Initialize manager
         game_manager = GameManager()
-        game_mechanics = GameMechanics()
         
         # Get current game state
         game = game_manager.get_game(st.session_state.game_id)
@@ -60,16 +60,24 @@ def show():
             with col2:
                 st.write(team)
         
-        # Start button
+        # Championship odds for this lineup
+        show_title_odds(game)
+
         st.markdown("<br><br>", unsafe_allow_html=True)  # Add some spacing
+
+        # The season runs as a background job shared by every player of the game
+        job_runner = get_job_runner()
+        job = job_runner.job_for_game(game['id'])
+        if job and job.status not in (JobStatus.FAILED, JobStatus.CANCELLED):
+            # The results page shows the season race by race as it is simulated
+            navigate_to('results')
+
+        if job and job.status == JobStatus.FAILED:
+            st.error(f"The season could not be simulated: {job.error}")
+
+        # Start button
         if st.button("Start Season!", type="primary", use_container_width=True):
-            # Simulate season and get results
-            results = game_mechanics.simulate_season(game['id'], game['players'])
-            
-            # Store results in session state
-            st.session_state.game_results = results
-            
-            # Navigate to results page
+            job_runner.submit_season(game['id'], game['players'])
             navigate_to('results')
         
         st.markdown('</div>', unsafe_allow_html=True)
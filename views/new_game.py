@@ -1,7 +1,7 @@
 import streamlit as st
 from utils.state import navigate_to, navigate_back
 from game.manager import GameManager, GamePhase
-from game.data import TEAMS
+from game import roster
 
 def get_button_text(team_name: str, game_state: dict) -> str:
     """Get the text to display on the team button"""
@@ -21,12 +21,10 @@ def select_team(team: str):
     """Handle team selection for the current player"""
     try:
         game_manager = GameManager()
-        game = game_manager.select_team(
-            st.session_state.game_id,
-            st.session_state.user,
-            team
-        )
-        st.session_state.game_state = game
+        with game_manager.transaction(st.session_state.game_id,
+                                      st.session_state.game_state) as tx:
+            tx.select_team(st.session_state.user, team)
+        st.session_state.game_state = tx.game
         st.rerun()
     except ValueError as e:
         st.error(str(e))
@@ -100,7 +98,7 @@ def show():
     
     # Left column teams
     with cols[0]:
-        for team in TEAMS[:5]:
+        for team in roster.TEAMS.records[:5]:
             is_selected = current_team == team.name
             is_taken = team.name in taken_teams and not is_selected
             
@@ -124,7 +122,7 @@ def show():
     
     # Right column teams
     with cols[1]:
-        for team in TEAMS[5:]:
+        for team in roster.TEAMS.records[5:]:
             is_selected = current_team == team.name
             is_taken = team.name in taken_teams and not is_selected
             
@@ -152,7 +150,9 @@ def show():
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("Start Game!", type="primary", use_container_width=True):
             # Update game phase
-            game_manager.update_game_phase(st.session_state.game_id, GamePhase.DRIVER_SELECTION)
+            with game_manager.transaction(st.session_state.game_id,
+                                          st.session_state.game_state) as tx:
+                tx.set_phase(GamePhase.DRIVER_SELECTION)
             # Clear any previous driver selections
             if 'driver_selections' in st.session_state:
                 del st.session_state.driver_selections
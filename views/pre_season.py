@@ -1,34 +1,16 @@
 import streamlit as st
 from utils.state import navigate_to, navigate_back
 from game.manager import GameManager, GamePhase
-from game.data import TEAMS
+from game.mechanics import GameMechanics
+from game import roster
+from game.upgrades import UPGRADES
+from utils.odds import show_title_odds
 
-# Pre-season upgrade options and their costs
-UPGRADES = {
-    "hydraulics": {"cost": 8000000, "description": "Improves car reliability and handling"},
-    "aerodynamics": {"cost": 15000000, "description": "Better downforce and straight-line speed"},
-    "tyres": {"cost": 5000000, "description": "Better tyre wear and grip"},
-    "power_unit": {"cost": 20000000, "description": "More power and better fuel efficiency"},
-    "brakes": {"cost": 7000000, "description": "Enhanced braking performance"},
-    "driver_fitness": {"cost": 3000000, "description": "Improves driver stamina"},
-    "driver_reactions": {"cost": 4000000, "description": "Faster response times"},
-    "driver_mentality": {"cost": 2000000, "description": "Better focus and race management"}
-}
-
-def save_upgrade(game_id: str, team: str, upgrade: str) -> None:
-    """Save the selected upgrade to the game data"""
+def save_upgrade(game_id: str, team: str, upgrade: str, game: dict = None) -> None:
+    """Save the selected upgrade to the game data (pass the loaded game to skip a read)"""
     game_manager = GameManager()
-    game = game_manager.get_game(game_id)
-    
-    # Initialize upgrades if not present
-    if 'upgrades' not in game:
-        game['upgrades'] = {}
-    
-    # Save the team's upgrade choice
-    game['upgrades'][team] = upgrade
-    
-    # Save changes
-    game_manager.save_game(game)
+    with game_manager.transaction(game_id, game) as tx:
+        tx.set_upgrade(team, upgrade)
 
 def show():
     try:
@@ -48,7 +30,7 @@ def show():
         current_team = current_player['team']
         
         # Get team data
-        team_data = next(team for team in TEAMS if team.name == current_team)
+        team_data = roster.TEAMS[current_team]
         
         st.markdown('<div class="content-container">', unsafe_allow_html=True)
         
@@ -97,18 +79,46 @@ def show():
                     disabled=not can_afford,
                     use_container_width=True
                 ):
-                    save_upgrade(st.session_state.game_id, current_team, upgrade)
+                    save_upgrade(st.session_state.game_id, current_team, upgrade, game)
                     st.rerun()
                 
                 # Show description under button
                 st.markdown(f"<p style='font-size: 0.9em; color: #666;'>{details['description']}</p>", 
                           unsafe_allow_html=True)
         
+        # Simulated points gain of each affordable upgrade, computed on request
+        st.markdown('<h3 class="section-title">Upgrade Advisor</h3>', unsafe_allow_html=True)
+        advice_key = (game['id'], game.get('version', 0), current_team)
+        if st.button("Rank Upgrades", use_container_width=True):
+            st.session_state.upgrade_advice = GameMechanics().upgrade_advice(game['id'], current_team)
+            st.session_state.upgrade_advice_key = advice_key
+        if st.session_state.get('upgrade_advice_key') == advice_key:
+            advice = st.session_state.upgrade_advice
+            st.dataframe(
+                [
+                    {
+                        'Upgrade': row['upgrade'].replace('_', ' ').title(),
+                        'Cost': f"${row['cost']:,}",
+                        'Expected Points': round(row['expected_points'], 1),
+                        'Gain': f"{row['gain']:+.1f} ({row['gain_low']:+.1f} to {row['gain_high']:+.1f})"
+                    }
+                    for row in advice['upgrades']
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+            st.caption(f"From {advice['seasons']:,} simulated seasons, "
+                       f"{advice['baseline_points']:.1f} points expected without an upgrade")
+
+        # Championship odds for the current lineup
+        show_title_odds(game)
+
         # Add Continue button
         st.markdown("<br>", unsafe_allow_html=True)
         if st.button("Continue", type="primary", use_container_width=True):
             if current_upgrade:  # Only proceed if an upgrade is selected
-                game_manager.update_game_phase(st.session_state.game_id, GamePhase.SEASON)
+                with game_manager.transaction(st.session_state.game_id, game) as tx:
+                    tx.set_phase(GamePhase.SEASON)
                 navigate_to('game_start')
             else:
                 st.error("Please select an upgrade before continuing")
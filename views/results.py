@@ -1,10 +1,77 @@
+from typing import Dict
+import numpy as np
 import streamlit as st
+from game import roster
+from game.jobs import JobStatus, get_job_runner
+from game.mechanics import GameMechanics
+from game.timeline import GAP_RETIRED, GAP_UNIT
+from utils.live_season import show_race_table, watch_season_job
 from utils.state import navigate_to
 
+def _gap(position: int, gap: int) -> str:
+    if gap == GAP_RETIRED:
+        return "Retired"
+    return "Leader" if position == 1 else f"+{gap * GAP_UNIT:.1f}s"
+
+def show_replay(laps: np.ndarray, results: Dict):
+    """The running order of one lap of one race"""
+    races, lap_count, _ = laps.shape
+    race = st.selectbox("Grand Prix", range(races), format_func=lambda i: roster.TRACKS.names[i],
+                        key="replay_race")
+    lap = st.slider("Lap", 1, lap_count, lap_count, key="replay_lap")
+
+    # Only this lap's row of the mapped file is read
+    row = np.array(laps[race, lap - 1])
+    entries = results['entries']
+    st.dataframe(
+        [
+            {
+                'Pos': int(row['position'][i]),
+                'Driver': entries[i]['name'],
+                'Team': entries[i]['team'],
+                'Gap': _gap(int(row['position'][i]), int(row['gap'][i]))
+            }
+            for i in np.argsort(row['position'])
+        ],
+        hide_index=True,
+        use_container_width=True
+    )
+
+def show_running_season():
+    """
+    Show the game's season job race by race while it runs. Once it is over
+    its result is kept in the session state and the page reruns to show it
+    """
+    job_runner = get_job_runner()
+    game_id = st.session_state.game_id
+    job = job_runner.job_for_game(game_id)
+    if job is None or job.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+        # A job forgotten by the runner may still have saved its season
+        results = GameMechanics().get_game_results(game_id) if job is None else None
+        if results is None:
+            # The start page reports a failure and lets the season be started again
+            navigate_to('game_start')
+        st.session_state.game_results = results
+        st.rerun()
+    if job.status == JobStatus.DONE:
+        st.session_state.game_results = job.result
+        st.rerun()
+
+    st.markdown('<h1 class="big-title">Season in Progress</h1>', unsafe_allow_html=True)
+    # Only the job's progress is polled; the page reruns once the job is over
+    watch_season_job(job.id)
+
+    if st.button("Cancel Season", use_container_width=True):
+        job_runner.cancel(job.id)
+        st.rerun()
+
 def show():
     try:
-        # Get results from session state
-        results = st.session_state.game_results
+        # Get results from session state, or follow the season while it is simulated
+        results = st.session_state.get('game_results')
+        if results is None:
+            show_running_season()
+            return
         
         st.markdown('<div class="content-container">', unsafe_allow_html=True)
         
@@ -45,6 +112,48 @@ def show():
                 unsafe_allow_html=True
             )
         
+        # Final standings (results saved before the season engine only have the champions)
+        if results.get('driver_standings'):
+            st.markdown('<h2 class="section-title">Drivers Standings</h2>', unsafe_allow_html=True)
+            st.dataframe(
+                [
+                    {
+                        'Pos': position,
+                        'Driver': row['driver'],
+                        'Team': row['team'],
+                        'Points': row['points'],
+                        'Wins': row['wins'],
+                        'Podiums': row['podiums'],
+                        'DNFs': row['dnfs']
+                    }
+                    for position, row in enumerate(results['driver_standings'], 1)
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+
+        if results.get('constructor_standings'):
+            st.markdown('<h2 class="section-title">Constructors Standings</h2>', unsafe_allow_html=True)
+            st.dataframe(
+                [
+                    {'Pos': position, 'Team': row['team'], 'Points': row['points']}
+                    for position, row in enumerate(results['constructor_standings'], 1)
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+
+        # Race by race results, regenerated from the season's seed
+        if results.get('seed') is not None:
+            with st.expander("Race by race"):
+                show_race_table(GameMechanics().get_race_results(st.session_state.game_id))
+
+            # Lap by lap replay, read from the memory-mapped season timeline
+            laps = GameMechanics().race_timeline(st.session_state.game_id)
+            if laps is not None:
+                with st.expander("Race replay"):
+                    show_replay(laps, results)
+
         # Back to welcome button
         st.markdown("<br><br>", unsafe_allow_html=True)
         if st.button("Back to Welcome", type="primary", use_container_width=True):
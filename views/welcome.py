@@ -1,7 +1,15 @@
 import streamlit as st
+from game.data import MAX_PLAYERS
 from game.manager import GameManager
+from game.user_manager import UserManager
 from utils.state import navigate_to
 
+# Games listed per page of the lobby
+LOBBY_PAGE_SIZE = 20
+
+def _reset_lobby_page():
+    st.session_state.lobby_page = 0
+
 def show():
     try:
         # Initialize game manager
@@ -40,52 +48,104 @@ def show():
                 else:
                     st.warning("Please enter a game name")
         
+        # Store and page metrics, for admins
+        if UserManager.is_admin(st.session_state.user):
+            with col2:
+                if st.button("Diagnostics", key="diagnostics_button", use_container_width=True):
+                    navigate_to('diagnostics')
+
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Existing games section
         try:
-            existing_games = game_manager.get_all_games()
-            if existing_games:
-                st.markdown("---")
-                st.markdown('<h2 class="sub-title">Existing Games</h2>', unsafe_allow_html=True)
+            st.markdown("---")
+            st.markdown('<h2 class="sub-title">Existing Games</h2>', unsafe_allow_html=True)
+
+            # Search and filter; changing either starts again from the first page
+            filter_cols = st.columns([3, 1])
+            with filter_cols[0]:
+                search = st.text_input(
+                    "Search games",
+                    placeholder="Search by name",
+                    key="lobby_search",
+                    label_visibility="collapsed",
+                    on_change=_reset_lobby_page
+                )
+            with filter_cols[1]:
+                open_only = st.checkbox("Open games only", key="lobby_open_only",
+                                        on_change=_reset_lobby_page)
 
+            page = st.session_state.get('lobby_page', 0)
+            games, total = game_manager.get_game_summaries(page, LOBBY_PAGE_SIZE, search, open_only)
+            page_count = max(1, -(-total // LOBBY_PAGE_SIZE))
+            if page >= page_count:
+                # Games were removed since the page was chosen
+                page = st.session_state.lobby_page = page_count - 1
+                games, total = game_manager.get_game_summaries(page, LOBBY_PAGE_SIZE, search, open_only)
+
+            if not games:
+                st.write("No games found")
+            else:
                 # Add column headers
-                header_cols = st.columns([2, 1, 1, 1])
+                header_cols = st.columns([2, 1, 1, 1, 1])
                 with header_cols[0]:
                     st.markdown('<p class="table-header">Name</p>', unsafe_allow_html=True)
                 with header_cols[1]:
                     st.markdown('<p class="table-header">Created</p>', unsafe_allow_html=True)
                 with header_cols[2]:
-                    st.markdown('<p class="table-header"></p>', unsafe_allow_html=True)
+                    st.markdown('<p class="table-header">Players</p>', unsafe_allow_html=True)
                 with header_cols[3]:
                     st.markdown('<p class="table-header"></p>', unsafe_allow_html=True)
-                
-                # Display each game with actions
-                for game in existing_games:
-                    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
-                    
+                with header_cols[4]:
+                    st.markdown('<p class="table-header"></p>', unsafe_allow_html=True)
+
+                # Display each game of this page with actions
+                for game in games:
+                    col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
+
                     with col1:
                         st.write(f"**{game['name']}**")
                     with col2:
                         st.write(f"{game['created_at'][:10]}")
                     with col3:
+                        st.write(f"{game['player_count']}/{MAX_PLAYERS}")
+                    with col4:
                         if st.button("Join", key=f"join_{game['id']}", type="secondary", use_container_width=True):
                             try:
-                                updated_game = game_manager.join_game(game['id'], st.session_state.user)
+                                # Join and fill in a missing phase with one write
+                                with game_manager.transaction(game['id']) as tx:
+                                    tx.join(st.session_state.user)
+                                    tx.ensure_phase()
                                 st.session_state.game_name = game['name']
                                 st.session_state.game_id = game['id']
-                                
+
                                 # Navigate based on game phase
-                                destination = game_manager.get_game_destination(updated_game)
+                                destination = game_manager.get_game_destination(tx.game)
                                 navigate_to(destination)
-                                
+
                             except ValueError as e:
                                 st.error(str(e))
-                    with col4:
+                    with col5:
                         if st.button("Delete", key=f"delete_{game['id']}", type="primary", use_container_width=True):
                             game_manager.delete_game(game['id'])
                             st.rerun()
 
+            # Page navigation
+            if page_count > 1:
+                nav_cols = st.columns([1, 2, 1])
+                with nav_cols[0]:
+                    if st.button("Previous", key="lobby_previous", disabled=page == 0, use_container_width=True):
+                        st.session_state.lobby_page = page - 1
+                        st.rerun()
+                with nav_cols[1]:
+                    st.markdown(f"<p style='text-align: center'>Page {page + 1} of {page_count}</p>",
+                                unsafe_allow_html=True)
+                with nav_cols[2]:
+                    if st.button("Next", key="lobby_next", disabled=page >= page_count - 1,
+                                 use_container_width=True):
+                        st.session_state.lobby_page = page + 1
+                        st.rerun()
+
         except Exception as e:
             st.error(f"Error loading existing games: {str(e)}")
 